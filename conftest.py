@@ -0,0 +1,9 @@
+import os
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def repository_directory(monkeypatch):
+
+    # Generators read their domains and options relative to the repository root.
+    monkeypatch.chdir(os.path.dirname(os.path.abspath(__file__)))
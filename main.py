@@ -1,5 +1,8 @@
 import argparse
+from src import instrumentation
 from src.generators import *
+from src.solvers import SEARCHES
+from src.strategies import MAZE_STRATEGIES
 
 parser = argparse.ArgumentParser(description="PDDL Path Solver",
                                  formatter_class=argparse.RawTextHelpFormatter)
@@ -12,6 +15,10 @@ parser.add_argument("-r", "--display_problems", type=bool, default=False, requir
 parser.add_argument("-t", "--solution_type", choices=solution_choices, default="each", required=False)
 
 parser.add_argument("-a", "--auto", action='store_true')
+parser.add_argument("-H", "--headless", action='store_true')
+parser.add_argument("-L", "--lazy", action='store_true')
+parser.add_argument("-I", "--incremental", action='store_true')
+parser.add_argument("-g", "--search_program_lines", action='store_true')
 parser.add_argument("-p", "--problem_count", type=int, default=5, required=False)
 parser.add_argument("-l", "--program_lines", type=int, default=10, required=False)
 parser.add_argument("-s", "--tile_size", type=int, default=5, required=False)
@@ -19,19 +26,40 @@ parser.add_argument("-i", "--image_directory", type=str, default="image_temp", r
 parser.add_argument("-j", "--plan_directory", type=str, default="plan_temp", required=False)
 parser.add_argument("-k", "--problem_directory", type=str, default="problem_temp", required=False)
 parser.add_argument("-c", "--apple_count", type=int, default="5", required=False)
+parser.add_argument("-S", "--seed", type=int, default=None, required=False)
+parser.add_argument("-w", "--workers", type=int, default=1, required=False)
+parser.add_argument("-C", "--corpus_directory", type=str, default=None, required=False)
+parser.add_argument("-P", "--program_cache_directory", type=str, default=None, required=False)
+parser.add_argument("-m", "--maze_strategy", choices=list(MAZE_STRATEGIES), default="dfs_backtracker",
+                    required=False)
+parser.add_argument("-n", "--solver", choices=list(SEARCHES), default=None, required=False)
+parser.add_argument("-R", "--record", type=str, default=None, required=False)
+parser.add_argument("-F", "--profile", type=str, nargs="+", default=None, required=False)
+parser.add_argument("-M", "--trace_allocations", action='store_true')
 
 if __name__ == '__main__':
     args = parser.parse_args()
     options = vars(args)
 
+    # Only the maze domains have native solvers.
+    if options["solver"] is not None and options["domain"] == "snake":
+        parser.error("argument -n/--solver: not available for the snake domain")
+
     for key, value in options.items():
         if isinstance(value, bool):
             continue
         elif isinstance(value, (int, float)):
+            # 0 is a valid seed.
+            if key == "seed" and value >= 0:
+                continue
             if value < 1:
                 print(value)
                 raise ValueError(f"{key} should be non-negative and non-zero")
 
+    # Phases are only recorded on request, an idle recorder costs nothing.
+    if options["record"] or options["profile"]:
+        recorder = instrumentation.enable(options["trace_allocations"], options["profile"] or ())
+
     generator = BlocklyMazeProblemGenerator
     if options["domain"] == "blockly_maze":
         generator = BlocklyMazeProblemGenerator
@@ -48,6 +76,15 @@ if __name__ == '__main__':
         generator.display_problems()
 
     if options["solution_type"] == "each":
-        generator.solve_each()
+        generator.solve_each(solver=options["solver"])
+    elif options["solution_type"] == "all" and options["search_program_lines"]:
+        generator.search_program_lines()
     elif options["solution_type"] == "all":
-        generator.solve_all()
+        generator.solve_all(incremental=options["incremental"])
+
+    if options["record"] or options["profile"]:
+        instrumentation.disable()
+        if options["record"]:
+            recorder.save(options["record"])
+        for phase in options["profile"] or ():
+            print(recorder.profile_report(phase))
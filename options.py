@@ -5,9 +5,10 @@ from functools import wraps
 
 class OptionManager(configparser.ConfigParser):
 
-    def __init__(self, *, allow_no_value: Literal[True] = True):
+    def __init__(self, *, allow_no_value: Literal[True] = True, persistent: bool = True):
         super().__init__(allow_no_value=allow_no_value)
         self._config_file = 'config.ini'
+        self._persistent = persistent
         self.read(self._config_file)
 
     @staticmethod
@@ -15,11 +16,15 @@ class OptionManager(configparser.ConfigParser):
         @wraps(function)
         def wrapper(self, *args, **kwargs):
             function(self, *args, **kwargs)
-            with open(self._config_file, 'w') as config_file:
-                self.write(config_file)
+            if self._persistent:
+                self.save()
 
         return wrapper
 
+    def save(self) -> None:
+        with open(self._config_file, 'w') as config_file:
+            self.write(config_file)
+
     @setter
     def set_tile_size(self, size: int) -> None:
         default_screen_length = self.getint("Default", "screen_length")
@@ -0,0 +1,531 @@
+"""
+**Benchmarks for path finding problem generation**
+
+This module provides benchmarks for the environment and generator code.
+
+Functions:
+    - ``tile_construction_benchmark``: Compares Tile construction throughput with and without a shared GridGeometry.
+    - ``environment_memory_benchmark``: Compares the memory used by Tile-based and array-backed environments.
+    - ``generation_benchmark``: Compares problems generated per second with and without rendering.
+    - ``strategy_benchmark``: Compares generation time and path length distributions of maze strategies.
+    - ``serialization_benchmark``: Compares PDDLWriter with the direct serializer and checks their equivalence.
+    - ``validation_benchmark``: Compares the plan validator of unified planning with the specialised validators.
+    - ``program_benchmark``: Compares running a generalised program natively with solving each problem.
+    - ``synthesis_benchmark``: Compares one-shot synthesis on every problem with incremental synthesis.
+
+Example usage::
+
+    # Compare tile construction on 50x50 and 200x200 boards
+    results = tile_construction_benchmark(sizes=(50, 200))
+"""
+
+import dataclasses
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from unified_planning.engines import FailedValidationReason, SequentialPlanValidator
+from unified_planning.io import PDDLReader, PDDLWriter
+from unified_planning.model import Problem
+from unified_planning.plans import ActionInstance, SequentialPlan
+from options import OptionManager
+from src.environment import GridGeometry, Tile, TileCollection, MazeEnvironment
+from src.generators import ProblemGenerator
+from src.plan_validators import plan_actions
+from src.programs import SOLVED, load_program
+from src.strategies import MAZE_STRATEGIES
+from src.validators import non_negative_and_non_zero
+
+
+def _tiles_per_second(construct, size: int, repeats: int) -> float:
+    """
+    Measures how many tiles per second a board construction function produces.
+
+    Arguments:
+        construct (callable): Function building a board of the given size.
+        size (int): Number of tiles along each side of the board.
+        repeats (int): Number of boards to build; the fastest run is reported.
+
+    Returns:
+        float: Tiles constructed per second.
+    """
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        construct(size)
+        best = min(best, time.perf_counter() - start)
+    return (size * size) / best
+
+
+def _board_with_config_reads(size: int) -> TileCollection:
+
+    # Previous behaviour: every Tile parsed config.ini to learn the grid geometry.
+    tiles = []
+    for x in range(size):
+        for y in range(size):
+            GridGeometry.from_options(OptionManager())
+            tiles.append(Tile(tile_position=(x, y)))
+    return TileCollection(tiles)
+
+
+def _board_with_shared_geometry(size: int) -> TileCollection:
+
+    # Current behaviour: the geometry is created once and shared by the collection.
+    geometry = GridGeometry(size, OptionManager().getint("Default", "screen_length"))
+    return TileCollection([Tile(tile_position=(x, y)) for x in range(size) for y in range(size)], geometry)
+
+
+@non_negative_and_non_zero
+def tile_construction_benchmark(sizes: tuple[int, ...] = (50, 200), repeats: int = 3) -> dict:
+    """
+    Compares Tile construction throughput when every tile reads config.ini against a shared GridGeometry.
+
+    Arguments:
+        sizes (tuple[int, ...]): Board side lengths to benchmark.
+        repeats (int): Number of boards built per measurement.
+
+    Returns:
+        dict: Tiles per second keyed by board size and construction method.
+    """
+
+    results = {}
+    for size in sizes:
+        results[size] = {
+            "config_reads": _tiles_per_second(_board_with_config_reads, size, repeats),
+            "shared_geometry": _tiles_per_second(_board_with_shared_geometry, size, repeats),
+        }
+        print(f"{size}x{size}: {results[size]['config_reads']:.0f} tiles/s with config reads, "
+              f"{results[size]['shared_geometry']:.0f} tiles/s with a shared geometry")
+
+    return results
+
+
+def _allocated_bytes(construct) -> tuple[object, int]:
+    """
+    Measures the memory still allocated by the object a function returns.
+
+    Arguments:
+        construct (callable): Function building the object to measure.
+
+    Returns:
+        tuple[object, int]: The constructed object and its allocated size in bytes.
+    """
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        instance = construct()
+        return instance, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+@non_negative_and_non_zero
+def environment_memory_benchmark(tile_size: int = 500) -> dict:
+    """
+    Compares the memory used by a fully occupied maze as a MazeEnvironment and as a MazeGridEnvironment.
+
+    Arguments:
+        tile_size (int): Number of tiles along each side of the maze.
+
+    Returns:
+        dict: Allocated bytes keyed by environment representation.
+    """
+
+    geometry = GridGeometry(tile_size, tile_size)
+    maze, tile_bytes = _allocated_bytes(lambda: MazeEnvironment(
+        TileCollection([Tile(tile_position=(x, y)) for x in range(tile_size) for y in range(tile_size)], geometry),
+        Tile(tile_position=(0, 0)),
+        Tile(tile_position=(tile_size - 1, tile_size - 1))
+    ))
+    _, grid_bytes = _allocated_bytes(maze.to_grid)
+
+    results = {"tiles": tile_bytes, "grid": grid_bytes}
+    print(f"{tile_size}x{tile_size}: {tile_bytes / 2 ** 20:.1f} MiB as tiles, {grid_bytes / 2 ** 20:.2f} MiB as a grid")
+    return results
+
+
+@non_negative_and_non_zero
+def generation_benchmark(generator: type[ProblemGenerator],
+                         problem_count: int = 20,
+                         tile_size: int = 10,
+                         **options) -> dict:
+    """
+    Compares problems generated per second with rendering against headless generation.
+
+    Arguments:
+        generator (Type[ProblemGenerator]): The type of problem generator to use.
+        problem_count (int): The number of problems to generate per measurement.
+        tile_size (int): The size of the tiles in the environment.
+        **options: Additional options for problem generation.
+
+    Returns:
+        dict: Problems per second keyed by generation mode.
+    """
+
+    results = {}
+    for mode, headless in (("rendered", False), ("headless", True)):
+        with tempfile.TemporaryDirectory() as image_directory:
+            start = time.perf_counter()
+            generator(auto=True,
+                      headless=headless,
+                      problem_count=problem_count,
+                      tile_size=tile_size,
+                      image_directory=image_directory,
+                      **options)
+            results[mode] = problem_count / (time.perf_counter() - start)
+
+    print(f"{generator.__name__}: {results['rendered']:.1f} problems/s rendered, "
+          f"{results['headless']:.1f} problems/s headless")
+    return results
+
+
+def _summary(values: list[float]) -> dict:
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "mean": statistics.fmean(values),
+        "max": max(values),
+    }
+
+
+@non_negative_and_non_zero
+def strategy_benchmark(tile_sizes: tuple[int, ...] = (10, 20, 30),
+                       samples: int = 20,
+                       strategies: tuple[str, ...] = tuple(MAZE_STRATEGIES)) -> dict:
+    """
+    Compares generation time and shortest start-to-goal path lengths across maze generation strategies.
+    Lattice strategies leave the last row and column uncarved on even tile sizes, so on those sizes they fill a grid
+    of tile_size - 1 while the walks range over the whole grid.
+
+    Arguments:
+        tile_sizes (tuple[int, ...]): Grid sizes to benchmark.
+        samples (int): Number of mazes generated per strategy and size.
+        strategies (tuple[str, ...]): Names of the strategies in MAZE_STRATEGIES to compare.
+
+    Returns:
+        dict: Time and path length summaries keyed by strategy name and tile size.
+    """
+
+    results = {}
+    for name in strategies:
+        strategy = MAZE_STRATEGIES[name]()
+        results[name] = {}
+        for tile_size in tile_sizes:
+            geometry = GridGeometry(tile_size, tile_size)
+            timings, path_lengths = [], []
+            for _ in range(samples):
+                start = time.perf_counter()
+                maze = strategy.generate(geometry)
+                timings.append(time.perf_counter() - start)
+
+                grid = maze.to_grid()
+                path_lengths.append(int(grid.grid.distances(grid.start)[grid.goal]))
+
+            results[name][tile_size] = {"time": _summary(timings), "path_length": _summary(path_lengths)}
+            print(f"{name} {tile_size}x{tile_size}: "
+                  f"median {results[name][tile_size]['time']['median'] * 1000:.2f} ms "
+                  f"(max {results[name][tile_size]['time']['max'] * 1000:.2f} ms), "
+                  f"path length median {results[name][tile_size]['path_length']['median']} "
+                  f"(range {min(path_lengths)}-{max(path_lengths)})")
+
+    return results
+
+
+def _problem_summary(problem: Problem) -> tuple:
+
+    # Names, true initial facts and goals, independent of the order they were written in.
+    return (
+        sorted(obj.name for obj in problem.all_objects),
+        sorted(str(fact) for fact, value in problem.explicit_initial_values.items() if value.is_true()),
+        sorted(str(goal) for goal in problem.goals),
+    )
+
+
+@non_negative_and_non_zero
+def serialization_benchmark(generator: type[ProblemGenerator],
+                            problem_count: int = 20,
+                            tile_size: int = 10,
+                            workers: int = 1,
+                            **options) -> dict:
+    """
+    Compares problems written per second by PDDLWriter and by the direct serializer of save_as_pddl.
+    Both outputs are parsed back with PDDLReader and compared, problems that differ are counted as mismatches.
+
+    Arguments:
+        generator (Type[ProblemGenerator]): The type of problem generator to use.
+        problem_count (int): The number of problems to write.
+        tile_size (int): The size of the tiles in the environment.
+        workers (int): Number of processes used by the direct serializer.
+        **options: Additional options for problem generation.
+
+    Returns:
+        dict: Problems per second keyed by writer, and the number of mismatching problems.
+    """
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        writer_directory = os.path.join(directory, "writer")
+        os.mkdir(writer_directory)
+        problem_generator = generator(auto=True,
+                                      headless=True,
+                                      problem_count=problem_count,
+                                      tile_size=tile_size,
+                                      image_directory=os.path.join(directory, "images"),
+                                      problem_directory=os.path.join(directory, "direct"),
+                                      **options)
+        problems = [problem for _, problem in problem_generator.iter_problems()]
+
+        start = time.perf_counter()
+        for problem in problems:
+            PDDLWriter(problem).write_problem(os.path.join(writer_directory, f"{problem.name}.pddl"))
+        results["pddl_writer"] = problem_count / (time.perf_counter() - start)
+
+        for mode, archive in (("direct", False), ("archive", True)):
+            start = time.perf_counter()
+            problem_generator.save_as_pddl(workers=workers, archive=archive)
+            results[mode] = problem_count / (time.perf_counter() - start)
+
+        # The archive replaced the direct files, so they are written once more for the comparison.
+        problem_generator.save_as_pddl(workers=workers)
+        domain_path = f"domains/{problem_generator._domain}.pddl"
+        reader = PDDLReader()
+        results["mismatches"] = sum(
+            _problem_summary(reader.parse_problem(domain_path, os.path.join(writer_directory, f"{problem.name}.pddl")))
+            != _problem_summary(reader.parse_problem(domain_path, os.path.join(directory, "direct", f"{problem.name}.pddl")))
+            for problem in problems
+        )
+
+    print(f"{generator.__name__}: {results['pddl_writer']:.1f} problems/s with PDDLWriter, "
+          f"{results['direct']:.1f} problems/s direct, {results['archive']:.1f} problems/s archived, "
+          f"{results['mismatches']} mismatching problems")
+    return results
+
+
+def _corrupt(actions: list, rng: random.Random) -> list:
+
+    # Drops an action, swaps two consecutive actions or cuts the plan short, which mostly makes the plan invalid.
+    actions = list(actions)
+    if len(actions) < 2:
+        return []
+    step = rng.randrange(len(actions) - 1)
+    corruption = rng.randrange(3)
+    if corruption == 0:
+        del actions[step]
+    elif corruption == 1:
+        actions[step], actions[step + 1] = actions[step + 1], actions[step]
+    else:
+        del actions[step + 1:]
+    return actions
+
+
+def _generic_outcome(validator: SequentialPlanValidator, problem: Problem, actions: list) -> tuple:
+
+    # Validity and first failing step according to the unified planning validator, whose trace ends before the
+    # inapplicable action.
+    objects = {obj.name: obj for obj in problem.all_objects}
+    plan = SequentialPlan([
+        ActionInstance(problem.action(name), [objects[parameter] for parameter in parameters])
+        for name, parameters in actions
+    ])
+    result = validator.validate(problem, plan)
+    if result.status.name == "VALID":
+        return True, None
+    if result.reason == FailedValidationReason.INAPPLICABLE_ACTION:
+        return False, len(result.trace) - 1
+    return False, len(actions)
+
+
+@non_negative_and_non_zero(non_negative_only=("seed",))
+def validation_benchmark(generator: type[ProblemGenerator],
+                         problem_count: int = 50,
+                         tile_size: int = 8,
+                         sample: int = 20,
+                         seed: int = 1,
+                         solver: str = "bfs",
+                         **options) -> dict:
+    """
+    Compares plans validated per second by the unified planning validator and by the specialised validators.
+    Every solution is validated together with a corrupted copy, and a random sample of them is validated by both
+    validators; plans whose validity or first failing step differ are counted as mismatches.
+
+    Arguments:
+        generator (Type[ProblemGenerator]): The type of problem generator to use.
+        problem_count (int): The number of problems to solve.
+        tile_size (int): The size of the tiles in the environment.
+        sample (int): Number of plans validated by both validators.
+        seed (int): Seed of the problems, corruptions and sample.
+        solver (str): Native search used to find the plans, None uses the classical planner, e.g. for snake problems.
+        **options: Additional options for problem generation.
+
+    Returns:
+        dict: Plans per second keyed by validator, and the number of invalid and mismatching plans.
+    """
+
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as image_directory:
+        problem_generator = generator(auto=True,
+                                      headless=True,
+                                      problem_count=problem_count,
+                                      tile_size=tile_size,
+                                      seed=seed,
+                                      image_directory=image_directory,
+                                      **options)
+        pairs = list(problem_generator.iter_problems())
+        results = list(problem_generator._iter_solutions(1, solver))
+
+    # Unsolved problems have nothing to corrupt and are left out.
+    cases = [
+        (environment, problem, actions)
+        for (environment, problem), result in zip(pairs, results) if result.plan is not None
+        for actions in (plan_actions(result.plan),)
+    ]
+    cases += [(environment, problem, _corrupt(actions, rng)) for environment, problem, actions in cases]
+
+    start = time.perf_counter()
+    reports = problem_generator.validate_plans(
+        [actions for _, _, actions in cases], environments=[environment for environment, _, _ in cases]
+    )
+    results = {"specialised": len(cases) / (time.perf_counter() - start)}
+    results["invalid"] = sum(not report.valid for report in reports)
+
+    validator = SequentialPlanValidator()
+    sampled = rng.sample(range(len(cases)), min(sample, len(cases)))
+    start = time.perf_counter()
+    outcomes = [_generic_outcome(validator, cases[i][1], cases[i][2]) for i in sampled]
+    results["generic"] = len(sampled) / (time.perf_counter() - start)
+    results["mismatches"] = sum(
+        outcome != (reports[i].valid, reports[i].failed_step) for i, outcome in zip(sampled, outcomes)
+    )
+
+    print(f"{generator.__name__}: {results['generic']:.1f} plans/s generic, "
+          f"{results['specialised']:.1f} plans/s specialised, {results['invalid']} of {len(cases)} plans invalid, "
+          f"{results['mismatches']} mismatching plans in a sample of {len(sampled)}")
+    return results
+
+
+def program_benchmark(generator: type[ProblemGenerator],
+                      program,
+                      problem_count: int = 50,
+                      tile_size: int = 8,
+                      seed: int = 1,
+                      solver: str = None,
+                      **options) -> dict:
+    """
+    Compares running a generalised program natively on every problem with solving each problem, by time per problem
+    and plan length. The plans of the program are checked by the specialised validators.
+
+    Arguments:
+        generator (Type[ProblemGenerator]): The type of problem generator to use.
+        program (Union[str, GeneralisedProgram]): The program or the path of a BFGP++ program file.
+        problem_count (int): The number of problems to solve.
+        tile_size (int): The size of the tiles in the environment.
+        seed (int): Seed of the problems.
+        solver (str): Native search used to solve the problems, None uses the classical planner.
+        **options: Additional options for problem generation.
+
+    Returns:
+        dict: Seconds per problem and mean plan length keyed by approach, executions by status, the number of
+        invalid program plans and the mean ratio of program to solver plan lengths.
+    """
+
+    program = load_program(program)
+    with tempfile.TemporaryDirectory() as image_directory:
+        problem_generator = generator(auto=True,
+                                      headless=True,
+                                      problem_count=problem_count,
+                                      tile_size=tile_size,
+                                      seed=seed,
+                                      image_directory=image_directory,
+                                      **options)
+        environments = [environment for environment, _ in problem_generator.iter_problems()]
+
+        start = time.perf_counter()
+        solutions = list(problem_generator._iter_solutions(1, solver))
+        solve_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    executions = problem_generator.run_program(program, environments=environments)
+    program_time = time.perf_counter() - start
+
+    statuses = {}
+    for execution in executions:
+        statuses[execution.status] = statuses.get(execution.status, 0) + 1
+    reports = problem_generator.validate_plans(
+        [execution.plan if execution.status == SOLVED else None for execution in executions], environments
+    )
+
+    solved = [(len(solution.plan.actions), len(execution.plan))
+              for solution, execution in zip(solutions, executions)
+              if solution.plan is not None and execution.status == SOLVED]
+    results = {
+        "solver": {
+            "seconds_per_problem": solve_time / len(environments),
+            "mean_plan_length": statistics.mean(length for length, _ in solved) if solved else None,
+        },
+        "program": {
+            "seconds_per_problem": program_time / len(environments),
+            "mean_plan_length": statistics.mean(length for _, length in solved) if solved else None,
+        },
+        "statuses": statuses,
+        "invalid": sum(execution.status == SOLVED and not report.valid
+                       for execution, report in zip(executions, reports)),
+        "length_ratio": statistics.mean(ours / theirs for theirs, ours in solved if theirs) if solved else None,
+    }
+
+    print(f"{generator.__name__}: {results['solver']['seconds_per_problem'] * 1000:.2f} ms/problem solving, "
+          f"{results['program']['seconds_per_problem'] * 1000:.2f} ms/problem running the program, "
+          f"{statuses.get(SOLVED, 0)} of {len(executions)} solved by the program, "
+          f"{results['invalid']} invalid program plans")
+    return results
+
+
+def synthesis_benchmark(generator: type[ProblemGenerator],
+                        problem_count: int = 10,
+                        tile_size: int = 5,
+                        seed: int = 1,
+                        program_lines: int = 10,
+                        seed_size: int = 2,
+                        counterexamples: int = 1,
+                        **options) -> dict:
+    """
+    Compares generalised planning on every problem at once with incremental synthesis growing the training set from
+    the problems its programs fail on.
+
+    Arguments:
+        generator (Type[ProblemGenerator]): The type of problem generator to use.
+        problem_count (int): The number of problems to solve.
+        tile_size (int): The size of the tiles in the environment.
+        seed (int): Seed of the problems.
+        program_lines (int): Maximum number of program lines.
+        seed_size (int): Number of problems in the first training set of incremental synthesis.
+        counterexamples (int): Number of failing problems added to the training set per round.
+        **options: Additional options for problem generation.
+
+    Returns:
+        dict: The SynthesisReport of each mode as a dict, keyed by "one_shot" and "incremental".
+    """
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        problem_generator = generator(auto=True,
+                                      headless=True,
+                                      problem_count=problem_count,
+                                      tile_size=tile_size,
+                                      seed=seed,
+                                      image_directory=os.path.join(directory, "images"),
+                                      plan_directory=os.path.join(directory, "plans"),
+                                      **options)
+        for mode, incremental in (("one_shot", False), ("incremental", True)):
+            problem_generator.solve_all(program_lines, incremental=incremental, seed_size=seed_size,
+                                        counterexamples=counterexamples)
+            results[mode] = dataclasses.asdict(problem_generator.synthesis_report)
+
+    for mode, report in results.items():
+        print(f"{generator.__name__} {mode}: {report['seconds']:.2f} s, {report['rounds']} rounds, "
+              f"trained on {report['training_size']} of {report['problem_count']} problems, "
+              f"{'solved' if report['solved'] else 'unsolved'}")
+    return results
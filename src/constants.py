@@ -29,3 +29,11 @@ NEXT_APPLE = 'next-apple'
 SPAWN_APPLE = 'spawn-apple'
 DUMMYPOINT = 'dummypoint'
 IS_DUMMYPOINT = 'is-dummypoint'
+
+# PDDL Actions, the maze moves are in the order of DIRECTIONS
+MOVE_ACTIONS = MOVE_UP, MOVE_RIGHT, MOVE_DOWN, MOVE_LEFT = 'move-up', 'move-right', 'move-down', 'move-left'
+TURN_LEFT = 'turn-left'
+TURN_RIGHT = 'turn-right'
+MOVE = 'move'
+MOVE_AND_EAT = 'move-and-eat'
+MOVE_AND_EAT_NO_SPAWN = 'move-and-eat-no-spawn'
@@ -0,0 +1,329 @@
+"""
+**On-disk problem corpus**
+
+This module caches generated environments on disk so repeated runs with the same settings skip generation.
+Entries are addressed by a digest of everything that determines the environments and of the corpus format, store
+them as compressed arrays and gain the PDDL texts of their problems the first time those are requested.
+
+Classes:
+    - ``ProblemCorpus``: Content-addressed, size-bounded store of environments and PDDL problems.
+
+Every entry is a directory holding a manifest with the SHA-256 digest of each of its files. Entries failing the
+integrity check are removed with a warning and treated as missing. When the corpus outgrows its size limit, the
+least recently used entries are evicted.
+
+Example usage::
+
+    # Cache the problems of a seeded generator, the second run loads them from disk
+    SnakeProblemGenerator(problem_count=100, auto=True, seed=3, corpus_directory="corpus")
+    SnakeProblemGenerator(problem_count=100, auto=True, seed=3, corpus_directory="corpus")
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import warnings
+import zipfile
+from typing import Iterable, Union
+import numpy as np
+from src.environment import Environment, MazeGridEnvironment, OccupancyGrid, SnakeGridEnvironment
+
+MANIFEST = "manifest.json"
+ENVIRONMENTS = "environments.npz"
+PROBLEMS = "problems.zip"
+
+# Version of the layout of entries and of the problems stored in them, part of every address so entries written in
+# another format are never read. Increase it whenever the stored arrays or the PDDL texts change.
+CORPUS_FORMAT = 2
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _tile_ranks(maze: MazeGridEnvironment) -> np.ndarray:
+
+    # Position of every tile in the order the maze was built, -1 where there is no tile.
+    ranks = np.full(maze.grid.cells.shape, -1, dtype=np.int32)
+    order = maze.tile_positions()
+    ranks[order[:, 0], order[:, 1]] = np.arange(len(order))
+    return ranks
+
+
+def _tile_order(ranks: np.ndarray) -> np.ndarray:
+    positions = np.argwhere(ranks >= 0)
+    return positions[np.argsort(ranks[positions[:, 0], positions[:, 1]], kind="stable")]
+
+
+def _pack_environments(environments: list[Environment]) -> dict[str, np.ndarray]:
+    """
+    Stacks grid environments into arrays.
+
+    Arguments:
+        environments (list[Environment]): Environments of a single kind and board size.
+
+    Returns:
+        dict[str, np.ndarray]: The stacked arrays, keyed by field.
+    """
+
+    environments = [environment.to_grid() for environment in environments]
+    if all(isinstance(environment, MazeGridEnvironment) for environment in environments):
+        return {
+            "cells": np.stack([environment.grid.cells for environment in environments]),
+            "starts": np.array([environment.start for environment in environments], dtype=np.int32),
+            "goals": np.array([environment.goal for environment in environments], dtype=np.int32),
+            "ranks": np.stack([_tile_ranks(environment) for environment in environments]),
+        }
+    if all(isinstance(environment, SnakeGridEnvironment) for environment in environments):
+        return {
+            "boards": np.stack([environment.board.cells for environment in environments]),
+            "heads": np.array([environment.head for environment in environments], dtype=np.int32),
+            "tails": np.array([environment.tail for environment in environments], dtype=np.int32),
+            "apples": np.stack([environment.apples for environment in environments]).astype(np.int32),
+        }
+    raise TypeError("Only maze and snake grid environments can be stored in a corpus")
+
+
+def _unpack_environments(arrays) -> list[Environment]:
+    """
+    Splits stacked arrays back into grid environments.
+
+    Arguments:
+        arrays (Mapping[str, np.ndarray]): The stacked arrays, keyed by field.
+
+    Returns:
+        list[Environment]: The grid environments.
+    """
+
+    if "cells" in arrays:
+        return [
+            MazeGridEnvironment(OccupancyGrid(cells), tuple(start), tuple(goal), _tile_order(ranks))
+            for cells, start, goal, ranks in zip(arrays["cells"], arrays["starts"].tolist(), arrays["goals"].tolist(),
+                                                 arrays["ranks"])
+        ]
+    return [
+        SnakeGridEnvironment(OccupancyGrid(board), tuple(head), tuple(tail), apples.astype(np.intp))
+        for board, head, tail, apples in zip(arrays["boards"], arrays["heads"].tolist(),
+                                             arrays["tails"].tolist(), arrays["apples"])
+    ]
+
+
+class ProblemCorpus:
+
+    def __init__(self, directory: str, max_bytes: int = 2 ** 30):
+        """
+        Content-addressed, size-bounded store of environments and PDDL problems.
+
+        Arguments:
+            directory (str): Directory of the corpus, created if missing.
+            max_bytes (int): Size limit of the corpus, least recently used entries are evicted beyond it.
+        """
+
+        self._directory = directory
+        self._max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(fields: dict) -> str:
+        """
+        Returns the address of the entry described by the given fields in the current corpus format.
+
+        Arguments:
+            fields (dict): JSON serializable values determining the environments, e.g. generator, seed and tile size.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest of the fields and the corpus format.
+        """
+
+        addressed = {"format": CORPUS_FORMAT, "fields": fields}
+        return hashlib.sha256(json.dumps(addressed, sort_keys=True).encode()).hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self._directory, key)
+
+    def _read_manifest(self, key: str) -> Union[dict, None]:
+        """
+        Reads the manifest of an entry and checks the digests of its files, removing the entry if any differs.
+
+        Arguments:
+            key (str): Address of the entry.
+
+        Returns:
+            Union[dict, None]: The manifest, or None if the entry is missing or corrupt.
+        """
+
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, MANIFEST)) as file:
+                manifest = json.load(file)
+            if all(_file_digest(os.path.join(entry, name)) == digest for name, digest in manifest["files"].items()):
+                return manifest
+        except (OSError, ValueError, KeyError):
+            if not os.path.isdir(entry):
+                return None
+
+        warnings.warn(f"corpus entry {key} failed its integrity check and was removed")
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+
+    def _write_manifest(self, key: str, manifest: dict) -> None:
+
+        # Replaced atomically, so a reader never sees a manifest listing files that are not written yet.
+        path = os.path.join(self._entry(key), MANIFEST)
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(manifest, file, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+
+    def _touch(self, key: str) -> None:
+
+        # The manifest modification time records the last use of an entry.
+        os.utime(os.path.join(self._entry(key), MANIFEST))
+
+    def load_environments(self, key: str) -> list[Environment]:
+        """
+        Loads the environments of an entry.
+
+        Arguments:
+            key (str): Address of the entry.
+
+        Returns:
+            list[Environment]: The stored grid environments in order, empty if the entry is missing or corrupt.
+        """
+
+        manifest = self._read_manifest(key)
+        if manifest is None:
+            return []
+
+        with np.load(os.path.join(self._entry(key), ENVIRONMENTS), allow_pickle=False) as arrays:
+            environments = _unpack_environments(arrays)
+        self._touch(key)
+        return environments
+
+    def store_environments(self, key: str, fields: dict, environments: list[Environment]) -> None:
+        """
+        Stores environments as a new entry, replacing any entry with the same address.
+
+        Arguments:
+            key (str): Address of the entry.
+            fields (dict): The fields the address was computed from, kept in the manifest.
+            environments (list[Environment]): The environments in order.
+        """
+
+        # The entry is written next to the corpus and moved into place once complete.
+        entry = self._entry(key)
+        staging = f"{entry}.{os.getpid()}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.savez_compressed(os.path.join(staging, ENVIRONMENTS), **_pack_environments(environments))
+
+        with open(os.path.join(staging, MANIFEST), "w") as file:
+            json.dump({
+                "format": CORPUS_FORMAT,
+                "fields": fields,
+                "count": len(environments),
+                "files": {ENVIRONMENTS: _file_digest(os.path.join(staging, ENVIRONMENTS))},
+            }, file, sort_keys=True)
+
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+        self._evict(keep=key)
+
+    def load_problems(self, key: str, count: int) -> Union[list[tuple[str, str]], None]:
+        """
+        Loads the PDDL problems of an entry.
+
+        Arguments:
+            key (str): Address of the entry.
+            count (int): Number of problems required.
+
+        Returns:
+            Union[list[tuple[str, str]], None]: The first count problem names and texts, or None if fewer are stored.
+        """
+
+        manifest = self._read_manifest(key)
+        if manifest is None or manifest.get("problem_count", 0) < count:
+            return None
+
+        with zipfile.ZipFile(os.path.join(self._entry(key), PROBLEMS)) as archive:
+            names = archive.namelist()[:count]
+            problems = [(name.removesuffix(".pddl"), archive.read(name).decode()) for name in names]
+        self._touch(key)
+        return problems
+
+    def store_problems(self, key: str, problems: Iterable[tuple[str, str]]) -> None:
+        """
+        Adds PDDL problems to an existing entry.
+
+        Arguments:
+            key (str): Address of the entry.
+            problems (Iterable[tuple[str, str]]): The problem names and texts in order.
+        """
+
+        manifest = self._read_manifest(key)
+        if manifest is None:
+            return
+
+        path = os.path.join(self._entry(key), PROBLEMS)
+        count = 0
+        with zipfile.ZipFile(f"{path}.tmp", "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, text in problems:
+                archive.writestr(f"{name}.pddl", text)
+                count += 1
+        os.replace(f"{path}.tmp", path)
+
+        manifest["files"][PROBLEMS] = _file_digest(path)
+        manifest["problem_count"] = count
+        self._write_manifest(key, manifest)
+        self._evict(keep=key)
+
+    def size(self) -> int:
+        """Returns the total size of the corpus in bytes."""
+
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self) -> list[tuple[float, str, int]]:
+        """
+        Lists the complete entries of the corpus.
+
+        Returns:
+            list[tuple[float, str, int]]: Last use time, address and size in bytes of every entry.
+        """
+
+        entries = []
+        for key in os.listdir(self._directory):
+            entry = self._entry(key)
+            manifest = os.path.join(entry, MANIFEST)
+            if key.endswith(".tmp") or not os.path.exists(manifest):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            entries.append((os.path.getmtime(manifest), key, size))
+        return entries
+
+    def _evict(self, keep: str = None) -> None:
+        """
+        Removes least recently used entries until the corpus fits its size limit.
+
+        Arguments:
+            keep (str, optional): Address of an entry that is never evicted, e.g. the one just written.
+        """
+
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, key, size in entries:
+            if total <= self._max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Removes every entry of the corpus."""
+
+        shutil.rmtree(self._directory, ignore_errors=True)
+        os.makedirs(self._directory, exist_ok=True)
@@ -0,0 +1,158 @@
+"""
+**PDDL domain templates**
+
+This module parses each PDDL domain once per process and stamps new problems out of the cached template.
+
+Classes:
+    - ``InitialStateBuilder``: Loads objects and initial state facts into a problem in bulk.
+
+Functions:
+    - ``load_domain``: Returns a new, empty problem for a PDDL domain file.
+    - ``domain_digest``: Returns the SHA-256 digest of a PDDL domain file.
+
+Example usage::
+
+    # Create a problem for the maze domain, only the first call parses the file
+    problem = load_domain("domains/maze.pddl")
+
+    # Load path(?x ?y) facts from an (m, 2) array of object indices
+    builder = InitialStateBuilder(problem)
+    builder.add_indexed_facts("path", objects, edge_indices)
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+from typing import Iterable, Sequence
+import numpy as np
+from unified_planning.io import PDDLReader
+from unified_planning.model import Problem, Object, Fluent, FNode
+
+
+@lru_cache(maxsize=16)
+def _parse_domain(domain_path: str, modified: int) -> Problem:
+
+    # The modification time is part of the cache key, so an edited domain file is parsed again.
+    return PDDLReader().parse_problem(domain_path)
+
+
+def load_domain(domain_path: str) -> Problem:
+    """
+    Returns a new problem for a PDDL domain file, parsing the file only on first use or after it changes.
+
+    The problem is a clone of a cached template: fluents and types are shared with the template, actions are
+    shallow copies, and objects, initial values and goals are owned by the new problem.
+
+    Arguments:
+        domain_path (str): Path to the PDDL domain file.
+
+    Returns:
+        Problem: A problem with the domain's types, fluents and actions and no objects or goals.
+    """
+
+    template = _parse_domain(os.path.abspath(domain_path), os.stat(domain_path).st_mtime_ns)
+    return template.clone()
+
+
+@lru_cache(maxsize=16)
+def _file_digest(domain_path: str, modified: int) -> str:
+    with open(domain_path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def domain_digest(domain_path: str) -> str:
+    """
+    Returns the SHA-256 digest of a PDDL domain file, hashing the file only on first use or after it changes.
+
+    Arguments:
+        domain_path (str): Path to the PDDL domain file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+
+    return _file_digest(os.path.abspath(domain_path), os.stat(domain_path).st_mtime_ns)
+
+
+class InitialStateBuilder:
+
+    def __init__(self, problem: Problem):
+        """
+        Loads objects and initial state facts into a problem in bulk.
+        Fluent handles and object expressions are resolved once and reused for every fact.
+
+        Arguments:
+            problem (Problem): Problem whose initial state is populated.
+        """
+
+        self._problem = problem
+        self._manager = problem.environment.expression_manager
+        self._values = {True: self._manager.TRUE(), False: self._manager.FALSE()}
+        self._fluents: dict[str, Fluent] = {}
+        self._expressions: dict[Object, FNode] = {}
+
+    def fluent(self, name: str) -> Fluent:
+        """Returns the fluent with the given name, resolving it only once."""
+
+        fluent = self._fluents.get(name)
+        if fluent is None:
+            fluent = self._fluents[name] = self._problem.fluent(name)
+        return fluent
+
+    def _expression(self, obj: Object) -> FNode:
+        expression = self._expressions.get(obj)
+        if expression is None:
+            expression = self._expressions[obj] = self._manager.ObjectExp(obj)
+        return expression
+
+    def add_objects(self, objects: Iterable[Object]) -> None:
+        """
+        Adds objects to the problem as one batch through the public Problem.add_objects, which checks their names and
+        registers their types.
+
+        Arguments:
+            objects (Iterable[Object]): Objects to add.
+        """
+
+        self._problem.add_objects(list(objects))
+
+    def add_facts(self, fluent_name: str, arguments: Iterable[Sequence[Object]], value: bool = True) -> None:
+        """
+        Sets the initial value of a fluent for every argument tuple.
+
+        Arguments:
+            fluent_name (str): Name of the fluent.
+            arguments (Iterable[Sequence[Object]]): Argument tuples, one per fact.
+            value (bool): Initial value of every fact.
+        """
+
+        fluent = self.fluent(fluent_name)
+        value = self._values[value]
+        fluent_expression = self._manager.FluentExp
+        set_initial_value = self._problem.set_initial_value
+        expression = self._expression
+        for args in arguments:
+            set_initial_value(fluent_expression(fluent, [expression(obj) for obj in args]), value)
+
+    def add_indexed_facts(self,
+                          fluent_name: str,
+                          objects: Sequence[Object],
+                          indices: np.ndarray,
+                          value: bool = True) -> None:
+        """
+        Sets the initial value of a fluent for every row of an index array, e.g. an edge list.
+
+        Arguments:
+            fluent_name (str): Name of the fluent.
+            objects (Sequence[Object]): Objects referenced by the indices.
+            indices (np.ndarray): An (m, arity) integer array, each row holding the object indices of one fact.
+            value (bool): Initial value of every fact.
+        """
+
+        fluent = self.fluent(fluent_name)
+        value = self._values[value]
+        fluent_expression = self._manager.FluentExp
+        set_initial_value = self._problem.set_initial_value
+        expressions = [self._expression(obj) for obj in objects]
+        for row in np.asarray(indices).reshape(-1, fluent.arity).tolist():
+            set_initial_value(fluent_expression(fluent, [expressions[i] for i in row]), value)
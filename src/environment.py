@@ -1,21 +1,92 @@
-from collections import UserList
-from dataclasses import dataclass
+from collections import UserList, deque
+from dataclasses import dataclass, field
 from options import OptionManager
+import numpy as np
 import pygame
 
+# Offsets of the orthogonal neighbours of a tile, in the order they are reported.
+NEIGHBOUR_OFFSETS = (0, 1), (1, 0), (0, -1), (-1, 0)
+
+# Offsets and neighbour mask bits for north, east, south and west (the order of constants.DIRECTIONS).
+DIRECTION_OFFSETS = (0, -1), (1, 0), (0, 1), (-1, 0)
+DIRECTION_BITS = NORTH_BIT, EAST_BIT, SOUTH_BIT, WEST_BIT = 1, 2, 4, 8
+
 
 class EnvironmentObject:
     """Interface for objects to be used in environments."""
-    pass
+    __slots__ = ()
+
+
+@dataclass(frozen=True)
+class GridGeometry:
+    """
+    Immutable grid geometry shared by every Tile and TileCollection of a generator.
+
+    Attributes:
+        tile_size (int): Number of tiles along each side of the grid.
+        screen_length (int): Length of each side of the Pygame screen in pixels.
+        tile_width (int): Width of a single tile in pixels.
+        tile_height (int): Height of a single tile in pixels.
+    """
+    tile_size: int
+    screen_length: int
+    tile_width: int = field(init=False)
+    tile_height: int = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "tile_width", self.screen_length // self.tile_size)
+        object.__setattr__(self, "tile_height", self.screen_length // self.tile_size)
+
+    @classmethod
+    def from_options(cls, option_manager: OptionManager) -> 'GridGeometry':
+        """
+        Creates a geometry from the runtime section of an OptionManager.
+
+        Arguments:
+            option_manager (OptionManager): Option manager holding the tile size and screen length.
+
+        Returns:
+            GridGeometry: The geometry described by the option manager.
+        """
+
+        return cls(option_manager.get_tile_size(), option_manager.get_screen_length())
+
+    def contains(self, position: tuple[int, int]) -> bool:
+        """Checks whether a tile position lies on the grid."""
+
+        return 0 <= position[0] < self.tile_size and 0 <= position[1] < self.tile_size
+
+    def neighbours(self, position: tuple[int, int]) -> list[tuple[int, int]]:
+        """Obtains a list of all neighbouring positions on the grid."""
+
+        positions = [(position[0] + x, position[1] + y) for x, y in NEIGHBOUR_OFFSETS]
+        return [p for p in positions if self.contains(p)]
+
+    def to_tile_position(self, pygame_position: tuple[int, int]) -> tuple[int, int]:
+        """Converts Pygame coordinates to tile coordinates."""
+
+        return pygame_position[0] // self.tile_width, pygame_position[1] // self.tile_height
+
+    def rect(self, position: tuple[int, int]) -> pygame.Rect:
+        """Returns the pygame.Rect object covering a tile position."""
+
+        return pygame.Rect(
+            position[0] * self.tile_width,
+            position[1] * self.tile_height,
+            self.tile_width,
+            self.tile_height
+        )
 
 
 class Tile(EnvironmentObject):
+    __slots__ = ("_tile_position",)
 
-    def __init__(self, **position: tuple[int, int]) -> None:
+    def __init__(self, geometry: GridGeometry = None, **position: tuple[int, int]) -> None:
         """
-        Tile object for compiling locations and Pygame attributes.
+        Tile object for compiling locations.
 
         Arguments:
+            geometry (GridGeometry, optional): Grid geometry, only required for Pygame coordinates.
             position: At least one must be specified:
 
                 - The Tile position in Cartesian coordinates (tile_position=).
@@ -23,18 +94,10 @@ class Tile(EnvironmentObject):
                 - Or an existing Tile object (tile=).
         """
 
-        self._option_manager = OptionManager()
-        self._tile_size = self._option_manager.get_tile_size()
-        self._screen_length = self._option_manager.get_screen_length()
-        self._tile_width, self._tile_height = (
-            self._screen_length // self._tile_size,
-            self._screen_length // self._tile_size
-        )
-        
         self._tile_position = tuple[int, int]()
         if not any(self._is_tile_like(val) for val in position.values()):
             raise TypeError("No valid arguments found.")
-        self.set_position(**position)
+        self.set_position(geometry, **position)
 
     # Ensures the instance is a Tile object.
     def _is_tile_like(self, instance):
@@ -45,11 +108,12 @@ class Tile(EnvironmentObject):
     def _is_point(instance):
         return isinstance(instance, tuple) and list(map(type, instance)) == [int, int]
 
-    def set_position(self, **position) -> None:
+    def set_position(self, geometry: GridGeometry = None, **position) -> None:
         """
         Sets the position of the tile.
 
         Arguments:
+            geometry (GridGeometry, optional): Grid geometry, only required for Pygame coordinates.
             position: Input position which can be:
 
                 - The Tile position in Cartesian coordinates (tile_position=).
@@ -64,12 +128,11 @@ class Tile(EnvironmentObject):
         tile = position.get("tile")
 
         if pygame_position is not None:
-            self._tile_position = (
-                pygame_position[0] // self._tile_width,
-                pygame_position[1] // self._tile_height
-            )
+            if geometry is None:
+                raise ValueError("A GridGeometry is required to convert Pygame coordinates.")
+            self._tile_position = geometry.to_tile_position(pygame_position)
 
-        elif self._tile_position is not None:
+        elif tile_position is not None:
             self._tile_position = tile_position
 
         elif tile is not None:
@@ -80,25 +143,15 @@ class Tile(EnvironmentObject):
 
         return self._tile_position
 
-    def get_rect(self) -> pygame.Rect:
+    def get_rect(self, geometry: GridGeometry) -> pygame.Rect:
         """Returns the pygame.Rect object of the tile"""
 
-        return pygame.Rect(
-            self._tile_position[0] * self._tile_width,
-            self._tile_position[1] * self._tile_height,
-            self._tile_width,
-            self._tile_height
-        )
+        return geometry.rect(self._tile_position)
 
-    def get_neighbours(self) -> list[tuple[int, int]]:
+    def get_neighbours(self, geometry: GridGeometry) -> list[tuple[int, int]]:
         """Obtains a list of all neighbours available from a Tile."""
 
-        neighbours = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-        positions = [
-            (x + self._tile_position[0], y + self._tile_position[1])
-            for x, y in neighbours
-        ]
-        return [p for p in positions if all(0 <= q < self._tile_size for q in p)]
+        return geometry.neighbours(self._tile_position)
 
     # Tiles are equal if they have the same position.
     def __eq__(self, other) -> bool:
@@ -114,32 +167,120 @@ class Tile(EnvironmentObject):
 
 
 class TileCollection(UserList[Tile]):
-    def __init__(self, iterable=None):
+    def __init__(self, iterable=None, geometry: GridGeometry = None):
         """
-        A collection of Tile objects.
+        A collection of Tile objects, indexed by position.
 
         Arguments:
             iterable (Iterable[Tile], optional): Optional list of Tile objects
+            geometry (GridGeometry, optional): Grid geometry shared by the tiles, inherited from
+                another TileCollection when not given.
         """
+        if geometry is None and isinstance(iterable, TileCollection):
+            geometry = iterable.geometry
+        self.geometry = geometry
+
         if iterable is None:
             self.data = []
         else:
-            super().__init__(self._ensure_tile(item) for item in iterable)
+            self.data = [self._ensure_tile(item) for item in iterable]
+        self._reindex()
+
+    # Slices and copies keep the geometry of the collection.
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.__class__(self.data[index], self.geometry)
+        return self.data[index]
+
+    def copy(self):
+        return self.__class__(self.data, self.geometry)
+
+    # Membership is resolved through the position index.
+    def __contains__(self, item):
+        if isinstance(item, Tile):
+            return item.get_position() in self._index
+        return item in self._index
 
     def __setitem__(self, index, item):
-        self.data[index] = self._ensure_tile(item)
+        if isinstance(index, slice):
+            self.data[index] = [self._ensure_tile(tile) for tile in item]
+            self._reindex()
+        else:
+            old_tile = self.data[index]
+            self.data[index] = self._ensure_tile(item)
+            self._index_discard(old_tile)
+            self._index_add(self.data[index])
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            del self.data[index]
+            self._reindex()
+        else:
+            self._index_discard(self.data.pop(index))
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __imul__(self, n):
+        self.data *= n
+        self._reindex()
+        return self
 
     def insert(self, index, item):
         self.data.insert(index, self._ensure_tile(item))
+        self._index_add(item)
 
     def append(self, item):
         self.data.append(self._ensure_tile(item))
+        self._index_add(item)
 
     def extend(self, other):
         if isinstance(other, type(self)):
-            self.data.extend(other)
+            tiles = other.data
         else:
-            self.data.extend(self._ensure_tile(item) for item in other)
+            tiles = [self._ensure_tile(item) for item in other]
+        self.data.extend(tiles)
+        for tile in tiles:
+            self._index_add(tile)
+
+    def pop(self, index=-1):
+        tile = self.data.pop(index)
+        self._index_discard(tile)
+        return tile
+
+    def remove(self, item):
+        self._index_discard(self.data.pop(self.data.index(item)))
+
+    def clear(self):
+        self.data.clear()
+        self._reindex()
+
+    # Rebuilds the position index from scratch.
+    def _reindex(self):
+        self._index: dict[tuple[int, int], Tile] = {}
+        self._counts: dict[tuple[int, int], int] = {}
+        self._adjacency = None
+        for tile in self.data:
+            self._index_add(tile)
+
+    # Registers a tile in the position index.
+    def _index_add(self, tile: Tile):
+        position = tile.get_position()
+        self._index.setdefault(position, tile)
+        self._counts[position] = self._counts.get(position, 0) + 1
+        self._adjacency = None
+
+    # Removes a tile from the position index, falling back to any duplicate still in the collection.
+    def _index_discard(self, tile: Tile):
+        position = tile.get_position()
+        self._counts[position] -= 1
+        if self._counts[position] == 0:
+            del self._counts[position]
+            del self._index[position]
+        elif self._index[position] is tile:
+            self._index[position] = next(t for t in self.data if t.get_position() == position)
+        self._adjacency = None
 
     # Ensures instance is a Tile object.
     @staticmethod
@@ -158,8 +299,25 @@ class TileCollection(UserList[Tile]):
         Returns:
             Tile: The Tile object found at the given position, or None if not found.
         """
-        signal = [tile for tile in self.data if tile.get_position() == position]
-        return signal[0] if signal else None
+        return self._index.get(position)
+
+    def get_adjacency(self) -> dict[tuple[int, int], tuple[Tile, ...]]:
+        """
+        Returns the adjacency table of the collection, building it on first use.
+
+        The table is cached until the collection is modified.
+
+        Returns:
+            dict[tuple[int, int], tuple[Tile, ...]]: Neighbouring tiles keyed by tile position.
+        """
+        if self._adjacency is None:
+            self._adjacency = {
+                (x, y): tuple(
+                    self._index[(x + dx, y + dy)] for dx, dy in NEIGHBOUR_OFFSETS if (x + dx, y + dy) in self._index
+                )
+                for x, y in self._index
+            }
+        return self._adjacency
 
     def find_neighbours(self, tile: Tile) -> 'TileCollection':
         """
@@ -171,17 +329,225 @@ class TileCollection(UserList[Tile]):
         Returns:
             TileCollection: A collection of neighboring Tile objects.
         """
-        possible_neighbours = tile.get_neighbours()
-        valid_neighbours = []
-        for i, neighbour in enumerate(possible_neighbours):
-            if self.find_tile(neighbour):
-                valid_neighbours.append(neighbour)
-        return TileCollection([self.find_tile(valid_neighbour) for valid_neighbour in valid_neighbours])
+        position = tile.get_position()
+        if position in self._index:
+            neighbours = self.get_adjacency()[position]
+        else:
+            neighbours = [
+                self._index[(position[0] + x, position[1] + y)] for x, y in NEIGHBOUR_OFFSETS
+                if (position[0] + x, position[1] + y) in self._index
+            ]
+        return TileCollection(neighbours, self.geometry)
+
+
+class OccupancyGrid:
+    __slots__ = ("cells",)
+
+    def __init__(self, cells: np.ndarray) -> None:
+        """
+        Array-backed set of occupied tiles, indexed as cells[x, y].
+
+        Arguments:
+            cells (np.ndarray): Two-dimensional array, truthy where a tile is occupied.
+        """
+
+        self.cells = np.asarray(cells, dtype=bool)
+
+    @classmethod
+    def from_positions(cls, positions, tile_size: int) -> 'OccupancyGrid':
+        """
+        Creates a grid from tile positions.
+
+        Arguments:
+            positions (Iterable[tuple[int, int]]): Occupied tile positions.
+            tile_size (int): Number of tiles along each side of the grid.
+
+        Returns:
+            OccupancyGrid: A grid with the given positions occupied.
+        """
+
+        cells = np.zeros((tile_size, tile_size), dtype=bool)
+        positions = np.asarray(list(positions), dtype=np.intp).reshape(-1, 2)
+        cells[positions[:, 0], positions[:, 1]] = True
+        return cls(cells)
+
+    @property
+    def tile_size(self) -> int:
+        return self.cells.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.cells.nbytes
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.cells))
+
+    def __contains__(self, position) -> bool:
+        x, y = position
+        return 0 <= x < self.cells.shape[0] and 0 <= y < self.cells.shape[1] and bool(self.cells[x, y])
+
+    def positions(self) -> np.ndarray:
+        """Returns the occupied positions as an (n, 2) array of x, y rows."""
+
+        return np.argwhere(self.cells)
+
+    def shifted(self, dx: int, dy: int) -> np.ndarray:
+        """
+        Shifts the grid so that each cell holds the occupancy of the cell at (x + dx, y + dy).
+
+        Arguments:
+            dx (int): Offset along the x axis.
+            dy (int): Offset along the y axis.
+
+        Returns:
+            np.ndarray: Boolean array, False where the offset cell lies outside the grid.
+        """
+
+        width, height = self.cells.shape
+        result = np.zeros_like(self.cells)
+        result[max(-dx, 0):width - max(dx, 0), max(-dy, 0):height - max(dy, 0)] = \
+            self.cells[max(dx, 0):width + min(dx, 0), max(dy, 0):height + min(dy, 0)]
+        return result
+
+    def neighbour_mask(self) -> np.ndarray:
+        """
+        Computes which neighbours of every occupied cell are occupied.
+
+        Returns:
+            np.ndarray: uint8 array combining NORTH_BIT, EAST_BIT, SOUTH_BIT and WEST_BIT per cell.
+        """
+
+        mask = np.zeros(self.cells.shape, dtype=np.uint8)
+        for (dx, dy), bit in zip(DIRECTION_OFFSETS, DIRECTION_BITS):
+            mask[self.cells & self.shifted(dx, dy)] |= bit
+        return mask
+
+    def edges(self) -> np.ndarray:
+        """
+        Lists the directed edges between orthogonally adjacent occupied cells.
+
+        Returns:
+            np.ndarray: An (m, 4) array of x, y, xn, yn rows; every edge appears in both directions.
+        """
+
+        edges = []
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            sources = np.argwhere(self.cells & self.shifted(dx, dy))
+            edges.append(np.hstack((sources, sources + (dx, dy))))
+        return np.vstack(edges)
+
+    def edge_indices(self) -> np.ndarray:
+        """
+        Lists the edges of the grid as indices into the rows of positions().
+
+        Returns:
+            np.ndarray: An (m, 2) array of source and target indices, in the order of edges().
+        """
+
+        index = self._position_index()
+        edges = self.edges()
+        return np.stack((index[edges[:, 0], edges[:, 1]], index[edges[:, 2], edges[:, 3]]), axis=1)
+
+    def tile_edge_indices(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Lists the edges of the grid in the order Tile-based environments produce them: for every position in turn,
+        each occupied neighbour in the order of NEIGHBOUR_OFFSETS adds the edge from the neighbour and the edge to it.
+        Every edge is kept at its first occurrence.
+
+        Arguments:
+            positions (np.ndarray): An (n, 2) array of every occupied position, in the order of the tiles.
+
+        Returns:
+            np.ndarray: An (m, 2) array of source and target indices into the positions.
+        """
+
+        count = len(positions)
+        index = np.full(self.cells.shape, -1, dtype=np.intp)
+        index[positions[:, 0], positions[:, 1]] = np.arange(count)
+        width, height = self.cells.shape
+        neighbours = np.full((count, len(NEIGHBOUR_OFFSETS)), -1, dtype=np.intp)
+        for offset, (dx, dy) in enumerate(NEIGHBOUR_OFFSETS):
+            xs, ys = positions[:, 0] + dx, positions[:, 1] + dy
+            inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+            neighbours[inside, offset] = index[xs[inside], ys[inside]]
+
+        tiles = np.repeat(np.arange(count), len(NEIGHBOUR_OFFSETS))
+        neighbours = neighbours.ravel()
+        edges = np.stack((neighbours, tiles, tiles, neighbours), axis=1).reshape(-1, 2)
+        edges = edges[(edges >= 0).all(axis=1)]
+        _, first = np.unique(edges[:, 0] * count + edges[:, 1], return_index=True)
+        return edges[np.sort(first)]
+
+    def _position_index(self) -> np.ndarray:
+
+        # Maps every cell to its row in positions(), -1 where the cell is empty.
+        index = np.full(self.cells.shape, -1, dtype=np.intp)
+        positions = self.positions()
+        index[positions[:, 0], positions[:, 1]] = np.arange(len(positions))
+        return index
+
+    def neighbour_indices(self) -> np.ndarray:
+        """
+        Lists the neighbours of every occupied cell as indices into the rows of positions().
+
+        Returns:
+            np.ndarray: An (n, 4) array of the neighbours to the north, east, south and west, -1 where there is none.
+        """
+
+        index = self._position_index()
+        positions = self.positions()
+        width, height = self.cells.shape
+        neighbours = np.full((len(positions), 4), -1, dtype=np.intp)
+        for direction, (dx, dy) in enumerate(DIRECTION_OFFSETS):
+            xs, ys = positions[:, 0] + dx, positions[:, 1] + dy
+            inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+            neighbours[inside, direction] = index[xs[inside], ys[inside]]
+        return neighbours
+
+    def distances(self, source: tuple[int, int]) -> np.ndarray:
+        """
+        Computes breadth-first distances from a position to every reachable occupied cell.
+
+        Arguments:
+            source (tuple[int, int]): Position to measure distances from.
+
+        Returns:
+            np.ndarray: int32 array of distances, -1 where a cell is unreachable.
+        """
+
+        width, height = self.cells.shape
+        cells = self.cells.tolist()
+        distances = np.full(self.cells.shape, -1, dtype=np.int32)
+        if source not in self:
+            return distances
+
+        distance_rows = distances.tolist()
+        distance_rows[source[0]][source[1]] = 0
+        queue = deque([source])
+        while queue:
+            x, y = queue.popleft()
+            for dx, dy in NEIGHBOUR_OFFSETS:
+                xn, yn = x + dx, y + dy
+                if 0 <= xn < width and 0 <= yn < height and cells[xn][yn] and distance_rows[xn][yn] < 0:
+                    distance_rows[xn][yn] = distance_rows[x][y] + 1
+                    queue.append((xn, yn))
+        return np.array(distance_rows, dtype=np.int32)
 
 
 class Environment:
     """Interface for environment classes."""
-    pass
+
+    def to_grid(self) -> 'Environment':
+        """Returns the array-backed representation of the environment."""
+
+        raise NotImplementedError
+
+
+# Obtains the grid size of a tile-based environment.
+def _tile_size_of(tiles: TileCollection, *extra: Tile) -> int:
+    if tiles.geometry is not None:
+        return tiles.geometry.tile_size
+    return max(max(tile.get_position()) for tile in (*tiles, *extra)) + 1
 
 
 @dataclass
@@ -198,6 +564,12 @@ class MazeEnvironment(Environment):
     start: Tile
     goal: Tile
 
+    def to_grid(self) -> 'MazeGridEnvironment':
+        tile_size = _tile_size_of(self.tiles, self.start, self.goal)
+        order = np.array([tile.get_position() for tile in self.tiles], dtype=np.intp).reshape(-1, 2)
+        grid = OccupancyGrid.from_positions(order, tile_size)
+        return MazeGridEnvironment(grid, self.start.get_position(), self.goal.get_position(), order)
+
 
 @dataclass
 class SnakeEnvironment(Environment):
@@ -214,3 +586,71 @@ class SnakeEnvironment(Environment):
     head: Tile
     tail: Tile
     apples: TileCollection
+
+    def to_grid(self) -> 'SnakeGridEnvironment':
+        tile_size = _tile_size_of(self.board, self.head, self.tail)
+        board = OccupancyGrid.from_positions((tile.get_position() for tile in self.board), tile_size)
+        apples = np.array([apple.get_position() for apple in self.apples], dtype=np.intp).reshape(-1, 2)
+        return SnakeGridEnvironment(board, self.head.get_position(), self.tail.get_position(), apples)
+
+
+@dataclass
+class MazeGridEnvironment(Environment):
+    """
+    An array-backed maze environment.
+
+    Attributes:
+        grid (OccupancyGrid): Occupancy grid of the maze tiles.
+        start (tuple[int, int]): The starting position in the maze.
+        goal (tuple[int, int]): The goal position in the maze.
+        order (np.ndarray, optional): An (n, 2) array of the tile positions in the order the maze was built, which
+            is the order of the objects of its problems and so the order BFGP++ pointers iterate over them. None
+            uses the order of grid.positions().
+    """
+    grid: OccupancyGrid
+    start: tuple[int, int]
+    goal: tuple[int, int]
+    order: np.ndarray = None
+
+    def to_grid(self) -> 'MazeGridEnvironment':
+        return self
+
+    def tile_positions(self) -> np.ndarray:
+        """Returns the tile positions as an (n, 2) array, in the order the maze was built when it is known."""
+
+        return self.grid.positions() if self.order is None else self.order
+
+    def to_environment(self, geometry: GridGeometry = None) -> MazeEnvironment:
+        """Converts the grid back to a Tile-based MazeEnvironment."""
+
+        tiles = TileCollection([Tile(tile_position=(x, y)) for x, y in self.tile_positions().tolist()], geometry)
+        start, goal = Tile(tile_position=tuple(map(int, self.start))), Tile(tile_position=tuple(map(int, self.goal)))
+        return MazeEnvironment(tiles, start, goal)
+
+
+@dataclass
+class SnakeGridEnvironment(Environment):
+    """
+    An array-backed snake environment.
+
+    Attributes:
+        board (OccupancyGrid): Occupancy grid of the game board.
+        head (tuple[int, int]): The head position of the snake.
+        tail (tuple[int, int]): The tail position of the snake.
+        apples (np.ndarray): An (n, 2) array of apple positions in the order they are eaten.
+    """
+    board: OccupancyGrid
+    head: tuple[int, int]
+    tail: tuple[int, int]
+    apples: np.ndarray
+
+    def to_grid(self) -> 'SnakeGridEnvironment':
+        return self
+
+    def to_environment(self, geometry: GridGeometry = None) -> SnakeEnvironment:
+        """Converts the grid back to a Tile-based SnakeEnvironment."""
+
+        board = TileCollection([Tile(tile_position=(x, y)) for x, y in self.board.positions().tolist()], geometry)
+        apples = TileCollection([Tile(tile_position=(x, y)) for x, y in self.apples.tolist()], geometry)
+        head, tail = Tile(tile_position=tuple(map(int, self.head))), Tile(tile_position=tuple(map(int, self.tail)))
+        return SnakeEnvironment(board, head, tail, apples)
@@ -5,8 +5,9 @@ This module provides experiments to test classical and generalised planners.
 Requires generators.py.
 
 Functions:
-    - ``variable_experiment``: Tests a planner on a variable under time.
-    - ``efficiency_experiment``: Compares efficiency of solution between classical and generalised planners
+    - ``variable_experiment``: Tests a planner on a variable under time, with repetitions.
+    - ``efficiency_experiment``: Compares efficiency of solution between classical and generalised planners, with
+      the number of problems from which generalised planning is faster.
 
 Example usage::
 
@@ -15,19 +16,32 @@ Example usage::
 
     # Display the plot
     plot.show()
+
+    # Compare classical and generalised planning on 20 mazes for 10 to 50 program lines, keeping the measurements
+    plot = efficiency_experiment(BlocklyMazeProblemGenerator, problem_count=20, min_program_lines=10,
+                                 max_program_lines=50, store="efficiency.jsonl")
 """
 
+import math
+import os
 import signal
+import statistics
+import tempfile
 import time
+from typing import Union
 from matplotlib import pyplot as plt
 from matplotlib.figure import Figure
 from src.generators import ProblemGenerator
+from src.harness import OUTPUT_DIRECTORIES, sweep
+from src.programs import SOLVED
+from src.result_store import ResultStore
 from src.validators import non_negative_and_non_zero
 
 
 def limit_time(function, duration=60, *args, **kwargs):
     """
-    Limit the execution time of a function.
+    Limit the execution time of a function with an alarm signal.
+    Only works on the main thread and cannot interrupt native code, run_isolated has neither restriction.
 
     Arguments:
         function (callable): The function to be executed.
@@ -39,7 +53,10 @@ def limit_time(function, duration=60, *args, **kwargs):
         bool: True if the function executes within the specified duration, False otherwise.
     """
 
-    signal.signal(signal.SIGALRM, lambda signum, frame: TimeoutError())
+    def interrupt(signum, frame):
+        raise TimeoutError()
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
     signal.alarm(duration)
 
     try:
@@ -49,11 +66,12 @@ def limit_time(function, duration=60, *args, **kwargs):
         feedback = False
     finally:
         signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
 
     return feedback
 
 
-@non_negative_and_non_zero
+@non_negative_and_non_zero(non_negative_only=("seed", "warmup"))
 def variable_experiment(generator: type[ProblemGenerator],
                         variable: str = 'tile_size',
                         solution: str = 'classical',
@@ -62,113 +80,259 @@ def variable_experiment(generator: type[ProblemGenerator],
                         max_size: int = 10,
                         step: int = 1,
                         timeout: int = 60,
-                        display_images: bool = False) -> Figure:
+                        memory_limit: int = None,
+                        display_images: bool = False,
+                        repetitions: int = 1,
+                        warmup: int = 0,
+                        workers: int = 1,
+                        store: str = None,
+                        **options) -> Figure:
     """
     Conducts an experiment varying a specified variable.
+    Solve times are measured by the benchmark harness, separately from generation, and plotted as medians with their
+    interquartile ranges.
 
     Arguments:
         generator (Type[ProblemGenerator]): The type of problem generator to use.
         variable (str): The variable to be varied.
-        solution (str): The solution method to use, either 'classical' or 'generalised'.
+        solution (str): The solution method to use, either 'classical', 'generalised' or the name of a native search
+            in SEARCHES, e.g. 'bfs', as a fast reference baseline for maze generators.
         problem_count (int): The number of problems to generate and solve.
         min_size (int): The minimum value of the variable.
         max_size (int): The maximum value of the variable.
         step (int): The step size for incrementing the variable.
         timeout (int): The maximum time allowed for each experiment iteration, in seconds.
-        display_images (bool): Flag to display images after each problem has been generated.
+        memory_limit (int, optional): The maximum memory allowed for each experiment iteration, in bytes.
+        display_images (bool): Flag to display images of the problems of every value after timing.
+        repetitions (int): The number of timed repetitions per value.
+        warmup (int): The number of discarded repetitions per value.
+        workers (int): The number of processes running (value, repetition) cells concurrently.
+        store (str, optional): Path of a JSON Lines file checkpointing every finished cell, rerunning an interrupted
+            experiment with the same store skips the completed cells.
+        **options: Additional options for problem generation, e.g. a seed and corpus_directory to reuse problems.
 
     Returns:
         Figure: A matplotlib figure object showing the experiment results.
     """
 
-    timings = []
-    results = []
-    for i in range(min_size, max_size, step):
-
-        print("EXPERIMENT", str(i))
-
-        kwargs = {
-            'auto': True,
-            'problem_count': problem_count,
-            variable: i
-        }
-
-        current_generator = generator(**kwargs)
-        start = time.time()
-
-        if solution == 'classical':
-            f = current_generator.solve_each
-        elif solution == 'generalised':
-            f = current_generator.solve_all
-        else:
-            raise NameError("solution must be either 'classical' or 'generalised'.")
-
-        feedback = limit_time(f, duration=timeout)
-        print(feedback)
-        if feedback:
-            end = time.time()
-            timings.append(end - start)
-            results.append(i)
-            if display_images:
-                current_generator.display_images()
-        else:
-            print("Couldn't finish in 60s")
+    seed = options.pop('seed', None)
+    if seed is None:
+        seed = 1
+    results = sweep(generator, variable, range(min_size, max_size, step), solution, problem_count, repetitions,
+                    warmup, seed, timeout, memory_limit, workers, store, **options)
+
+    # Values whose solves all exceeded their limits have no timings.
+    points = [point for point in results["points"] if point["solve"]["n"]]
+    for point in results["points"]:
+        if not point["solve"]["n"]:
+            print(f"Couldn't finish {variable}={point['value']} within the limits: {point['statuses']}")
+        if display_images:
+            generator(**{**options, 'auto': True, 'problem_count': problem_count, 'seed': seed,
+                         variable: point["value"]}).display_images()
+
+    values = [point["value"] for point in points]
+    medians = [point["solve"]["median"] for point in points]
+    errors = [[point["solve"]["median"] - point["solve"]["q1"] for point in points],
+              [point["solve"]["q3"] - point["solve"]["median"] for point in points]]
 
     fig = plt.figure()
-    plt.plot(results, timings, figure=fig)
+    plt.errorbar(values, medians, yerr=errors, capsize=3, figure=fig)
     plt.title(f"Varying {variable} from {min_size} to {max_size}")
-    plt.ylabel("time", figure=fig)
+    plt.ylabel("median solve time (s)", figure=fig)
     plt.xlabel(variable, figure=fig)
-    print(results, timings)
+    print(values, medians)
 
     return fig
 
 
-@non_negative_and_non_zero
+@non_negative_and_non_zero(non_negative_only=("seed", "timeout", "memory_limit"))
 def efficiency_experiment(generator: type[ProblemGenerator],
                           problem_count: int = 2,
                           min_program_lines: int = 10,
                           max_program_lines: int = 100,
-                          tile_size: int = 5):
+                          step: int = 10,
+                          tile_size: int = 5,
+                          seed: int = 1,
+                          timeout: float = None,
+                          memory_limit: int = None,
+                          store: str = None,
+                          **options) -> Figure:
     """
     Conducts an efficiency experiment comparing classical planning to generalised planning.
+    The same seeded problems are solved once per problem by the classical planner, and for every number of program
+    lines by a single synthesised program that is then run natively on every problem. Generalised planning pays off
+    once its one-off synthesis time is recovered by running the program instead of solving each problem, which is
+    reported as the break-even number of problems. Problems that classical planning or the program fail on, or that
+    exceed a limit, are recorded with their status and left out of the plan length ratios and the break-even number.
 
     Arguments:
         generator (Type[ProblemGenerator]): The type of problem generator to use.
         problem_count (int): The number of problems to generate and solve.
+        min_program_lines (int): The minimum number of program lines.
+        max_program_lines (int): The maximum number of program lines, included if a step reaches it.
+        step (int): The step size for incrementing the number of program lines.
         tile_size (int): The size of the tiles in the environment.
-        min_program_lines (int):
-        max_program_lines (int):
+        seed (int): Seed of the problems.
+        timeout (float, optional): The maximum time allowed for each classical solve and each synthesis, in seconds.
+        memory_limit (int, optional): The maximum memory allowed for each classical solve and each synthesis, in bytes.
+        store (str, optional): Path of a JSON Lines file recording the measurements of every number of program lines,
+            rerunning the experiment with the same store skips the numbers already measured.
+        **options: Additional options for problem generation, e.g. corpus_directory to reuse the seeded problems. A
+            program_cache_directory is rejected, as reusing cached programs would replace the synthesis being timed.
 
     Returns:
-        Figure: A matplotlib figure object showing the experiment results.
+        Figure: A matplotlib figure object showing the synthesis time and break-even number of problems per number of
+        program lines.
     """
-    out_dir = 'tmp'
 
-    kwargs = {
-        'auto': True,
-        'problem_count': problem_count,
-        'tile_size': tile_size,
-        'plan_directory': out_dir
+    if options.get("program_cache_directory") is not None:
+        raise ValueError("efficiency_experiment times synthesis, which a program cache would skip")
+
+    # Output directories are replaced by temporary ones, the corpus only spares regenerating the seeded problems.
+    store = ResultStore(store)
+    options = {key: value for key, value in options.items() if key not in OUTPUT_DIRECTORIES}
+    settings = {
+        "experiment": "efficiency",
+        "generator": generator.__name__,
+        "problem_count": problem_count,
+        "tile_size": tile_size,
+        "seed": seed,
+        "limits": {"timeout": timeout, "memory_limit": memory_limit},
+        "options": {key: value for key, value in options.items()
+                    if isinstance(value, (str, int, float, bool)) and not key.endswith("_directory")},
     }
+    key = store.key(settings)
+
+    program_lines_range = list(range(min_program_lines, max_program_lines + 1, step))
+    records = {}
+    for record in store.records(key):
+        # Records written before statuses were recorded are measured again.
+        if "program_statuses" in record:
+            records.setdefault(record["program_lines"], record)
+    missing = [program_lines for program_lines in program_lines_range if program_lines not in records]
+    if len(missing) < len(program_lines_range):
+        print(f"Resuming experiment, {len(program_lines_range) - len(missing)} numbers of program lines measured")
+
+    with tempfile.TemporaryDirectory() as directory:
+        problem_generator = generator(**{
+            **options,
+            'auto': True,
+            'headless': True,
+            'problem_count': problem_count,
+            'tile_size': tile_size,
+            'seed': seed,
+            'image_directory': os.path.join(directory, "images"),
+            'plan_directory': os.path.join(directory, "plans"),
+            'problem_directory': os.path.join(directory, "problems"),
+        })
+        environments = [environment for environment, _ in problem_generator.iter_problems()]
+
+        if missing:
+            # Problems the planner fails on or that exceed a limit keep their place, with their status.
+            classical_results = problem_generator.solve_each(timeout=timeout, memory_limit=memory_limit)
+            classical_statuses = [result.status.name for result in classical_results]
+            classical_times = [float(result.metrics["solve_time"]) for result in classical_results]
+            classical_lengths = [None if result.plan is None else len(result.plan.actions)
+                                 for result in classical_results]
+
+        for program_lines in missing:
+            print("EXPERIMENT", str(program_lines), "PROGRAM LINES")
+            problem_generator.solve_all(program_lines, timeout=timeout, memory_limit=memory_limit)
+            report = problem_generator.synthesis_report
+            record = {
+                "program_lines": program_lines,
+                "classical_statuses": classical_statuses,
+                "classical_seconds": classical_times,
+                "synthesis_seconds": report.seconds,
+                "solved": report.solved,
+                "program_statuses": None,
+                "program_seconds": None,
+                "length_ratios": None,
+                "break_even": None,
+            }
+
+            # A program that does not solve every problem is still run, the problems it fails on are excluded below.
+            if problem_generator.program is not None:
+                program_statuses, program_times, lengths = [], [], []
+                for environment in environments:
+                    start = time.perf_counter()
+                    execution, = problem_generator.run_program(environments=[environment])
+                    program_times.append(time.perf_counter() - start)
+                    program_statuses.append(execution.status)
+                    lengths.append(len(execution.plan) if execution.status == SOLVED else None)
+
+                # Only problems solved by both approaches are compared.
+                both = {i for i in range(len(environments))
+                        if classical_lengths[i] is not None and lengths[i] is not None}
+                record["program_statuses"] = program_statuses
+                record["program_seconds"] = program_times
+                record["length_ratios"] = [lengths[i] / classical_lengths[i]
+                                           if i in both and classical_lengths[i] else None
+                                           for i in range(len(environments))]
+                if both:
+                    record["break_even"] = _break_even(report.seconds,
+                                                       statistics.mean(classical_times[i] for i in both),
+                                                       statistics.mean(program_times[i] for i in both))
+
+            store.append(key, record)
+            records[program_lines] = record
+
+    points = [records[program_lines] for program_lines in program_lines_range]
+    for point in points:
+        if point["program_statuses"] is None:
+            print(f"Couldn't synthesise a program with {point['program_lines']} program lines")
+            continue
+        ratios = [ratio for ratio in point["length_ratios"] if ratio is not None]
+        compared = [i for i, ratio in enumerate(point["length_ratios"]) if ratio is not None]
+        print(f"{point['program_lines']} program lines: {point['synthesis_seconds']:.2f} s synthesis, "
+              f"{len(compared)} of {problem_count} problems solved by both, "
+              f"classical statuses {_tally(point['classical_statuses'])}, "
+              f"program statuses {_tally(point['program_statuses'])}")
+        if compared:
+            print(f"    {statistics.mean(point['classical_seconds'][i] for i in compared) * 1000:.2f} ms/problem "
+                  f"classical, {statistics.mean(point['program_seconds'][i] for i in compared) * 1000:.2f} "
+                  f"ms/problem program, mean plan length ratio {statistics.mean(ratios):.2f}, "
+                  f"break-even at {point['break_even']} problems")
+
+    solved = [point for point in points if point["program_statuses"] is not None]
+    fig, (synthesis_axes, break_even_axes) = plt.subplots(2, 1, sharex=True)
+    synthesis_axes.plot([point["program_lines"] for point in solved],
+                        [point["synthesis_seconds"] for point in solved], marker="o")
+    synthesis_axes.set_ylabel("synthesis time (s)")
+    synthesis_axes.set_title(f"Varying program_lines from {min_program_lines} to {max_program_lines}")
+
+    # Programs slower than classical planning never break even and are left out.
+    paying = [point for point in solved if point["break_even"] is not None]
+    break_even_axes.plot([point["program_lines"] for point in paying],
+                         [point["break_even"] for point in paying], marker="o")
+    break_even_axes.set_ylabel("break-even problems")
+    break_even_axes.set_xlabel("program_lines")
 
-    scores = []
+    return fig
 
-    generator = generator(**kwargs)
-    classical_results = generator.solve_each()
-    generalised_results = generator.solve_all()
 
-    if len(classical_results) != len(generalised_results) or len(classical_results) != problem_count:
-        return RuntimeError("Results not generated correctly...")
+def _tally(statuses: list[str]) -> dict[str, int]:
 
-    generalised_plans = ...
+    counts = {}
+    for status in statuses:
+        counts[status] = counts.get(status, 0) + 1
+    return counts
 
-    for i in range(len(classical_results)):
-        scores.append(len(classical_results[i].plan) / len(generalised_plans[i]))
 
-    fig = plt.figure()
-    plt.plot(range(1, problem_count + 1), scores, figure=fig)
-    plt.ylabel("scores", figure=fig)
-    plt.xlabel("problem count", figure=fig)
+def _break_even(synthesis: float, classical: float, program: float) -> Union[int, None]:
+    """
+    Returns the smallest number of problems for which synthesising a program and running it on every problem is
+    faster than solving every problem with classical planning.
 
-    return fig
+    Arguments:
+        synthesis (float): Seconds of the one-off synthesis.
+        classical (float): Seconds of classical planning per problem.
+        program (float): Seconds of running the program per problem.
+
+    Returns:
+        Union[int, None]: The number of problems, None if the program is not faster per problem.
+    """
+
+    if program >= classical:
+        return None
+    return math.floor(synthesis / (classical - program)) + 1
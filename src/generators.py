@@ -24,32 +24,161 @@ Example usage::
     # Display images of the generated environments as plots
     maze_problem.display_images()
 
+    # Generate without rendering, images are only rendered when displayed or exported
+    headless_generator = BlocklyMazeProblemGenerator(problem_count=5, auto=True, headless=True)
+    headless_generator.export_images()
+
+    # Generate in parallel, problems are identical for a given seed whatever the number of workers
+    parallel_generator = SnakeProblemGenerator(problem_count=1000, auto=True, seed=42, workers=8)
+
+    # Stream problems one at a time, seeded environments are regenerated on every pass instead of being kept
+    lazy_generator = SnakeProblemGenerator(problem_count=100000, auto=True, headless=True, lazy=True, seed=1)
+    for environment, problem in lazy_generator.iter_problems():
+        ...
+    lazy_generator.save_as_pddl()
+
+    # Cache seeded environments on disk, later runs with the same settings load them instead of generating
+    cached_generator = SnakeProblemGenerator(problem_count=100, auto=True, seed=3, corpus_directory="corpus")
+
+    # Write the problems straight from the environments into a single compressed archive
+    maze_problem.save_as_pddl(workers=4, archive=True)
+
     # Solve each problem individually using classical planning
     maze_problem.solve_each()
 
+    # Solve on four worker processes, each keeping a warm planner per problem kind
+    maze_problem.solve_each(workers=4)
+
+    # Solve each problem in a child process that is killed after 60 seconds or beyond 2 GiB of memory
+    maze_problem.solve_each(timeout=60, memory_limit=2 ** 31)
+
+    # Solve maze problems natively with a bidirectional search of the grid, plans use the actions of the domain
+    maze_problem.solve_each(solver="bidirectional")
+
+    # Check every plan by simulating it on its environment, invalid plans report their first failing step
+    reports = maze_problem.validate_plans(maze_problem.solve_each())
+
     # Solve all problems at once using generalised planning
     maze_problem.solve_all()
+
+    # Record the time, memory and facts of every phase while generating and solving
+    with recording(trace_allocations=True) as recorder:
+        BlocklyMazeProblemGenerator(problem_count=5, auto=True, headless=True).solve_each()
+    recorder.save("phases.json")
+
+    # Run the synthesised program natively, each problem gets a concrete plan without calling the planner
+    executions = maze_problem.run_program()
+
+    # Synthesise on two problems first, adding problems the program fails on until it solves every problem
+    maze_problem.solve_all(incremental=True, seed_size=2)
+    print(maze_problem.synthesis_report)
+
+    # Synthesise with 4 to 12 program lines concurrently, keeping the smallest program that synthesis finds, and
+    # cancel runs taking over 10 minutes
+    maze_problem.search_program_lines(sizes=range(4, 13, 2), workers=4, timeout=600)
+    print(maze_problem.synthesis_report.timings)
+
+    # Reuse cached programs that still solve every problem instead of running synthesis again
+    cached_generator = SnakeProblemGenerator(problem_count=10, auto=True, program_cache_directory="programs")
+    cached_generator.solve_all()
 """
 
+import contextlib
+import multiprocessing
+import multiprocessing.connection
 import os.path
+import signal
+import tempfile
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 import shutil
 import random
+import resource
 import glob
 import math
+import time
+import numpy as np
 import unified_planning as up
-from typing import Union
-from unified_planning.engines import CompilationKind, PlanGenerationResultStatus
-from unified_planning.io import PDDLReader, PDDLWriter
+from typing import Iterable, Iterator, Union
+from unified_planning.engines import CompilationKind, PlanGenerationResult, PlanGenerationResultStatus
 from unified_planning.model import Problem, Object
+from unified_planning.plans import ActionInstance, SequentialPlan
 from unified_planning.shortcuts import OneshotPlanner, get_environment, Not
 from matplotlib import image as mpimg
 from matplotlib import pyplot as plt
 from src.environment import *
 from src.constants import *
 from options import OptionManager
+from src.corpus import ProblemCorpus
+from src.domains import InitialStateBuilder, domain_digest, load_domain
+from src.instrumentation import count, span, spanned
+from src.instrumentation import enabled as instrumentation_enabled
+from src.isolation import CRASHED, OUT_OF_MEMORY, POLL_INTERVAL, TIMEOUT, ResourceLimits, group_memory, run_isolated
+from src.isolation import SOLVED as ISOLATED_SOLVED
+from src.plan_validators import (
+    MazeValidator, PlanValidator, ReducedMazeValidator, SnakeValidator, ValidationReport, plan_actions
+)
+from src.program_cache import ProgramCache, training_fingerprint
+from src.programs import (
+    PROGRAM_FILE, PROGRAM_THEORY, SOLVED, SYNTHESIS_CANCELLED, SYNTHESIS_CRASHED, SYNTHESIS_FAILED,
+    GeneralisedProgram, ProgramExecution, SynthesisReport, load_program
+)
+from src.serializers import format_problem, pddl_name, write_archive, write_problems
+from src.solvers import SearchProblem, get_search
+from src.strategies import MazeGenerationStrategy, get_maze_strategy
 from src.validators import non_negative_and_non_zero
 
 
+def _ordered_map(function, items: Iterator, workers: int) -> Iterator:
+    """
+    Applies a function to every item on a process pool, yielding the results in order.
+    At most two items per worker are in flight, so memory does not grow with the number of items.
+
+    Arguments:
+        function (callable): Picklable function to apply.
+        items (Iterator): Argument tuples, one per call.
+        workers (int): Number of worker processes.
+
+    Returns:
+        Iterator: The results in the order of the items.
+    """
+
+    items = iter(items)
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque(executor.submit(function, *args) for args in islice(items, workers * 2))
+        while pending:
+            result = pending.popleft().result()
+            pending.extend(executor.submit(function, *args) for args in islice(items, 1))
+            yield result
+
+
+class _PlannerCache(dict):
+    """Open classical planners keyed by problem kind, each created on first use and reused afterwards."""
+
+    def __missing__(self, kind):
+        planner = self[kind] = OneshotPlanner(problem_kind=kind)
+        return planner
+
+    def close(self) -> None:
+        for planner in self.values():
+            planner.destroy()
+        self.clear()
+
+
+# Results of solves that were stopped by their resource limits, keyed by isolated outcome.
+_ISOLATION_STATUSES = {
+    TIMEOUT: PlanGenerationResultStatus.TIMEOUT,
+    OUT_OF_MEMORY: PlanGenerationResultStatus.MEMOUT,
+    CRASHED: PlanGenerationResultStatus.INTERNAL_ERROR,
+}
+
+# Planners of a solving worker process, kept warm for the lifetime of the process.
+_worker_planners = _PlannerCache()
+
+
 class ProblemGenerator:
 
     def __init__(self, domain_path, **options):
@@ -63,13 +192,21 @@ class ProblemGenerator:
         """
 
         self._domain = domain_path
-        self._reader = PDDLReader()
-        self._option_manager = OptionManager()
+        self._option_manager = OptionManager(persistent=False)
+        self._problems: list[Problem] = []
+        self._environments: list[Environment] = []
+        self._pending_environments: Union[Iterator[Environment], None] = None
+        self._images_saved: bool = False
+        self._program: Union[GeneralisedProgram, None] = None
+        self._synthesis_report: Union[SynthesisReport, None] = None
         self._set_arguments(**options)
-        self._set_problems()
+
+        # Lazy generators create their problems on demand in iter_problems.
+        if not self._lazy:
+            self._set_problems()
         get_environment().credits_stream = None
 
-    @non_negative_and_non_zero
+    @non_negative_and_non_zero(non_negative_only=("seed",))
     def _set_arguments(self, **options) -> None:
 
         # Problem generation
@@ -77,8 +214,28 @@ class ProblemGenerator:
         self._problem_count: int = options.get("problem_count", 10)
         self._program_lines: int = options.get("program_lines", 10)
         self._tile_size: int = options.get("tile_size", 5)
+        self._headless: bool = options.get("headless", False)
+        self._seed: Union[int, None] = options.get("seed", None)
+        self._workers: int = options.get("workers", 1)
+        self._lazy: bool = options.get("lazy", False)
+
+        # Seeded automatic environments are cached in the corpus directory when one is given.
+        corpus_directory = options.get("corpus_directory", None)
+        self._corpus = None
+        if corpus_directory is not None:
+            self._corpus = ProblemCorpus(corpus_directory, options.get("corpus_max_bytes", 2 ** 30))
+
+        # Synthesised programs are cached in the program cache directory when one is given.
+        program_cache_directory = options.get("program_cache_directory", None)
+        self._program_cache = None
+        if program_cache_directory is not None:
+            self._program_cache = ProgramCache(program_cache_directory,
+                                               options.get("program_cache_max_bytes", 2 ** 24),
+                                               options.get("program_cache_max_entries", 1000))
+        self._rng = random
         self._option_manager.set_tile_size(self._tile_size)
         self._screen_length = self._option_manager.get_screen_length()
+        self._geometry = GridGeometry.from_options(self._option_manager)
         self._screen_size = self._screen_length, self._screen_length
 
         # File management
@@ -86,20 +243,137 @@ class ProblemGenerator:
         self._plan_directory: str = options.get("plan_directory", "../../plan_temp")
         self._problem_directory: str = options.get("problem_directory", "problem_temp")
 
+    @spanned("generate")
     def _set_problems(self) -> None:
-        """Generates environments and problems."""
+        """
+        Generates environments and problems.
+        Automatic environments are generated on a process pool when more than one worker is requested, problems are
+        set up in order in this process as unified planning expressions cannot be shared between processes.
+        """
 
         # Ensure image directory is clear before processing
         self._clear_directory(self._image_directory)
 
-        self._problems: list[Problem] = []
-        self._environments: list[Environment] = []
-        for i in range(self._problem_count):
-            pygame.init()
-            environment = self._generate_environment()
+        self._problems = []
+        self._environments = []
+        for environment in self._iter_environments():
             self._environments.append(environment)
             self._add_problem(environment)
 
+    def _uses_corpus(self) -> bool:
+
+        # Only seeded automatic environments are reproducible, anything else is never cached.
+        return self._corpus is not None and self._auto and self._seed is not None
+
+    def _corpus_fields(self) -> dict:
+        """
+        Returns the values determining the generated environments, which address them in the corpus.
+
+        Returns:
+            dict: The generator, domain file digest, tile size, apple count, seed and maze strategy.
+        """
+
+        return {
+            "generator": type(self).__name__,
+            "domain": domain_digest(f"domains/{self._domain}.pddl"),
+            "tile_size": self._tile_size,
+            "apple_count": None,
+            "seed": self._seed,
+            "strategy": None,
+        }
+
+    def _iter_environments(self) -> Iterator[Environment]:
+        """
+        Loads the environments of all problems from the corpus, or generates them, in order.
+        Environments missing from the corpus are generated and stored once all of them have been produced. The number
+        of environments loaded is counted as corpus_hits while instrumentation is enabled.
+
+        Returns:
+            Iterator[Environment]: The environments.
+        """
+
+        if not self._uses_corpus():
+            yield from self._generate_environments(0)
+            return
+
+        fields = self._corpus_fields()
+        key = self._corpus.key(fields)
+        cached = self._corpus.load_environments(key)[:self._problem_count]
+        count("corpus_hits", len(cached))
+
+        for i, environment in enumerate(cached):
+            if not (self._headless or self._images_saved):
+                self._save_pygame_environment(self._render_environment(environment), i)
+            yield environment
+
+        generated = []
+        for environment in self._generate_environments(len(cached)):
+            generated.append(environment.to_grid())
+            yield environment
+        if generated:
+            self._corpus.store_environments(key, fields, cached + generated)
+
+    def _generate_environments(self, start: int) -> Iterator[Environment]:
+        """
+        Generates the environments of the problems from an index onwards, in order.
+
+        Arguments:
+            start (int): Index of the first environment to generate.
+
+        Returns:
+            Iterator[Environment]: The generated environments.
+        """
+
+        if not (self._workers > 1 and self._auto):
+            for i in range(start, self._problem_count):
+                yield self._create_environment(i)
+            return
+
+        # Parallel generation always seeds each problem, workers would otherwise share the same random state.
+        if self._seed is None:
+            self._seed = random.getrandbits(32)
+
+        indices = ((i,) for i in range(start, self._problem_count))
+        yield from _ordered_map(self._create_environment, indices, self._workers)
+
+    def _create_environment(self, index: int) -> Environment:
+        """
+        Generates the environment of a problem, seeding it from the master seed if one is set.
+
+        Arguments:
+            index (int): Index of the problem.
+
+        Returns:
+            Environment: Generated environment.
+        """
+
+        self._environment_index = index
+        if self._seed is not None:
+            self._rng = random.Random(f"{self._seed}-{index}")
+        with span("generate_environment"):
+            environment = self._generate_environment()
+
+        # Manually generated environments save their own image, automatic ones are rendered unless headless.
+        if self._auto and not (self._headless or self._images_saved):
+            with span("render"):
+                self._save_pygame_environment(self._render_environment(environment), index)
+        return environment
+
+    def __getstate__(self) -> dict:
+
+        # Only the generation options are sent to worker processes, never the problems.
+        state = self.__dict__.copy()
+        for name in ("_problems", "_environments", "_pending_environments", "_problem", "_initial_state", "_obj_map",
+                     "_rng"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._environments = []
+        self._pending_environments = None
+        self._rng = random
+
     @staticmethod
     def _clear_directory(directory):
 
@@ -127,13 +401,99 @@ class ProblemGenerator:
             environment (Environment): Environment describing the current problem.
         """
 
-        self._obj_map = {}
-        self._problem = self._reader.parse_problem(f"domains/{self._domain}.pddl")
-        self._problem.name = f"{self._domain}{len(self._problems)}"
-        self._setup_problem(environment)
-        self._problems.append(self._problem)
+        self._problems.append(self._create_problem(environment, len(self._problems)))
         print("[DEBUG] problem added")
 
+    def _create_problem(self, environment: Environment, index: int) -> Problem:
+        """
+        Creates a PDDL problem.
+
+        Arguments:
+            environment (Environment): Environment describing the current problem.
+            index (int): Index of the problem, used in its name.
+
+        Returns:
+            Problem: The PDDL problem.
+        """
+
+        self._obj_map = {}
+        with span("load_domain"):
+            self._problem = load_domain(f"domains/{self._domain}.pddl")
+        self._problem.name = f"{self._domain}{index}"
+        self._initial_state = InitialStateBuilder(self._problem)
+        with span("setup_problem") as current:
+            self._setup_problem(environment)
+
+        # Counting facts walks the initial state, which is only worth it while recording.
+        if instrumentation_enabled():
+            objects, facts = len(self._problem.all_objects), len(self._problem.explicit_initial_values)
+            current.set(objects=objects, facts=facts)
+            count("problems")
+            count("objects", objects)
+            count("facts", facts)
+        return self._problem
+
+    def iter_problems(self) -> Iterator[tuple[Environment, Problem]]:
+        """
+        Iterates over the environments and problems in order.
+        Lazy generators create each problem on demand and keep none of them. Seeded automatic environments are
+        generated again, or loaded from the corpus, on every iteration, so memory does not grow with the problem count.
+        Unseeded and manual environments cannot be reproduced, they are generated on first use and kept in grid form,
+        which takes memory linear in the problem count but lets every iteration see the same problems.
+
+        Returns:
+            Iterator[tuple[Environment, Problem]]: The (environment, problem) pairs.
+        """
+
+        if not self._lazy:
+            yield from zip(self._environments, self._problems)
+            return
+
+        for i, environment in enumerate(self._lazy_environments()):
+            yield environment, self._create_problem(environment, i)
+
+    def _lazy_environments(self) -> Iterator[Environment]:
+        """
+        Iterates over the environments of a lazy generator.
+        Seeded automatic environments are regenerated from their per-problem random state on every pass, images are
+        only saved on the first complete one. Other environments are generated the first time they are reached and
+        kept in grid form, so later iterations, images and manual input are not repeated.
+
+        Returns:
+            Iterator[Environment]: The environments in order.
+        """
+
+        # Generators seeded by their first parallel pass already keep their environments.
+        if self._auto and self._seed is not None and not self._environments and self._pending_environments is None:
+            if not self._images_saved:
+                self._clear_directory(self._image_directory)
+            yield from self._iter_environments()
+            self._images_saved = True
+            return
+
+        if not self._environments and self._pending_environments is None:
+            self._clear_directory(self._image_directory)
+            self._pending_environments = self._iter_environments()
+
+        i = 0
+        while True:
+            if i < len(self._environments):
+                yield self._environments[i]
+                i += 1
+                continue
+            if self._pending_environments is None:
+                return
+            environment = next(self._pending_environments, None)
+            if environment is None:
+                self._pending_environments = None
+                return
+            self._environments.append(environment.to_grid())
+
+    def _all_environments(self) -> Iterable[Environment]:
+
+        # Lazy generators produce their environments on first use.
+        return self._lazy_environments() if self._lazy else self._environments
+
     def _setup_problem(self, environment: Environment) -> None:
         """
         Sets up a PDDL problem.
@@ -178,40 +538,150 @@ class ProblemGenerator:
             return mapping[0]
         return mapping
 
-    def _save_pygame_environment(self, screen: pygame.Surface):
+    def _draw_environment(self, screen: pygame.Surface, environment: Environment) -> None:
+        """
+        Draws an environment onto a Pygame surface.
+
+        Arguments:
+            screen (pygame.Surface): Pygame surface to draw on.
+            environment (Environment): Array-backed environment to draw.
+        """
+
+        raise NotImplementedError
+
+    def _render_environment(self, environment: Environment) -> pygame.Surface:
+        """
+        Renders an environment onto an off-screen surface, no display is required.
+
+        Arguments:
+            environment (Environment): Environment to render.
+
+        Returns:
+            pygame.Surface: The rendered environment.
+        """
+
+        screen = pygame.Surface(self._screen_size)
+        screen.fill(BACKGROUND)
+        self._draw_environment(screen, environment.to_grid())
+        return screen
+
+    def _image_path(self, index: int) -> str:
+        return f"{self._image_directory}/{self._domain}{index}.jpg"
+
+    def _save_pygame_environment(self, screen: pygame.Surface, index: int = None):
         """
         Saves a Pygame surface as an image.
 
         Arguments:
             screen (pygame.Surface): Pygame screen.
+            index (int, optional): Index of the environment, defaults to the environment being generated.
         """
 
         if not os.path.exists(self._image_directory):
             os.makedirs(self._image_directory)
 
-        pygame.image.save(screen, f"{self._image_directory}/{self._domain}{len(self._environments)}.jpg")
+        pygame.image.save(screen, self._image_path(self._environment_index if index is None else index))
         print(f"[DEBUG] {self._domain} environment generated successfully")
 
-    def save_as_pddl(self) -> None:
-        """Saves the generated problems as PDDL files."""
+    def export_images(self) -> None:
+        """Renders and saves an image for every generated environment that does not have one yet."""
+
+        for i, environment in enumerate(self._all_environments()):
+            if not os.path.exists(self._image_path(i)):
+                self._save_pygame_environment(self._render_environment(environment), i)
+
+    def save_options(self) -> None:
+        """Persists the runtime options of this generator to config.ini."""
+
+        self._option_manager.save()
+
+    def _serialize_problem(self, environment: Environment, index: int) -> tuple[str, str]:
+        """
+        Formats the PDDL problem of an environment without building it, matching the output of PDDLWriter.
+
+        Arguments:
+            environment (Environment): Environment describing the problem.
+            index (int): Index of the problem, used in its name.
+
+        Returns:
+            tuple[str, str]: The name and PDDL text of the problem.
+        """
+
+        raise NotImplementedError
+
+    def _iter_problem_texts(self, workers: int, environments: Iterable[Environment] = None) \
+            -> Iterator[tuple[str, str]]:
+        """
+        Formats the PDDL problems of all environments in order.
+
+        Arguments:
+            workers (int): Number of processes formatting problems.
+            environments (Iterable[Environment], optional): Environments already produced, defaults to all
+                environments of the generator.
+
+        Returns:
+            Iterator[tuple[str, str]]: The problem names and texts.
+        """
+
+        # Problems stored in the corpus are read back instead of being formatted again.
+        if self._uses_corpus():
+            key = self._corpus.key(self._corpus_fields())
+            problems = self._corpus.load_problems(key, self._problem_count)
+            if problems is not None:
+                yield from problems
+                return
+
+        if environments is None:
+            environments = self._all_environments()
+
+        # Environments are sent to workers in their compact grid form.
+        items = ((environment.to_grid(), i) for i, environment in enumerate(environments))
+        if workers > 1:
+            problems = _ordered_map(self._serialize_problem, items, workers)
+        else:
+            problems = (self._serialize_problem(environment, i) for environment, i in items)
+
+        if not self._uses_corpus():
+            yield from problems
+            return
+
+        stored = []
+        for problem in problems:
+            stored.append(problem)
+            yield problem
+        self._corpus.store_problems(self._corpus.key(self._corpus_fields()), stored)
+
+    @non_negative_and_non_zero
+    @spanned("save_as_pddl", "archive")
+    def save_as_pddl(self, workers: int = 1, archive: bool = False) -> None:
+        """
+        Saves the generated problems as PDDL files, formatted directly from the environments.
+
+        Arguments:
+            workers (int): Number of processes formatting problems, defaults to 1.
+            archive (bool): Writes a single compressed {domain}.zip archive instead of one file per problem.
+        """
 
         self._clear_directory(self._problem_directory)
-        for problem in self._problems:
-            file_path = f"{self._problem_directory}/{problem.name}.pddl"
-            open(file_path, 'a').close()
-            writer = PDDLWriter(problem)
-            writer.write_problem(file_path)
+        problems = self._iter_problem_texts(workers)
+        if archive:
+            write_archive(f"{self._problem_directory}/{self._domain}.zip", problems)
+        else:
+            write_problems(self._problem_directory, problems)
 
     def display_problems(self) -> None:
         """Displays information about the generated problems."""
 
-        for i, problem in enumerate(self._problems):
+        for i, (_, problem) in enumerate(self.iter_problems()):
             print(f"Problem {i}:")
             print(problem)
 
     def display_images(self, columns=None) -> None:
         """Displays images of the generated environments as iPython plots."""
 
+        # Headless generators render their images on first use.
+        self.export_images()
+
         images = []
         for img_path in glob.glob(f"{self._image_directory}/*.jpg"):
             images.append(mpimg.imread(img_path))
@@ -224,54 +694,676 @@ class ProblemGenerator:
             plt.imshow(image)
             plt.axis("off")
 
-    def solve_each(self) -> list:
+    @staticmethod
+    def _solve_problem(planners: _PlannerCache, problem: Problem) -> PlanGenerationResult:
+        """
+        Solves a problem with the planner for its kind.
+
+        Arguments:
+            planners (_PlannerCache): Open planners, reused across problems of the same kind.
+            problem (Problem): The problem to solve.
+
+        Returns:
+            PlanGenerationResult: The result, with the wall time of the solve in seconds as its solve_time metric.
+        """
+
+        planner = planners[problem.kind]
+        with span("solve_problem") as current:
+            start = time.perf_counter()
+            result = planner.solve(problem)
+            result.metrics["solve_time"] = str(time.perf_counter() - start)
+            current.set(engine=result.engine_name, status=result.status.name)
+        return result
+
+    def _native_plan(self, maze: MazeGridEnvironment, problem: Problem, search) -> Union[SequentialPlan, None]:
+        """
+        Finds a shortest plan by searching the grid of the environment directly instead of grounding the problem.
+
+        Arguments:
+            maze (MazeGridEnvironment): The environment of the problem.
+            problem (Problem): The problem, whose objects and actions the plan refers to.
+            search (Callable[[SearchProblem], Union[list[int], None]]): The search to run, from SEARCHES.
+
+        Returns:
+            Union[SequentialPlan, None]: A shortest plan using the actions of the domain, or None if the goal is
+            unreachable.
+        """
+
+        raise NotImplementedError(f"{type(self).__name__} has no native solver")
+
+    def _solve_natively(self, solver: str, environment: Environment, problem: Problem) -> PlanGenerationResult:
+        """
+        Solves a problem with a native search of its environment.
+
+        Arguments:
+            solver (str): Name of the search in SEARCHES.
+            environment (Environment): Environment describing the problem.
+            problem (Problem): The problem to solve.
+
+        Returns:
+            PlanGenerationResult: The result, with the wall time of the solve in seconds as its solve_time metric.
+        """
+
+        search = get_search(solver)
+        with span("native_solve", solver=solver):
+            start = time.perf_counter()
+            plan = self._native_plan(environment.to_grid(), problem, search)
+            metrics = {"solve_time": str(time.perf_counter() - start)}
+
+        # Every action has unit cost and the searches return shortest paths, so plans are optimal.
+        status = PlanGenerationResultStatus.UNSOLVABLE_PROVEN if plan is None \
+            else PlanGenerationResultStatus.SOLVED_OPTIMALLY
+        return PlanGenerationResult(status, plan, f"native-{solver}", metrics)
+
+    def _solve_in_worker(self, environment: Environment, index: int) -> tuple:
+        """
+        Creates and solves a problem in a worker process.
+        Plans refer to objects of the worker's unified planning environment, so they are returned by name.
+
+        Arguments:
+            environment (Environment): Environment describing the problem.
+            index (int): Index of the problem.
+
+        Returns:
+            tuple: The status, the plan as (action name, parameter names) pairs or None, the engine name and metrics.
+        """
+
+        problem = self._create_problem(environment, index)
+
+        # Planners such as Fast Downward write intermediate files to the working directory, which workers must not share.
+        with tempfile.TemporaryDirectory() as directory, contextlib.chdir(directory):
+            result = self._solve_problem(_worker_planners, problem)
+
+        actions = None if result.plan is None else plan_actions(result.plan)
+        return result.status, actions, result.engine_name, result.metrics
+
+    def _problem_of(self, environment: Environment, index: int) -> Problem:
+
+        # Lazy generators keep no problems, so the problem is created again from its environment.
+        return self._create_problem(environment, index) if self._lazy else self._problems[index]
+
+    def _rebuild_result(self, environment: Environment, index: int, status, actions, engine_name: str,
+                        metrics: dict) -> PlanGenerationResult:
+        """
+        Rebuilds the result of a worker process against a problem of this process.
+        The problem is only looked up, or created for lazy generators, when there is a plan to attach to it.
+
+        Arguments:
+            environment (Environment): Environment describing the problem that was solved.
+            index (int): Index of the problem.
+            status (PlanGenerationResultStatus): Status of the result.
+            actions (list[tuple[str, list[str]]]): The plan as (action name, parameter names) pairs, or None.
+            engine_name (str): Name of the engine that solved the problem.
+            metrics (dict): Metrics of the result.
+
+        Returns:
+            PlanGenerationResult: The result.
+        """
+
+        plan = None
+        if actions is not None:
+            problem = self._problem_of(environment, index)
+            objects = {obj.name: obj for obj in problem.all_objects}
+            plan = SequentialPlan([
+                ActionInstance(problem.action(name), [objects[parameter] for parameter in parameters])
+                for name, parameters in actions
+            ])
+        return PlanGenerationResult(status, plan, engine_name, metrics)
+
+    def _solve_isolated(self, limits: ResourceLimits, environment: Environment, index: int) -> PlanGenerationResult:
+        """
+        Solves a problem in a child process under resource limits.
+
+        Arguments:
+            limits (ResourceLimits): Wall-clock and memory limits of the solve.
+            environment (Environment): Environment describing the problem.
+            index (int): Index of the problem.
+
+        Returns:
+            PlanGenerationResult: The result, with a TIMEOUT, MEMOUT or INTERNAL_ERROR status when the solve did not
+            finish, and the peak memory in bytes as its peak_memory metric.
+        """
+
+        outcome = run_isolated(self._solve_in_worker, limits, environment.to_grid(), index)
+        if outcome.status != ISOLATED_SOLVED:
+            print(f"Problem {index} {outcome.status} after {outcome.seconds:.2f} s")
+            metrics = {"solve_time": str(outcome.seconds), "peak_memory": str(outcome.peak_memory)}
+            return PlanGenerationResult(_ISOLATION_STATUSES[outcome.status], None, "isolated", metrics)
+
+        status, actions, engine_name, metrics = outcome.value
+        metrics = {**metrics, "peak_memory": str(outcome.peak_memory)}
+        return self._rebuild_result(environment, index, status, actions, engine_name, metrics)
+
+    def _iter_solutions(self,
+                        workers: int,
+                        solver: str = None,
+                        limits: ResourceLimits = None) -> Iterator[PlanGenerationResult]:
+        """
+        Solves every problem in order, on a process pool when more than one worker is requested.
+
+        Arguments:
+            workers (int): Number of worker processes, native searches always run in this process.
+            solver (str, optional): Name of a native search in SEARCHES, defaults to the classical planner.
+            limits (ResourceLimits, optional): Limits of every classical solve, which then runs in its own child
+                process, one at a time.
+
+        Returns:
+            Iterator[PlanGenerationResult]: The results in the order of the problems.
+        """
+
+        if solver is not None:
+            for environment, problem in self.iter_problems():
+                yield self._solve_natively(solver, environment, problem)
+            return
+
+        # The child processes create the problems, this process only does so to attach their plans.
+        if limits is not None:
+            for i, environment in enumerate(self._all_environments()):
+                yield self._solve_isolated(limits, environment, i)
+            return
+
+        if workers <= 1:
+            planners = _PlannerCache()
+            try:
+                for _, problem in self.iter_problems():
+                    yield self._solve_problem(planners, problem)
+            finally:
+                planners.close()
+            return
+
+        # Workers create each problem from its environment, the environments in flight are kept to rebuild the plans.
+        environments = deque()
+
+        def items():
+            for i, environment in enumerate(self._all_environments()):
+                environment = environment.to_grid()
+                environments.append((environment, i))
+                yield environment, i
+
+        for solution in _ordered_map(self._solve_in_worker, items(), workers):
+            yield self._rebuild_result(*environments.popleft(), *solution)
+
+    @non_negative_and_non_zero(non_negative_only=("timeout", "memory_limit"))
+    @spanned("solve_each", "solver")
+    def solve_each(self, workers: int = None, solver: str = None, timeout: float = None, memory_limit: int = None) \
+            -> list:
         """
         Solves each problem individually using classical planning.
+        A planner is kept open per problem kind instead of being selected and started for every problem.
+        Maze problems can instead be solved by a native search of their grid, which needs no planner.
+
+        With a timeout or memory limit, every problem is solved in its own child process, which is killed with the
+        planners it started once it exceeds a limit.
+
+        Arguments:
+            workers (int, optional): Number of worker processes, defaults to the workers option of the generator.
+            solver (str, optional): Name of a native search in SEARCHES ("bfs", "astar" or "bidirectional"),
+                defaults to the classical planner.
+            timeout (float, optional): Seconds allowed per problem.
+            memory_limit (int, optional): Bytes of memory allowed per problem.
 
         Returns:
-            list: A list containing information about the results of solving each problem.
+            list: The result of every problem in the order of the problems, including problems that were not solved or
+            exceeded a limit, each result has the solve time in seconds as its solve_time metric.
         """
 
         results = []
-        for i, problem in enumerate(self._problems):
+        limits = None if timeout is None and memory_limit is None else ResourceLimits(timeout, memory_limit)
+        solutions = self._iter_solutions(self._workers if workers is None else workers, solver, limits)
+        for i, result in enumerate(solutions):
             print(f"Plan {i + 1}:")
+            print(f"Status: {result.status}")
 
-            with OneshotPlanner(problem_kind=problem.kind) as planner:
-                result = planner.solve(problem)
-                print(f"Status: {result.status}")
-
-                if result.status == up.engines.PlanGenerationResultStatus.SOLVED_SATISFICING:
-                    print(f"Found plan with {len(result.plan.actions)} steps!")
-                    for j, action in enumerate(result.plan.actions):
-                        print(f"{j}: {action}")
-                    results.append(result)
+            if result.status in (PlanGenerationResultStatus.SOLVED_SATISFICING,
+                                 PlanGenerationResultStatus.SOLVED_OPTIMALLY):
+                print(f"Found plan with {len(result.plan.actions)} steps!")
+                for j, action in enumerate(result.plan.actions):
+                    print(f"{j}: {action}")
 
-                else:
-                    print("Unable to find a plan.")
+            else:
+                print("Unable to find a plan.")
 
+            results.append(result)
             print("")
 
         return results
 
-    def solve_all(self, program_lines=10) -> list[PlanGenerationResultStatus]:
-        """Solves all problems at once using generalised planning
+    def _plan_validator(self, environment: Environment) -> PlanValidator:
+        """
+        Creates the validator simulating plans of a problem on its environment.
+
+        Arguments:
+            environment (Environment): Grid environment describing the problem.
 
         Returns:
-            list[PlanGenerationResultStatus]: A list containing information about the results of solving each problem.
+            PlanValidator: The validator of the problem.
         """
 
-        with up.environment.get_environment().factory.FewshotPlanner(name="bfgp") as planner:
+        raise NotImplementedError(f"{type(self).__name__} has no plan validator")
+
+    @spanned("validate_plans")
+    def validate_plans(self, plans, environments=None) -> list[ValidationReport]:
+        """
+        Validates a batch of plans by simulating each on the environment of its problem.
+
+        Arguments:
+            plans (Iterable): One plan per problem, in order. Plans are SequentialPlan instances, sequences of
+                (action name, parameter names) pairs, PlanGenerationResults or None for unsolved problems.
+            environments (Iterable[Environment], optional): Environments to validate against instead of the problems
+                of the generator, e.g. instances that were not used for synthesis.
+
+        Returns:
+            list[ValidationReport]: The outcome for every plan, with the first failing step of invalid plans.
+        """
+
+        if environments is None:
+            environments = self._all_environments()
+
+        reports = []
+        for environment, plan in zip(environments, plans, strict=True):
+            if isinstance(plan, PlanGenerationResult):
+                plan = plan.plan
+            reports.append(self._plan_validator(environment.to_grid()).validate(plan))
+        return reports
+
+    def _program_fields(self, program_lines: int) -> dict:
+        """
+        Returns the values determining which programs synthesis can produce, which address them in the program cache.
+
+        Arguments:
+            program_lines (int): Maximum number of program lines.
+
+        Returns:
+            dict: The domain file digest, program lines and theory.
+        """
+
+        return {
+            "domain": domain_digest(f"domains/{self._domain}.pddl"),
+            "program_lines": program_lines,
+            "theory": PROGRAM_THEORY,
+        }
+
+    def _solves_every_problem(self, program: GeneralisedProgram, environments: list[Environment] = None) -> bool:
+        return all(execution.status == SOLVED for execution in self.run_program(program, environments))
+
+    def _synthesise(self,
+                    problems: list[Problem],
+                    program_lines: int,
+                    directory: str = None,
+                    limits: ResourceLimits = None) \
+            -> tuple[list[PlanGenerationResultStatus], Union[GeneralisedProgram, None]]:
+        """
+        Synthesises a generalised program solving a set of problems with BFGP++.
+
+        Arguments:
+            problems (list[Problem]): The training problems.
+            program_lines (int): Maximum number of program lines.
+            directory (str, optional): Directory BFGP++ writes its files to, defaults to the plan directory.
+            limits (ResourceLimits, optional): Limits of the synthesis, which then runs in a child process.
+
+        Returns:
+            tuple[list[PlanGenerationResultStatus], Union[GeneralisedProgram, None]]: The result of every training
+            problem, and the program or None if synthesis found none.
+        """
+
+        if limits is not None:
+            outcome = run_isolated(self._synthesise, limits, problems, program_lines, directory)
+            if outcome.status == ISOLATED_SOLVED:
+                return outcome.value
+            print(f"Synthesis {outcome.status} after {outcome.seconds:.2f} s")
+            return [_ISOLATION_STATUSES[outcome.status]] * len(problems), None
+
+        # The synthesised program is written to the plan directory so it can be run natively afterwards.
+        directory = self._plan_directory if directory is None else directory
+        os.makedirs(directory, exist_ok=True)
+        program_path = os.path.join(directory, PROGRAM_FILE)
+        if os.path.isfile(program_path):
+            os.remove(program_path)
+
+        with span("synthesise", program_lines=program_lines, problems=len(problems)), \
+                up.environment.get_environment().factory.FewshotPlanner(name="bfgp") as planner:
             planner.set_arguments(
-                program_lines=program_lines if self._program_lines == 10 else self._program_lines,
-                theory="cpp",
-                # translated_problem_dir=self._plan_directory + "/"
+                program_lines=program_lines,
+                theory=PROGRAM_THEORY,
+                translated_problem_dir=directory + "/"
+            )
+            results = planner.solve(problems, output_stream=None)
+
+        program = GeneralisedProgram.from_file(program_path) if os.path.isfile(program_path) else None
+        return results, program
+
+    def _synthesise_incrementally(self,
+                                  pairs: list[tuple[Environment, Problem]],
+                                  program_lines: int,
+                                  seed_size: int,
+                                  counterexamples: int,
+                                  max_rounds: Union[int, None],
+                                  limits: ResourceLimits = None) \
+            -> tuple[Union[GeneralisedProgram, None], list, int, int]:
+        """
+        Synthesises a program on a small training set, growing it with problems the program fails on.
+
+        Arguments:
+            pairs (list[tuple[Environment, Problem]]): Environments and problems of every instance.
+            program_lines (int): Maximum number of program lines.
+            seed_size (int): Number of instances in the first training set.
+            counterexamples (int): Number of failing instances added to the training set per round.
+            max_rounds (Union[int, None]): Number of synthesis rounds before giving up, None never gives up.
+            limits (ResourceLimits, optional): Limits of every synthesis round.
+
+        Returns:
+            tuple[Union[GeneralisedProgram, None], list, int, int]: The last program or None if synthesis failed, its
+            execution on every instance, the number of rounds and the size of the last training set.
+        """
+
+        training = list(range(min(seed_size, len(pairs))))
+        environments = [environment for environment, _ in pairs]
+        rounds = 0
+        while True:
+            rounds += 1
+            _, program = self._synthesise([pairs[i][1] for i in training], program_lines, limits=limits)
+            if program is None:
+                return None, [], rounds, len(training)
+
+            executions = self.run_program(program, environments=environments)
+            failing = [i for i, execution in enumerate(executions) if execution.status != SOLVED]
+            print(f"Round {rounds}: trained on {len(training)} problems, {len(failing)} problems failing")
+
+            # Training problems the program still fails on would be added again without changing the next round.
+            counterexample_indices = [i for i in failing if i not in training][:counterexamples]
+            if not counterexample_indices or (max_rounds is not None and rounds == max_rounds):
+                break
+            training.extend(counterexample_indices)
+        return program, executions, rounds, len(training)
+
+    @spanned("solve_all", "incremental")
+    def solve_all(self,
+                  program_lines=10,
+                  incremental: bool = False,
+                  seed_size: int = 2,
+                  counterexamples: int = 1,
+                  max_rounds: int = None,
+                  timeout: float = None,
+                  memory_limit: int = None) -> list[PlanGenerationResultStatus]:
+        """Solves all problems at once using generalised planning.
+        With a program cache, a cached program solving every problem is reused instead of running synthesis.
+
+        Incremental synthesis trains on a few problems, runs the program on all of them and adds problems it fails
+        on to the training set until the program solves every problem, as synthesis slows down steeply with the
+        number of training problems.
+
+        Arguments:
+            program_lines (int): Maximum number of program lines, overridden by the program_lines option.
+            incremental (bool): Whether to grow the training set from failing problems instead of training on all.
+            seed_size (int): Number of problems in the first training set of incremental synthesis.
+            counterexamples (int): Number of failing problems added to the training set per round.
+            max_rounds (int, optional): Number of incremental synthesis rounds before giving up.
+            timeout (float, optional): Seconds allowed per synthesis run, which then runs in a child process that is
+                killed with BFGP++ once it exceeds a limit.
+            memory_limit (int, optional): Bytes of memory allowed per synthesis run.
+
+        Returns:
+            list[PlanGenerationResultStatus]: A list containing information about the results of solving each problem.
+        """
+
+        program_lines = program_lines if self._program_lines == 10 else self._program_lines
+        limits = None if timeout is None and memory_limit is None else ResourceLimits(timeout, memory_limit)
+        start = time.perf_counter()
+
+        if self._program_cache is not None:
+            # The environments are produced once, so the fingerprint, the validation of a cached program and
+            # synthesis all see the same problems, even those of unseeded lazy generators.
+            environments = list(self._all_environments())
+            fields = self._program_fields(program_lines)
+            fingerprint = training_fingerprint(text for _, text in self._iter_problem_texts(self._workers,
+                                                                                            environments))
+            program = self._program_cache.lookup(fields, fingerprint,
+                                                 partial(self._solves_every_problem, environments=environments))
+            if program is not None:
+                print("Reused a cached program that solves every problem")
+                os.makedirs(self._plan_directory, exist_ok=True)
+                with open(os.path.join(self._plan_directory, PROGRAM_FILE), "w") as file:
+                    file.write(program.text)
+                self._program = program
+                self._synthesis_report = SynthesisReport(0, 0, self._problem_count, time.perf_counter() - start, True,
+                                                         program_lines)
+                return [PlanGenerationResultStatus.SOLVED_SATISFICING] * self._problem_count
+
+        # Generalised planning needs every problem at once, so lazy generators are materialised here.
+        pairs = list(self.iter_problems())
+        if incremental:
+            self._program, executions, rounds, training_size = self._synthesise_incrementally(
+                pairs, program_lines, seed_size, counterexamples, max_rounds, limits
             )
+            results = [
+                PlanGenerationResultStatus.SOLVED_SATISFICING if execution.status == SOLVED
+                else PlanGenerationResultStatus.UNSOLVABLE_INCOMPLETELY
+                for execution in executions
+            ] or [PlanGenerationResultStatus.UNSOLVABLE_INCOMPLETELY] * len(pairs)
+        else:
+            results, self._program = self._synthesise([problem for _, problem in pairs], program_lines, limits=limits)
+            rounds, training_size = 1, len(pairs)
+
+        solved = all(r == PlanGenerationResultStatus.SOLVED_SATISFICING for r in results)
+        if solved:
+            print("Plan found successfully")
+        self._synthesis_report = SynthesisReport(rounds, training_size, len(pairs), time.perf_counter() - start, solved,
+                                                 program_lines)
+
+        if self._program_cache is not None and self._program is not None and solved:
+            self._program_cache.store(fields, fingerprint, self._program)
+        return results
 
-            results = planner.solve(self._problems, output_stream=None)
-            if all(r == PlanGenerationResultStatus.SOLVED_SATISFICING for r in results):
-                print("Plan found successfully")
+    def _synthesise_in_worker(self, environments: list[Environment], program_lines: int, directory: str,
+                              memory_limit: Union[int, None], connection):
+        """
+        Synthesises a program in a worker process and sends back the status of the run and the program text, or None
+        if none was found. The worker leads its own process group, so cancelling it also stops the processes BFGP++ starts.
+
+        Arguments:
+            environments (list[Environment]): Environments of the training problems.
+            program_lines (int): Maximum number of program lines.
+            directory (str): Directory BFGP++ writes its files to, separate for every worker.
+            memory_limit (int, optional): Address space limit in bytes, which also applies to BFGP++.
+            connection (Connection): Sending end of a pipe to the parent process.
+        """
+
+        os.setsid()
+        if memory_limit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        try:
+            problems = [self._create_problem(environment, i) for i, environment in enumerate(environments)]
+            _, program = self._synthesise(problems, program_lines, directory)
+            connection.send((SYNTHESIS_FAILED, None) if program is None else (SOLVED, program.text))
+        except MemoryError:
+            connection.send((OUT_OF_MEMORY, None))
+        connection.close()
+
+    @staticmethod
+    def _cancel(process: multiprocessing.Process) -> None:
+
+        # Before the worker starts its own process group, only the worker itself can be killed.
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            process.kill()
+        process.join()
+
+    @non_negative_and_non_zero(non_negative_only=("timeout", "memory_limit"))
+    @spanned("search_program_lines")
+    def search_program_lines(self,
+                             sizes: Iterable[int] = None,
+                             workers: int = None,
+                             timeout: float = None,
+                             memory_limit: int = None) -> list[PlanGenerationResultStatus]:
+        """
+        Solves all problems at once using generalised planning, searching for the smallest number of program lines
+        that synthesis succeeds with. Every size is synthesised in its own process, smallest sizes first, and once a
+        size succeeds the runs of larger sizes are cancelled as their programs could only be larger. Runs exceeding
+        the timeout or memory limit are cancelled with the processes BFGP++ started.
+
+        Arguments:
+            sizes (Iterable[int], optional): Numbers of program lines to try, defaults to 4 up to the program_lines
+                option in steps of 2.
+            workers (int, optional): Number of concurrent synthesis processes, defaults to the workers option.
+            timeout (float, optional): Seconds allowed per synthesis run.
+            memory_limit (int, optional): Bytes of memory allowed per synthesis run.
+
+        Returns:
+            list[PlanGenerationResultStatus]: A list containing information about the results of solving each problem.
+            The per-size statuses and timings are kept in the synthesis report.
+        """
+
+        start = time.perf_counter()
+        sizes = sorted(set(range(4, self._program_lines + 1, 2) if sizes is None else sizes))
+        if not sizes:
+            raise ValueError("sizes in search_program_lines should not be empty, program_lines should be at least 4")
+        workers = max(1, self._workers if workers is None else workers)
+
+        # The environments are produced once, so the fingerprint, the validation of a cached program and synthesis
+        # all see the same problems, even those of unseeded lazy generators.
+        environments = list(self._all_environments())
+
+        # Cached programs of the smallest size solving every problem are reused without any synthesis.
+        if self._program_cache is not None:
+            fingerprint = training_fingerprint(text for _, text in self._iter_problem_texts(self._workers,
+                                                                                            environments))
+            validate = partial(self._solves_every_problem, environments=environments)
+            for program_lines in sizes:
+                program = self._program_cache.lookup(self._program_fields(program_lines), fingerprint, validate)
+                if program is not None:
+                    print(f"Reused a cached program of {program_lines} lines that solves every problem")
+                    self._program = program
+                    self._synthesis_report = SynthesisReport(0, 0, self._problem_count,
+                                                             time.perf_counter() - start, True, program_lines)
+                    return [PlanGenerationResultStatus.SOLVED_SATISFICING] * self._problem_count
+
+        pending = deque(sizes)
+        running = {}
+        timings = {}
+        runs = 0
+        best, best_text = None, None
+        try:
+            while pending or running:
+                while pending and len(running) < workers:
+                    program_lines = pending.popleft()
+                    if best is not None and program_lines > best:
+                        timings[program_lines] = {"status": SYNTHESIS_CANCELLED, "seconds": 0.0}
+                        continue
+                    receiver, sender = multiprocessing.Pipe(duplex=False)
+                    directory = os.path.join(self._plan_directory, f"lines_{program_lines}")
+                    process = multiprocessing.Process(target=self._synthesise_in_worker,
+                                                      args=(environments, program_lines, directory, memory_limit,
+                                                            sender))
+                    process.start()
+                    sender.close()
+                    runs += 1
+                    running[program_lines] = process, receiver, time.perf_counter()
+
+                # A worker that exits without sending a program crashed. With limits, running workers are checked
+                # at every poll interval.
+                ready = multiprocessing.connection.wait(
+                    [receiver for _, receiver, _ in running.values()] + [p.sentinel for p, _, _ in running.values()],
+                    None if timeout is None and memory_limit is None else POLL_INTERVAL
+                )
+                for program_lines, (process, receiver, started) in list(running.items()):
+                    if receiver not in ready and process.sentinel not in ready:
+                        if timeout is not None and time.perf_counter() - started >= timeout:
+                            status = TIMEOUT
+                        elif memory_limit is not None and group_memory(process.pid) > memory_limit:
+                            status = OUT_OF_MEMORY
+                        else:
+                            continue
+                        self._cancel(process)
+                        process.join()
+                        receiver.close()
+                        del running[program_lines]
+                        timings[program_lines] = {"status": status, "seconds": time.perf_counter() - started}
+                        print(f"{program_lines} program lines: {status} in {timings[program_lines]['seconds']:.2f} s")
+                        continue
+                    try:
+                        status, text = receiver.recv()
+                    except EOFError:
+                        text, status = None, SYNTHESIS_CRASHED
+                    process.join()
+                    receiver.close()
+                    del running[program_lines]
+                    timings[program_lines] = {"status": status, "seconds": time.perf_counter() - started}
+                    print(f"{program_lines} program lines: {status} in {timings[program_lines]['seconds']:.2f} s")
+
+                    if text is not None and (best is None or program_lines < best):
+                        best, best_text = program_lines, text
+                        for dominated in [lines for lines in running if lines > best]:
+                            dominated_process, dominated_receiver, dominated_start = running.pop(dominated)
+                            self._cancel(dominated_process)
+                            dominated_receiver.close()
+                            timings[dominated] = {"status": SYNTHESIS_CANCELLED,
+                                                  "seconds": time.perf_counter() - dominated_start}
+        finally:
+            for process, receiver, _ in running.values():
+                self._cancel(process)
+                receiver.close()
+
+        self._program = None if best_text is None else GeneralisedProgram(best_text)
+        if self._program is not None:
+            os.makedirs(self._plan_directory, exist_ok=True)
+            with open(os.path.join(self._plan_directory, PROGRAM_FILE), "w") as file:
+                file.write(best_text)
+            print(f"Plan found successfully with {best} program lines")
+            if self._program_cache is not None:
+                self._program_cache.store(self._program_fields(best), fingerprint, self._program)
+
+        self._synthesis_report = SynthesisReport(runs, len(environments), len(environments),
+                                                 time.perf_counter() - start, self._program is not None, best,
+                                                 dict(sorted(timings.items())))
+        status = PlanGenerationResultStatus.SOLVED_SATISFICING if self._program is not None \
+            else PlanGenerationResultStatus.UNSOLVABLE_INCOMPLETELY
+        return [status] * len(environments)
+
+    @property
+    def synthesis_report(self) -> Union[SynthesisReport, None]:
+        """How the program of the last call to solve_all was obtained, or None if solve_all was not called."""
+
+        return self._synthesis_report
+
+    @property
+    def program_cache(self) -> Union[ProgramCache, None]:
+        """The cache of synthesised programs, or None if the generator has none."""
+
+        return self._program_cache
+
+    @property
+    def program(self) -> Union[GeneralisedProgram, None]:
+        """The program synthesised by the last call to solve_all, or None if no program was found."""
+
+        return self._program
+
+    def run_program(self, program=None, environments=None, max_steps: int = 10 ** 6) -> list[ProgramExecution]:
+        """
+        Runs a generalised program natively on a batch of problems, producing a concrete plan for each.
+
+        Arguments:
+            program (Union[str, GeneralisedProgram], optional): The program or the path of a BFGP++ program file,
+                defaults to the program synthesised by solve_all.
+            environments (Iterable[Environment], optional): Environments to run on instead of the problems of the
+                generator, e.g. instances that were not used for synthesis.
+            max_steps (int): Number of instructions executed per problem before its run is stopped.
+
+        Returns:
+            list[ProgramExecution]: The outcome for every problem, in order, with the plan of applied actions.
+        """
 
-            return results
+        if program is None:
+            if self._program is None:
+                raise ValueError("No program given and solve_all has not synthesised one")
+            program = self._program
+        program = load_program(program)
+
+        if environments is None:
+            environments = self._all_environments()
+        validators = (self._plan_validator(environment.to_grid()) for environment in environments)
+        with span("run_program"):
+            return program.run_batch(validators, max_steps)
 
 
 class _MazeProblemGenerator(ProblemGenerator):
@@ -284,12 +1376,22 @@ class _MazeProblemGenerator(ProblemGenerator):
         Arguments:
             domain_path (str): Path to the domain.
             **options: Additional options for problem generation.
+                maze_strategy (Union[str, MazeGenerationStrategy]): Strategy used for automatic generation,
+                either an instance or a name in MAZE_STRATEGIES. Defaults to "dfs_backtracker", whose run time is
+                linear in the grid area, unlike the unbounded "random_walk".
         """
 
+        self._maze_strategy = get_maze_strategy(options.get("maze_strategy", "dfs_backtracker"))
         super().__init__(domain_path, **options)
 
-    @staticmethod
-    def _change_special_tile(screen: pygame.Surface,
+    def _corpus_fields(self) -> dict:
+        fields = super()._corpus_fields()
+        strategy = self._maze_strategy
+        fields["strategy"] = f"{type(strategy).__name__}{sorted(vars(strategy).items())}"
+        return fields
+
+    def _change_special_tile(self,
+                             screen: pygame.Surface,
                              special_tile: Tile,
                              conflict_tile: Tile,
                              new_tile: Tile,
@@ -310,7 +1412,7 @@ class _MazeProblemGenerator(ProblemGenerator):
 
         # If the special tile is already on the maze
         if special_tile is not None:
-            old_special_tile = special_tile.get_rect()
+            old_special_tile = special_tile.get_rect(self._geometry)
             pygame.draw.rect(screen, FILLED_TILE, old_special_tile)
             special_tile.set_position(tile=new_tile)
         else:
@@ -322,7 +1424,7 @@ class _MazeProblemGenerator(ProblemGenerator):
                 conflict_tile = None
 
         # Draw the new tile
-        pygame.draw.rect(screen, colour, new_tile.get_rect())
+        pygame.draw.rect(screen, colour, new_tile.get_rect(self._geometry))
         return special_tile, conflict_tile
 
     def _generate_environment_manual(self) -> MazeEnvironment:
@@ -341,7 +1443,7 @@ class _MazeProblemGenerator(ProblemGenerator):
         maze_generated = False
 
         # Maze set-up.
-        maze = TileCollection()
+        maze = TileCollection(geometry=self._geometry)
         goal = None
         start = None
 
@@ -361,13 +1463,13 @@ class _MazeProblemGenerator(ProblemGenerator):
                 if event.type == pygame.MOUSEBUTTONDOWN:
 
                     # Tile at cursor position
-                    current_tile = Tile(pygame_position=pygame.mouse.get_pos())
+                    current_tile = Tile(self._geometry, pygame_position=pygame.mouse.get_pos())
 
                     # Left click modifies visibility of a tile on the screen.
                     if pygame.mouse.get_pressed()[0]:
                         if current_tile not in maze:
                             maze.append(current_tile)
-                            pygame.draw.rect(screen, FILLED_TILE, current_tile.get_rect())
+                            pygame.draw.rect(screen, FILLED_TILE, current_tile.get_rect(self._geometry))
                         else:
                             maze.remove(current_tile)
                             if start is not None:
@@ -376,7 +1478,7 @@ class _MazeProblemGenerator(ProblemGenerator):
                             if goal is not None:
                                 if current_tile == goal:
                                     goal = None
-                            pygame.draw.rect(screen, BACKGROUND, current_tile.get_rect())
+                            pygame.draw.rect(screen, BACKGROUND, current_tile.get_rect(self._geometry))
 
                     # Right click add/changes the start/goal tile.
                     if pygame.mouse.get_pressed()[2]:
@@ -402,42 +1504,19 @@ class _MazeProblemGenerator(ProblemGenerator):
 
     def _generate_environment_auto(self) -> MazeEnvironment:
         """
-        Generates maze environment automatically.
+        Generates maze environment automatically using the selected maze strategy.
 
         Returns:
             MazeEnvironment: Generated maze environment.
         """
 
-        # Maze set-up.
-        maze = TileCollection()
-        screen = pygame.display.set_mode(self._screen_size)
-        screen.fill(BACKGROUND)
-        available_locations = [(x, y) for x in range(self._tile_size) for y in range(self._tile_size)]
-
-        # Selects the start and goal locations randomly.
-        start_location, goal_location = random.sample(available_locations, 2)
-        start = Tile(tile_position=start_location)
-        goal = Tile(tile_position=goal_location)
-        maze.extend([start, goal])
-        pygame.draw.rect(screen, START_TILE, start.get_rect())
-        pygame.draw.rect(screen, GOAL_TILE, goal.get_rect())
-        pygame.display.flip()
-
-        # Iteratively chooses a random neighbour until a path has been created.
-        current_tile = start
-        while True:
-            current_tile = Tile(tile_position=random.choice(current_tile.get_neighbours()))
-            if current_tile == goal:
-                break
-            if current_tile not in maze:
-                maze.append(current_tile)
-                pygame.draw.rect(screen, FILLED_TILE, current_tile.get_rect())
-                pygame.display.flip()
-
-        self._save_pygame_environment(screen)
-        pygame.quit()
+        return self._maze_strategy.generate(self._geometry, self._rng)
 
-        return MazeEnvironment(maze, start, goal)
+    def _draw_environment(self, screen: pygame.Surface, maze: MazeGridEnvironment) -> None:
+        for position in maze.grid.positions().tolist():
+            pygame.draw.rect(screen, FILLED_TILE, self._geometry.rect(position))
+        pygame.draw.rect(screen, START_TILE, self._geometry.rect(maze.start))
+        pygame.draw.rect(screen, GOAL_TILE, self._geometry.rect(maze.goal))
 
 
 class BlocklyMazeProblemGenerator(_MazeProblemGenerator):
@@ -453,57 +1532,144 @@ class BlocklyMazeProblemGenerator(_MazeProblemGenerator):
 
     def _setup_problem(self, maze: MazeEnvironment) -> None:
 
+        maze = maze.to_grid()
+
         # Create objects
         x_objects = [Object(f"x{i}", self._problem.user_type(POSITION)) for i in range(self._tile_size)]
         y_objects = [Object(f"y{i}", self._problem.user_type(POSITION)) for i in range(self._tile_size)]
         direction_objects = [Object(direction, self._problem.user_type("direction")) for direction in DIRECTIONS]
-        self._problem.add_objects(x_objects + y_objects + direction_objects)
+        self._initial_state.add_objects(x_objects + y_objects + direction_objects)
 
         # Set initial value for fluents
         # inc(?a ?b) from x0->x9, y0->y9 := true
-        for i in range(1, self._tile_size):
-            self._problem.set_initial_value(self._problem.fluent(INC)(x_objects[i - 1], x_objects[i]), True)
-            self._problem.set_initial_value(self._problem.fluent(INC)(y_objects[i - 1], y_objects[i]), True)
+        self._initial_state.add_facts(INC, (
+            pair for i in range(1, self._tile_size)
+            for pair in ((x_objects[i - 1], x_objects[i]), (y_objects[i - 1], y_objects[i]))
+        ))
 
         # dec(?a ?b) from x9->x0 y9->y0 := true
-        for i in range(1, self._tile_size):
-            self._problem.set_initial_value(self._problem.fluent(DEC)(x_objects[i], x_objects[i - 1]), True)
-            self._problem.set_initial_value(self._problem.fluent(DEC)(y_objects[i], y_objects[i - 1]), True)
+        self._initial_state.add_facts(DEC, (
+            pair for i in range(1, self._tile_size)
+            for pair in ((x_objects[i], x_objects[i - 1]), (y_objects[i], y_objects[i - 1]))
+        ))
 
-        # path(?x ?y) for all tiles in maze := true
-        for tile in maze.tiles:
-            x, y = tile.get_position()
-            self._problem.set_initial_value(self._problem.fluent(PATH)(x_objects[x], y_objects[y]), True)
+        # path(?x ?y) for all tiles in maze := true, x and y objects share indices with the coordinates
+        positions = maze.tile_positions()
+        self._initial_state.add_indexed_facts(PATH, x_objects + y_objects, positions + (0, self._tile_size))
 
         # is-{d}(?d) for all directions := true
         for i in range(len(DIRECTIONS)):
-            self._problem.set_initial_value(self._problem.fluent(DIRECTION_CONDITIONS[i])(direction_objects[i]), True)
+            self._initial_state.add_facts(DIRECTION_CONDITIONS[i], [(direction_objects[i],)])
 
         # right-rot(?d ?dn) for all directions, where dn is the direction to the right := true
-        for i in range(len(DIRECTIONS)):
-            self._problem.set_initial_value(self._problem.fluent(RIGHT_ROT)(
-                direction_objects[i],
-                direction_objects[i + 1 if i + 1 < len(DIRECTIONS) else 0]
-            ), True)
+        self._initial_state.add_facts(RIGHT_ROT, (
+            (direction_objects[i], direction_objects[i + 1 if i + 1 < len(DIRECTIONS) else 0])
+            for i in range(len(DIRECTIONS))
+        ))
 
         # left-rot(?d ?dn) for all directions, where dn is the direction to the left := true
-        for i in range(len(DIRECTIONS)):
-            self._problem.set_initial_value(self._problem.fluent(LEFT_ROT)(
-                direction_objects[i],
-                direction_objects[i - 1 if i - 1 >= 0 else len(DIRECTIONS) - 1]
-            ), True)
+        self._initial_state.add_facts(LEFT_ROT, (
+            (direction_objects[i], direction_objects[i - 1 if i - 1 >= 0 else len(DIRECTIONS) - 1])
+            for i in range(len(DIRECTIONS))
+        ))
 
         # facing(?d) ?d = north := true
         self._problem.set_initial_value(self._problem.fluent(FACING)(direction_objects[0]), True)
 
         # start: at(?s_x ?s_y) := true
-        s_x, s_y = maze.start.get_position()
+        s_x, s_y = maze.start
         self._problem.set_initial_value(self._problem.fluent(AT)(x_objects[s_x], y_objects[s_y]), True)
 
         # goal: at(g_x g_y)
-        g_x, g_y = maze.goal.get_position()
+        g_x, g_y = maze.goal
         self._problem.add_goal(self._problem.fluent(AT)(x_objects[g_x], y_objects[g_y]))
 
+    def _serialize_problem(self, maze: MazeGridEnvironment, index: int) -> tuple[str, str]:
+        name = f"{self._domain}{index}"
+        x_names = [f"x{i}" for i in range(self._tile_size)]
+        y_names = [f"y{i}" for i in range(self._tile_size)]
+        turns = len(DIRECTIONS)
+
+        # Facts in the order _setup_problem sets them.
+        init = [
+            f"({INC} {names[i - 1]} {names[i]})" for i in range(1, self._tile_size) for names in (x_names, y_names)
+        ]
+        init += [
+            f"({DEC} {names[i]} {names[i - 1]})" for i in range(1, self._tile_size) for names in (x_names, y_names)
+        ]
+        init += [f"({PATH} {x_names[x]} {y_names[y]})" for x, y in maze.tile_positions().tolist()]
+        init += [f"({condition} {direction})" for condition, direction in zip(DIRECTION_CONDITIONS, DIRECTIONS)]
+        init += [f"({RIGHT_ROT} {DIRECTIONS[i]} {DIRECTIONS[(i + 1) % turns]})" for i in range(turns)]
+        init += [f"({LEFT_ROT} {DIRECTIONS[i]} {DIRECTIONS[(i - 1) % turns]})" for i in range(turns)]
+        init.append(f"({FACING} {NORTH})")
+        init.append(f"({AT} {x_names[maze.start[0]]} {y_names[maze.start[1]]})")
+
+        objects = [(POSITION, x_names + y_names), ("direction", DIRECTIONS)]
+        goals = [f"({AT} {x_names[maze.goal[0]]} {y_names[maze.goal[1]]})"]
+        return name, format_problem(name, objects, init, goals)
+
+    def _native_plan(self, maze: MazeGridEnvironment, problem: Problem, search) -> Union[SequentialPlan, None]:
+
+        # A state is a tile and the direction faced, encoded as tile * 4 + direction with tiles indexing positions().
+        turns = len(DIRECTIONS)
+        positions = maze.grid.positions().tolist()
+        neighbours = maze.grid.neighbour_indices().tolist()
+        tiles = {tuple(position): i for i, position in enumerate(positions)}
+        goal_x, goal_y = maze.goal
+
+        def successors(state):
+            tile, direction = divmod(state, turns)
+            ahead = neighbours[tile][direction]
+            if ahead >= 0:
+                yield ahead * turns + direction
+            yield tile * turns + (direction + 1) % turns
+            yield tile * turns + (direction - 1) % turns
+
+        def predecessors(state):
+            tile, direction = divmod(state, turns)
+            behind = neighbours[tile][(direction + 2) % turns]
+            if behind >= 0:
+                yield behind * turns + direction
+            yield tile * turns + (direction + 1) % turns
+            yield tile * turns + (direction - 1) % turns
+
+        def heuristic(state):
+            x, y = positions[state // turns]
+            return abs(x - goal_x) + abs(y - goal_y)
+
+        # The agent starts facing north and may reach the goal facing any direction.
+        goal = tiles[maze.goal]
+        states = search(SearchProblem(
+            tiles[maze.start] * turns,
+            {goal * turns + direction for direction in range(turns)},
+            successors,
+            predecessors,
+            heuristic
+        ))
+        if states is None:
+            return None
+
+        objects = {obj.name: obj for obj in problem.all_objects}
+        actions = []
+        for state, next_state in zip(states, states[1:]):
+            tile, direction = divmod(state, turns)
+            next_tile, next_direction = divmod(next_state, turns)
+            if tile == next_tile:
+                turn = TURN_RIGHT if next_direction == (direction + 1) % turns else TURN_LEFT
+                parameters = (DIRECTIONS[direction], DIRECTIONS[next_direction])
+                actions.append(ActionInstance(problem.action(turn), [objects[name] for name in parameters]))
+                continue
+
+            (x, y), (xn, yn) = positions[tile], positions[next_tile]
+            parameters = (f"x{x}", f"y{y}", f"x{xn}", f"y{yn}", DIRECTIONS[direction])
+            actions.append(ActionInstance(
+                problem.action(MOVE_ACTIONS[direction]), [objects[name] for name in parameters]
+            ))
+        return SequentialPlan(actions)
+
+    def _plan_validator(self, maze: MazeGridEnvironment) -> PlanValidator:
+        return MazeValidator(maze.grid.cells, maze.start, maze.goal)
+
 
 class DirectionalProblemReducedMazeProblemGenerator(_MazeProblemGenerator):
     def __init__(self, **options):
@@ -517,74 +1683,134 @@ class DirectionalProblemReducedMazeProblemGenerator(_MazeProblemGenerator):
 
         super().__init__("reduced_maze", **options)
 
+    # Letters of the direction objects with the matching neighbour offsets, in the order neighbours are explored.
+    _CORRIDOR_DIRECTIONS = (("u", 0, -1), ("d", 0, 1), ("l", -1, 0), ("r", 1, 0))
+
     def _setup_problem(self, maze: MazeEnvironment) -> None:
 
-        self._maze = maze
+        maze = maze.to_grid()
 
-        # Counter to ensure no object name is repeated
-        self._counter = 0
-
-        # Object set-up
-        self._start_object = Object("start", self._problem.user_type(POSITION))
-        self._goal_object = Object("goal", self._problem.user_type(POSITION))
-        self._problem.add_object(self._start_object)
-        self._problem.add_object(self._goal_object)
-        self._problem.set_initial_value(self._problem.fluent(AT)(self._start_object), True)
-        self._problem.add_goal(self._problem.fluent(AT)(self._goal_object))
-        self._dfs(self._maze.start, self._start_object)
-
-    def _dfs(self, current_tile: Tile, current_object: Object):
-
-        # Ensure no tile is visited twice
-        self._add_mapping(current_tile, current_object)
-        current_position = current_tile.get_position()
-
-        # Mapping of potential neighbour positions to maze tiles
-        neighbour_map = {
-            f"u{self._counter}": self._maze.tiles.find_tile((current_position[0], current_position[1] - 1)),
-            f"d{self._counter}": self._maze.tiles.find_tile((current_position[0], current_position[1] + 1)),
-            f"l{self._counter}": self._maze.tiles.find_tile((current_position[0] - 1, current_position[1])),
-            f"r{self._counter}": self._maze.tiles.find_tile((current_position[0] + 1, current_position[1])),
-        }
+        # Object set-up, the first two objects are the start and the goal
+        names, paths, _ = self._encode_corridors(maze)
+        position_type = self._problem.user_type(POSITION)
+        objects = [Object(name, position_type) for name in names]
+        start_object, goal_object = objects[:2]
 
-        for direction, neighbour in neighbour_map.items():
+        self._initial_state.add_objects(objects)
+        self._problem.set_initial_value(self._problem.fluent(AT)(start_object), True)
+        self._problem.add_goal(self._problem.fluent(AT)(goal_object))
+        self._initial_state.add_indexed_facts(PATH, objects, paths)
+
+    def _serialize_problem(self, maze: MazeGridEnvironment, index: int) -> tuple[str, str]:
+        name = f"{self._domain}{index}"
+        names, paths, _ = self._encode_corridors(maze.to_grid())
+        names = [pddl_name(n) for n in names]
+
+        init = [f"({AT} {names[0]})"]
+        init += [f"({PATH} {names[a]} {names[b]})" for a, b in paths.tolist()]
+        return name, format_problem(name, [(POSITION, names)], init, [f"({AT} {names[1]})"])
+
+    def _native_plan(self, maze: MazeGridEnvironment, problem: Problem, search) -> Union[SequentialPlan, None]:
+
+        # States are the direction objects, connected by their path facts.
+        names, paths, coordinates = self._encode_corridors(maze)
+        successors = [[] for _ in names]
+        predecessors = [[] for _ in names]
+        for a, b in paths.tolist():
+            successors[a].append(b)
+            predecessors[b].append(a)
+        coordinates = coordinates.tolist()
+        goal_x, goal_y = maze.goal
+
+        def heuristic(state):
+            x, y = coordinates[state]
+            return abs(x - goal_x) + abs(y - goal_y)
+
+        states = search(SearchProblem(0, {1}, successors.__getitem__, predecessors.__getitem__, heuristic))
+        if states is None:
+            return None
+
+        objects = {obj.name: obj for obj in problem.all_objects}
+        move = problem.action(MOVE)
+        return SequentialPlan([
+            ActionInstance(move, [objects[names[a]], objects[names[b]]]) for a, b in zip(states, states[1:])
+        ])
+
+    def _plan_validator(self, maze: MazeGridEnvironment) -> PlanValidator:
+        names, paths, _ = self._encode_corridors(maze)
+        return ReducedMazeValidator(names, paths, 0, 1)
+
+    def _encode_corridors(self, maze: MazeGridEnvironment) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """
+        Creates the direction objects and paths of a maze with an explicit-stack depth-first search from the start.
+        A tile gets one object per direction it is entered from, named after the direction and a counter, so the
+        direction of travel can be inferred from the target object of every move.
 
-            # If there is an existing object for the neighbour with the same direction: re-use it.
-            if neighbour is not None:
-                existing_mapping = [
-                    obj for obj in self._get_mapping(neighbour)
-                    if obj.name[0] == direction[0] or obj == self._start_object or obj == self._goal_object
-                ]
-                if existing_mapping:
-                    self._problem.set_initial_value(
-                        self._problem.fluent(PATH)(current_object, existing_mapping[0]), True
-                    )
-                    continue
-
-                # Create object for neighbour tile
-                if neighbour == self._maze.start:
-                    neighbour_object = self._start_object
-                elif neighbour == self._maze.goal:
-                    neighbour_object = self._goal_object
-                else:
-                    neighbour_object = Object(direction, self._problem.user_type(POSITION))
-                    self._problem.add_object(neighbour_object)
-
-                # path(?x ?xn) to neighbour tile (xn) := true
-                self._problem.set_initial_value(
-                    self._problem.fluent(PATH)(current_object, neighbour_object), True
-                )
+        Arguments:
+            maze (MazeGridEnvironment): The maze to encode.
 
-                # Avoid repeating object names
-                self._counter += 1
-                self._dfs(neighbour, neighbour_object)
+        Returns:
+            tuple[list[str], np.ndarray, np.ndarray]: The object names, starting with the start and goal objects, an
+            (m, 2) array of path(?x ?xn) facts as indices into the names and an (n, 2) array of the tile of every object.
+        """
 
-    def _get_mapping(self, env_obj: Tile) -> list[Object]:
+        cells = maze.grid.cells
+        width, height = cells.shape
 
-        # Modified to ensure output is always a list
-        eo_hash = hash(env_obj)
-        mapping = self._obj_map.get(eo_hash, [])
-        return mapping
+        # Object index for every tile and entry direction, -1 if the tile has not been entered from that direction.
+        # The start and goal tiles have a single object, used for every direction.
+        direction_objects = np.full((width, height, len(self._CORRIDOR_DIRECTIONS)), -1, dtype=np.int32)
+        direction_objects[maze.start] = 0
+        objects = [START, GOAL]
+        coordinates = array("q", (*maze.start, *maze.goal))
+        paths = array("q")
+
+        # Counter to ensure no object name is repeated
+        counter = 0
+
+        # Every frame holds the tile, its object index, the counter when the tile was entered and the next direction.
+        stack = [[*maze.start, 0, counter, 0]]
+        while stack:
+            frame = stack[-1]
+            x, y, current, entered, direction = frame
+            if direction == len(self._CORRIDOR_DIRECTIONS):
+                stack.pop()
+                continue
+            frame[4] += 1
+
+            letter, dx, dy = self._CORRIDOR_DIRECTIONS[direction]
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height and cells[nx, ny]):
+                continue
+
+            # If there is an existing object for the neighbour with the same direction: re-use it.
+            existing = int(direction_objects[nx, ny, direction])
+            if existing >= 0:
+                paths.extend((current, existing))
+                continue
+
+            # Create object for neighbour tile
+            if (nx, ny) == maze.goal:
+                neighbour = 1
+                direction_objects[nx, ny] = neighbour
+            else:
+                neighbour = len(objects)
+                objects.append(f"{letter}{entered}")
+                coordinates.extend((nx, ny))
+                direction_objects[nx, ny, direction] = neighbour
+
+            # path(?x ?xn) to neighbour tile (xn) := true
+            paths.extend((current, neighbour))
+
+            # Avoid repeating object names
+            counter += 1
+            stack.append([nx, ny, neighbour, counter, 0])
+
+        return (
+            objects,
+            np.frombuffer(paths, dtype=np.int64).reshape(-1, 2),
+            np.frombuffer(coordinates, dtype=np.int64).reshape(-1, 2)
+        )
 
 
 class NonDirectionalProblemReducedMazeProblemGenerator(_MazeProblemGenerator):
@@ -601,27 +1827,64 @@ class NonDirectionalProblemReducedMazeProblemGenerator(_MazeProblemGenerator):
 
     def _setup_problem(self, maze: MazeEnvironment) -> None:
 
-        # Maps all tiles to PDDL objects.
-        for tile in maze.tiles:
-            position = tile.get_position()
-            tile_obj = Object(f"p{position[0]}-{position[1]}", self._problem.user_type(POSITION))
-            self._add_mapping(tile, tile_obj)
-            self._problem.add_object(tile_obj)
-
-        # Creates all required valid paths between tiles.
-        for tile in maze.tiles:
-            for neighbour in maze.tiles.find_neighbours(tile):
-                neighbour_object = self._get_mapping(neighbour)
-                current_object = self._get_mapping(tile)
-                self._problem.set_initial_value(self._problem.fluent(PATH)(neighbour_object, current_object), True)
-                self._problem.set_initial_value(self._problem.fluent(PATH)(current_object, neighbour_object), True)
-
-        start_object = self._get_mapping(maze.start)
-        goal_object = self._get_mapping(maze.goal)
+        maze = maze.to_grid()
+
+        # Maps all tiles to PDDL objects, in the order the maze was built.
+        positions = maze.tile_positions()
+        objects = {
+            (x, y): Object(f"p{x}-{y}", self._problem.user_type(POSITION)) for x, y in positions.tolist()
+        }
+        self._initial_state.add_objects(objects.values())
+
+        # Creates all required valid paths between tiles, edges are listed in both directions.
+        self._initial_state.add_indexed_facts(PATH, list(objects.values()), maze.grid.tile_edge_indices(positions))
+
+        start_object = objects[maze.start]
+        goal_object = objects[maze.goal]
 
         self._problem.set_initial_value(self._problem.fluent(AT)(start_object), True)
         self._problem.add_goal(self._problem.fluent(AT)(goal_object))
 
+    def _serialize_problem(self, maze: MazeGridEnvironment, index: int) -> tuple[str, str]:
+        name = f"{self._domain}{index}"
+        positions = maze.tile_positions()
+        names = [f"p{x}-{y}" for x, y in positions.tolist()]
+
+        init = [f"({PATH} {names[a]} {names[b]})" for a, b in maze.grid.tile_edge_indices(positions).tolist()]
+        init.append(f"({AT} p{maze.start[0]}-{maze.start[1]})")
+        goals = [f"({AT} p{maze.goal[0]}-{maze.goal[1]})"]
+        return name, format_problem(name, [(POSITION, names)], init, goals)
+
+    def _native_plan(self, maze: MazeGridEnvironment, problem: Problem, search) -> Union[SequentialPlan, None]:
+
+        # States are the tiles as indices into positions(), paths run both ways so the graph is undirected.
+        positions = maze.grid.positions().tolist()
+        neighbours = [[n for n in row if n >= 0] for row in maze.grid.neighbour_indices().tolist()]
+        tiles = {tuple(position): i for i, position in enumerate(positions)}
+        goal_x, goal_y = maze.goal
+
+        def heuristic(state):
+            x, y = positions[state]
+            return abs(x - goal_x) + abs(y - goal_y)
+
+        states = search(SearchProblem(
+            tiles[maze.start], {tiles[maze.goal]}, neighbours.__getitem__, neighbours.__getitem__, heuristic
+        ))
+        if states is None:
+            return None
+
+        objects = {obj.name: obj for obj in problem.all_objects}
+        move = problem.action(MOVE)
+        names = [objects[f"p{x}-{y}"] for x, y in (positions[state] for state in states)]
+        return SequentialPlan([ActionInstance(move, [a, b]) for a, b in zip(names, names[1:])])
+
+    def _plan_validator(self, maze: MazeGridEnvironment) -> PlanValidator:
+        positions = maze.tile_positions()
+        tiles = {tuple(position): i for i, position in enumerate(positions.tolist())}
+        names = [f"p{x}-{y}" for x, y in positions.tolist()]
+        paths = maze.grid.tile_edge_indices(positions)
+        return ReducedMazeValidator(names, paths, tiles[tuple(maze.start)], tiles[tuple(maze.goal)])
+
 
 class SnakeProblemGenerator(ProblemGenerator):
 
@@ -642,6 +1905,11 @@ class SnakeProblemGenerator(ProblemGenerator):
             raise ValueError(f"Too many apples! apples must be less than: {((self._tile_size ** 2) - 2)} for the "
                              f"selected tile size: {self._tile_size}")
 
+    def _corpus_fields(self) -> dict:
+        fields = super()._corpus_fields()
+        fields["apple_count"] = self._apple_count
+        return fields
+
     def _generate_environment_auto(self) -> Environment:
         """
         Generates snake environment automatically.
@@ -651,39 +1919,32 @@ class SnakeProblemGenerator(ProblemGenerator):
         """
 
         board = TileCollection(
-            [Tile(tile_position=(x, y)) for x in range(self._tile_size) for y in range(self._tile_size)]
+            [Tile(tile_position=(x, y)) for x in range(self._tile_size) for y in range(self._tile_size)],
+            self._geometry
         )
         available_locations = board.copy()
 
         # Selects a random start position and random positions for apples.
-        start = available_locations.pop(random.randint(0, len(available_locations) - 1))
+        start = available_locations.pop(self._rng.randint(0, len(available_locations) - 1))
         tail = available_locations.find_neighbours(start)[0]
         available_locations.remove(tail)
 
-        goals = random.sample(available_locations, self._apple_count)
-        apples = TileCollection(goals)
+        goals = self._rng.sample(available_locations, self._apple_count)
+        apples = TileCollection(goals, self._geometry)
 
-        screen = pygame.display.set_mode(self._screen_size)
-        screen.fill(BACKGROUND)
+        return SnakeEnvironment(board, start, tail, apples)
 
-        for tile in board:
-            pygame.draw.rect(screen, FILLED_TILE, tile.get_rect())
-            pygame.display.flip()
+    def _draw_environment(self, screen: pygame.Surface, environment: SnakeGridEnvironment) -> None:
+        for position in environment.board.positions().tolist():
+            pygame.draw.rect(screen, FILLED_TILE, self._geometry.rect(position))
 
         current_colour = INITIAL_APPLE
-        for apple in apples:
-            pygame.draw.rect(screen, current_colour, apple.get_rect())
-            pygame.display.flip()
+        for apple in environment.apples.tolist():
+            pygame.draw.rect(screen, current_colour, self._geometry.rect(apple))
             current_colour = self._darken_colour(current_colour)
 
-        pygame.draw.rect(screen, START_TILE, start.get_rect())
-        pygame.draw.rect(screen, TAIL_TILE, tail.get_rect())
-        pygame.display.flip()
-
-        self._save_pygame_environment(screen)
-        pygame.quit()
-
-        return SnakeEnvironment(board, start, tail, apples)
+        pygame.draw.rect(screen, START_TILE, self._geometry.rect(environment.head))
+        pygame.draw.rect(screen, TAIL_TILE, self._geometry.rect(environment.tail))
 
     def _generate_environment_manual(self) -> Environment:
         """
@@ -696,26 +1957,24 @@ class SnakeProblemGenerator(ProblemGenerator):
 
     def _setup_problem(self, environment: SnakeEnvironment) -> None:
 
+        environment = environment.to_grid()
+
         # Maps all tiles to PDDL objects.
-        for tile in environment.board:
-            position = tile.get_position()
-            tile_obj = Object(f"p{position[0]}-{position[1]}", self._problem.user_type(POSITION))
-            self._add_mapping(tile, tile_obj)
-            self._problem.add_object(tile_obj)
-
-        # Creates all required valid paths between tiles.
-        for tile in environment.board:
-            for neighbour in environment.board.find_neighbours(tile):
-                neighbour_object = self._get_mapping(neighbour)
-                current_object = self._get_mapping(tile)
-                self._problem.set_initial_value(self._problem.fluent(PATH)(neighbour_object, current_object), True)
-                self._problem.set_initial_value(self._problem.fluent(PATH)(current_object, neighbour_object), True)
-
-        start_object = self._get_mapping(environment.head)
+        objects = {
+            (x, y): Object(f"p{x}-{y}", self._problem.user_type(POSITION))
+            for x, y in environment.board.positions().tolist()
+        }
+        self._initial_state.add_objects(objects.values())
+
+        # Creates all required valid paths between tiles, edges are listed in both directions.
+        board = environment.board
+        self._initial_state.add_indexed_facts(PATH, list(objects.values()), board.tile_edge_indices(board.positions()))
+
+        start_object = objects[environment.head]
 
         # Tail is set to a random neighbour of the head.
-        tail_tile = environment.tail
-        tail_object = self._get_mapping(tail_tile)
+        tail_object = objects[environment.tail]
+        apple_objects = [objects[x, y] for x, y in environment.apples.tolist()]
 
         # Body.
         self._problem.set_initial_value(self._problem.fluent(HEAD_AT)(start_object), True)
@@ -727,10 +1986,8 @@ class SnakeProblemGenerator(ProblemGenerator):
         self._problem.set_initial_value(self._problem.fluent(BLOCKED)(tail_object), True)
 
         # Apple locations.
-        self._problem.set_initial_value(self._problem.fluent(APPLE_AT)(self._get_mapping(environment.apples[0])), True)
-        self._problem.set_initial_value(
-            self._problem.fluent(SPAWN_APPLE)(self._get_mapping(environment.apples[1])), True
-        )
+        self._problem.set_initial_value(self._problem.fluent(APPLE_AT)(apple_objects[0]), True)
+        self._problem.set_initial_value(self._problem.fluent(SPAWN_APPLE)(apple_objects[1]), True)
 
         # Final spawn once goal apple has been spawned.
         dummy_apple = Object(DUMMYPOINT, self._problem.user_type(POSITION))
@@ -738,17 +1995,35 @@ class SnakeProblemGenerator(ProblemGenerator):
         self._problem.set_initial_value(self._problem.fluent(IS_DUMMYPOINT)(dummy_apple), True)
 
         # next-apple(?appleloc ?nextappleloc) for all apples := true
-        for i in range(1, len(environment.apples)):
-            apple_obj = self._get_mapping(environment.apples[i])
-            if i + 1 < len(environment.apples):
-                next_apple_obj = self._get_mapping(environment.apples[i + 1])
-            else:
-                next_apple_obj = dummy_apple
-            self._problem.set_initial_value(self._problem.fluent(NEXT_APPLE)(apple_obj, next_apple_obj), True)
+        self._initial_state.add_facts(NEXT_APPLE, zip(apple_objects[1:], apple_objects[2:] + [dummy_apple]))
 
         # goals += apple-at(?appleloc)
-        for i in range(len(environment.apples)):
-            self._problem.add_goal(Not(self._problem.fluent(APPLE_AT)(self._get_mapping(environment.apples[i]))))
+        for apple_obj in apple_objects:
+            self._problem.add_goal(Not(self._problem.fluent(APPLE_AT)(apple_obj)))
+
+    def _serialize_problem(self, environment: SnakeGridEnvironment, index: int) -> tuple[str, str]:
+        name = f"{self._domain}{index}"
+        names = [f"p{x}-{y}" for x, y in environment.board.positions().tolist()]
+        head = "p{}-{}".format(*environment.head)
+        tail = "p{}-{}".format(*environment.tail)
+        apples = [f"p{x}-{y}" for x, y in environment.apples.tolist()]
+
+        # Facts in the order _setup_problem sets them.
+        board = environment.board
+        init = [f"({PATH} {names[a]} {names[b]})" for a, b in board.tile_edge_indices(board.positions()).tolist()]
+        init += [
+            f"({HEAD_AT} {head})", f"({TAIL_AT} {tail})", f"({BODY_CON} {head} {tail})",
+            f"({BLOCKED} {head})", f"({BLOCKED} {tail})",
+            f"({APPLE_AT} {apples[0]})", f"({SPAWN_APPLE} {apples[1]})",
+            f"({IS_DUMMYPOINT} {DUMMYPOINT})",
+        ]
+        init += [f"({NEXT_APPLE} {a} {b})" for a, b in zip(apples[1:], apples[2:] + [DUMMYPOINT])]
+
+        goals = [f"(not ({APPLE_AT} {apple}))" for apple in apples]
+        return name, format_problem(name, [(POSITION, names + [DUMMYPOINT])], init, goals)
+
+    def _plan_validator(self, environment: SnakeGridEnvironment) -> PlanValidator:
+        return SnakeValidator(environment.board.cells, environment.head, environment.tail, environment.apples)
 
     def _darken_colour(self, colour):
         """
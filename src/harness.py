@@ -0,0 +1,515 @@
+"""
+**Benchmark harness**
+
+This module times problem generation and solving over a sweep of a generator option with repetitions, and compares
+result files for statistically significant regressions.
+
+Functions:
+    - ``summarise``: Median, 95th percentile and interquartile range of timings.
+    - ``sweep``: Times generation and solving for every value of an option.
+    - ``save_results``: Writes sweep results as JSON.
+    - ``load_results``: Reads sweep results from JSON.
+    - ``mann_whitney_u``: Two-sided Mann-Whitney U test.
+    - ``compare``: Flags points of a sweep that became significantly slower.
+
+Every repetition uses its own fixed seed, so two sweeps with the same settings time the same problems. Warm-up runs
+are timed and discarded. Generation is timed headless, solving in a child process under the resource limits, both
+with the monotonic high-resolution performance counter. Solves that exceed their limits or crash are counted per
+point instead of being dropped silently.
+
+Sweeps are split into (value, repetition) cells, which run on a process pool and are appended to a result store as
+they finish. Rerunning an interrupted sweep with the same store skips the cells it already completed.
+
+Example usage::
+
+    # Time blockly mazes of sizes 4 to 8, five repetitions each, and keep the results
+    results = sweep(BlocklyMazeProblemGenerator, "tile_size", range(4, 9), repetitions=5, warmup=1)
+    save_results(results, "baseline.json")
+
+    # Sweep on eight processes, checkpointing every cell, a rerun after a crash only runs the missing cells
+    results = sweep(SnakeProblemGenerator, "tile_size", range(10, 60, 4), workers=8, store="sweeps.jsonl")
+
+    # Compare with a later run, from the command line:
+    #     python -m src.harness compare baseline.json candidate.json
+    comparisons = compare(load_results("baseline.json"), load_results("candidate.json"))
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from typing import Callable, Iterable, Union
+from src.generators import (
+    BlocklyMazeProblemGenerator, DirectionalProblemReducedMazeProblemGenerator,
+    NonDirectionalProblemReducedMazeProblemGenerator, ProblemGenerator, SnakeProblemGenerator
+)
+from src.isolation import SOLVED, ResourceLimits, run_isolated
+from src.result_store import ResultStore
+from src.solvers import SEARCHES
+
+GENERATORS = {
+    "blockly_maze": BlocklyMazeProblemGenerator,
+    "directional_maze": DirectionalProblemReducedMazeProblemGenerator,
+    "non_directional_maze": NonDirectionalProblemReducedMazeProblemGenerator,
+    "snake": SnakeProblemGenerator,
+}
+
+PHASES = ("generation", "solve")
+
+# Options naming where a cell writes its files, which every cell sets to its own temporary directories.
+OUTPUT_DIRECTORIES = ("image_directory", "plan_directory", "problem_directory")
+
+
+def solve_function(generator: ProblemGenerator, solution: str) -> Callable[[], object]:
+    """
+    Resolves how a generator solves its problems.
+
+    Arguments:
+        generator (ProblemGenerator): The generator.
+        solution (str): Either 'classical', 'generalised' or the name of a native search in SEARCHES.
+
+    Returns:
+        Callable[[], object]: Function solving every problem of the generator.
+    """
+
+    if solution == 'classical':
+        return generator.solve_each
+    if solution == 'generalised':
+        return generator.solve_all
+    if solution in SEARCHES:
+        return partial(generator.solve_each, solver=solution)
+    raise NameError(f"solution must be either 'classical', 'generalised' or one of: {', '.join(SEARCHES)}.")
+
+
+def _timed(function: Callable[[], object], directory: str) -> float:
+
+    # Results of solves refer to unified planning objects of the child process, only the timing is sent back.
+    # Planners write intermediate files to the working directory, which concurrent cells must not share.
+    with contextlib.chdir(directory):
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+
+# Sweep points already warmed up in this process during the current sweep.
+_warmed_points = set()
+
+
+def _run_cell(generator: type[ProblemGenerator],
+              variable: str,
+              solution: str,
+              problem_count: int,
+              warmup: int,
+              limits: ResourceLimits,
+              options: dict,
+              value,
+              repetition: int,
+              seed: int) -> dict:
+    """
+    Times generation and solving of one repetition of a sweep point, after the warm-up runs of the point if this
+    process has not run them yet.
+
+    Arguments:
+        generator (Type[ProblemGenerator]): The type of problem generator to use.
+        variable (str): The option to vary.
+        solution (str): Either 'classical', 'generalised' or the name of a native search in SEARCHES.
+        problem_count (int): The number of problems.
+        warmup (int): The number of discarded runs of the point.
+        limits (ResourceLimits): Limits of the solve.
+        options (dict): Additional options for problem generation.
+        value: The value of the option.
+        repetition (int): Index of the repetition.
+        seed (int): Seed of the problems.
+
+    Returns:
+        dict: The value, repetition and seed with the generation and solve timings, the solve status and its peak memory.
+    """
+
+    point = (generator.__name__, variable, json.dumps(value), solution)
+    runs = 1 if point in _warmed_points else warmup + 1
+    _warmed_points.add(point)
+
+    # Every cell generates and solves in its own directories, so cells can run concurrently.
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as directory:
+            kwargs = {
+                **options,
+                'auto': True,
+                'headless': True,
+                'problem_count': problem_count,
+                'seed': seed,
+                'image_directory': os.path.join(directory, "images"),
+                'plan_directory': os.path.join(directory, "plans"),
+                'problem_directory': os.path.join(directory, "problems"),
+                variable: value,
+            }
+
+            start = time.perf_counter()
+            current_generator = generator(**kwargs)
+            generation = time.perf_counter() - start
+            outcome = run_isolated(_timed, limits, solve_function(current_generator, solution), directory)
+
+    return {
+        "value": value,
+        "repetition": repetition,
+        "seed": seed,
+        "generation": generation,
+        "solve": outcome.value if outcome.status == SOLVED else None,
+        "status": outcome.status,
+        "peak_memory": outcome.peak_memory,
+    }
+
+
+def summarise(samples: list[float]) -> dict:
+    """
+    Summarises timings.
+
+    Arguments:
+        samples (list[float]): Timings in seconds.
+
+    Returns:
+        dict: The samples with their count, median, mean, 95th percentile, quartiles and interquartile range, the
+        statistics are None without samples.
+    """
+
+    summary = {"samples": list(samples), "n": len(samples)}
+    if not samples:
+        return {**summary, "median": None, "mean": None, "p95": None, "q1": None, "q3": None, "iqr": None}
+
+    if len(samples) == 1:
+        q1 = q3 = p95 = samples[0]
+    else:
+        q1, _, q3 = statistics.quantiles(samples, n=4, method="inclusive")
+        p95 = statistics.quantiles(samples, n=20, method="inclusive")[-1]
+    return {
+        **summary,
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "p95": p95,
+        "q1": q1,
+        "q3": q3,
+        "iqr": q3 - q1,
+    }
+
+
+def sweep(generator: type[ProblemGenerator],
+          variable: str,
+          values: Iterable,
+          solution: str = 'classical',
+          problem_count: int = 1,
+          repetitions: int = 5,
+          warmup: int = 1,
+          seed: int = 1,
+          timeout: float = 60,
+          memory_limit: int = None,
+          workers: int = 1,
+          store: Union[str, ResultStore, None] = None,
+          **options) -> dict:
+    """
+    Times generation and solving for every value of a generator option.
+    Every (value, repetition) cell is a separate task, run on a process pool when more than one worker is requested.
+    Finished cells are appended to the result store as they complete, and cells already in the store for the same
+    settings are skipped, so an interrupted sweep resumes where it stopped.
+
+    Arguments:
+        generator (Type[ProblemGenerator]): The type of problem generator to use.
+        variable (str): The option to vary, e.g. 'tile_size'.
+        values (Iterable): The values of the option.
+        solution (str): Either 'classical', 'generalised' or the name of a native search in SEARCHES.
+        problem_count (int): The number of problems per repetition.
+        repetitions (int): The number of timed repetitions per value, repetition r uses seed + r.
+        warmup (int): The number of discarded runs per value and worker process of this sweep, run with the seed of the
+            first repetition the worker times.
+        seed (int): Seed of the first repetition.
+        timeout (float): Seconds allowed per solve.
+        memory_limit (int, optional): Bytes of memory allowed per solve.
+        workers (int): Number of worker processes running cells.
+        store (Union[str, ResultStore, None]): The result store or the path of its JSON Lines file, None keeps the
+            results in memory only.
+        **options: Additional options for problem generation.
+
+    Returns:
+        dict: The settings of the sweep and, per value, summaries of the generation and solve timings and the number
+        of solves per status.
+    """
+
+    values = list(values)
+    store = store if isinstance(store, ResultStore) else ResultStore(store)
+
+    # Every sweep warms its points up again, so sweeps run one after the other in a process stay comparable. Worker
+    # processes are started afresh for every sweep.
+    _warmed_points.clear()
+    limits = ResourceLimits(timeout, memory_limit)
+
+    # Output directories are replaced per cell. The corpus and program cache directories are kept, as they decide
+    # whether generation and synthesis run at all, so sweeps with and without them are stored apart.
+    options = {key: value for key, value in options.items() if key not in OUTPUT_DIRECTORIES}
+    settings = {
+        "generator": generator.__name__,
+        "variable": variable,
+        "solution": solution,
+        "problem_count": problem_count,
+        "seed": seed,
+        "limits": {"timeout": timeout, "memory_limit": memory_limit},
+        "caches": {
+            "corpus": options.get("corpus_directory") is not None,
+            "program_cache": options.get("program_cache_directory") is not None,
+        },
+        "options": {key: value for key, value in options.items()
+                    if isinstance(value, (str, int, float, bool)) and not key.endswith("_directory")},
+    }
+    key = store.key(settings)
+
+    completed = {(json.dumps(record["value"]), record["repetition"]) for record in store.records(key)}
+    cells = [(value, repetition, seed + repetition)
+             for value in values for repetition in range(repetitions)
+             if (json.dumps(value), repetition) not in completed]
+    if len(cells) < len(values) * repetitions:
+        print(f"Resuming sweep, {len(values) * repetitions - len(cells)} cells already completed")
+
+    run_cell = partial(_run_cell, generator, variable, solution, problem_count, warmup, limits, options)
+    if workers <= 1:
+        for cell in cells:
+            print("EXPERIMENT", str(cell[0]), "REPETITION", str(cell[1]))
+            store.append(key, run_cell(*cell))
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(run_cell, *cell) for cell in cells]
+            for future in as_completed(futures):
+                record = future.result()
+                print("EXPERIMENT", str(record["value"]), "REPETITION", str(record["repetition"]))
+                store.append(key, record)
+
+    # Records of the same cell can repeat when two sweeps ran at once, the first one counts.
+    records = {}
+    for record in store.records(key):
+        records.setdefault((json.dumps(record["value"]), record["repetition"]), record)
+
+    points = []
+    for value in values:
+        cell_records = [records[(json.dumps(value), repetition)] for repetition in range(repetitions)
+                        if (json.dumps(value), repetition) in records]
+        statuses = {}
+        for record in cell_records:
+            statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+        points.append({
+            "value": value,
+            **{phase: summarise([record[phase] for record in cell_records if record[phase] is not None])
+               for phase in PHASES},
+            "statuses": statuses,
+        })
+
+    return {
+        **settings,
+        "repetitions": repetitions,
+        "warmup": warmup,
+        "store": store.path,
+        "points": points,
+    }
+
+
+def save_results(results: dict, path: str) -> None:
+    """
+    Writes sweep results as JSON.
+
+    Arguments:
+        results (dict): Results of a sweep.
+        path (str): Path of the JSON file.
+    """
+
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def load_results(path: str) -> dict:
+    """
+    Reads sweep results from JSON.
+
+    Arguments:
+        path (str): Path of the JSON file.
+
+    Returns:
+        dict: Results of a sweep.
+    """
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def _exact_u_distribution(n1: int, n2: int) -> list[int]:
+    """
+    Counts the arrangements of two samples without ties by their U statistic.
+
+    Arguments:
+        n1 (int): Size of the first sample.
+        n2 (int): Size of the second sample.
+
+    Returns:
+        list[int]: Number of arrangements with U equal to each index, from 0 to n1 * n2.
+    """
+
+    # counts[i][j] holds the distribution for samples of sizes i and j, built up one element at a time.
+    counts = [[[1] for _ in range(n2 + 1)] for _ in range(n1 + 1)]
+    for i in range(1, n1 + 1):
+        for j in range(1, n2 + 1):
+            # The largest element belongs to the first sample, adding j to U, or to the second one.
+            with_first, with_second = counts[i - 1][j], counts[i][j - 1]
+            distribution = [0] * (i * j + 1)
+            for u, count in enumerate(with_first):
+                distribution[u + j] += count
+            for u, count in enumerate(with_second):
+                distribution[u] += count
+            counts[i][j] = distribution
+    return counts[n1][n2]
+
+
+def mann_whitney_u(first: list[float], second: list[float]) -> tuple[float, float]:
+    """
+    Two-sided Mann-Whitney U test of whether two samples come from the same distribution.
+    The p-value is exact for small samples without ties and uses the tie-corrected normal approximation otherwise.
+
+    Arguments:
+        first (list[float]): The first sample.
+        second (list[float]): The second sample.
+
+    Returns:
+        tuple[float, float]: The U statistic of the first sample and the p-value.
+    """
+
+    n1, n2 = len(first), len(second)
+    if n1 == 0 or n2 == 0:
+        return math.nan, 1.0
+
+    # Midranks of the pooled samples.
+    pooled = sorted([(value, 0) for value in first] + [(value, 1) for value in second])
+    ranks = [0.0] * len(pooled)
+    ties = []
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties.append(j - i + 1)
+        i = j + 1
+
+    rank_sum = sum(rank for rank, (_, sample) in zip(ranks, pooled) if sample == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+
+    if all(count == 1 for count in ties) and n1 + n2 <= 40:
+        distribution = _exact_u_distribution(n1, n2)
+        extreme = min(u, n1 * n2 - u)
+        tail = sum(distribution[:int(extreme) + 1]) / sum(distribution)
+        return u, min(1.0, 2 * tail)
+
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - sum(t ** 3 - t for t in ties) / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+
+    # Continuity corrected towards the mean.
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return u, min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def compare(baseline: dict, candidate: dict, alpha: float = 0.05, threshold: float = 0.05) -> list[dict]:
+    """
+    Compares the timings of two sweeps point by point and phase by phase.
+    A point regressed when the candidate median is more than the threshold slower and the Mann-Whitney U test
+    rejects equal distributions at the significance level; improvements are flagged the same way.
+
+    Arguments:
+        baseline (dict): Results of the reference sweep.
+        candidate (dict): Results of the sweep to check.
+        alpha (float): Significance level of the test.
+        threshold (float): Relative change of the median below which differences are ignored.
+
+    Returns:
+        list[dict]: Per value and phase, both medians, the relative change, the p-value and a verdict of
+        'regression', 'improvement' or 'unchanged'.
+    """
+
+    candidates = {json.dumps(point["value"]): point for point in candidate["points"]}
+    comparisons = []
+    for point in baseline["points"]:
+        other = candidates.get(json.dumps(point["value"]))
+        if other is None:
+            continue
+
+        for phase in PHASES:
+            before, after = point[phase]["samples"], other[phase]["samples"]
+            if not before or not after:
+                continue
+
+            _, p_value = mann_whitney_u(before, after)
+            old, new = statistics.median(before), statistics.median(after)
+            change = (new - old) / old if old else math.inf
+            verdict = "unchanged"
+            if p_value < alpha and abs(change) > threshold:
+                verdict = "regression" if change > 0 else "improvement"
+            comparisons.append({
+                "value": point["value"],
+                "phase": phase,
+                "baseline_median": old,
+                "candidate_median": new,
+                "change": change,
+                "p_value": p_value,
+                "verdict": verdict,
+            })
+    return comparisons
+
+
+def _parse_value(text: str) -> Union[int, float, str]:
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark harness for path finding problems")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="time a sweep and write its results as JSON")
+    run.add_argument("output", type=str)
+    run.add_argument("-d", "--domain", choices=list(GENERATORS), default="blockly_maze")
+    run.add_argument("-v", "--variable", type=str, default="tile_size")
+    run.add_argument("-V", "--values", type=_parse_value, nargs="+", default=[4, 6, 8])
+    run.add_argument("-t", "--solution", type=str, default="classical")
+    run.add_argument("-p", "--problem_count", type=int, default=1)
+    run.add_argument("-r", "--repetitions", type=int, default=5)
+    run.add_argument("-u", "--warmup", type=int, default=1)
+    run.add_argument("-S", "--seed", type=int, default=1)
+    run.add_argument("-T", "--timeout", type=float, default=60)
+    run.add_argument("-M", "--memory_limit", type=int, default=None)
+    run.add_argument("-w", "--workers", type=int, default=1)
+    run.add_argument("-s", "--store", type=str, default=None)
+
+    comparison = commands.add_parser("compare", help="flag significant regressions between two result files")
+    comparison.add_argument("baseline", type=str)
+    comparison.add_argument("candidate", type=str)
+    comparison.add_argument("-a", "--alpha", type=float, default=0.05)
+    comparison.add_argument("-x", "--threshold", type=float, default=0.05)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        save_results(sweep(GENERATORS[args.domain], args.variable, args.values, args.solution, args.problem_count,
+                           args.repetitions, args.warmup, args.seed, args.timeout, args.memory_limit,
+                           args.workers, args.store), args.output)
+    else:
+        rows = compare(load_results(args.baseline), load_results(args.candidate), args.alpha, args.threshold)
+        for row in rows:
+            print(f"{row['value']!s:>8} {row['phase']:<10} {row['baseline_median']:.4f}s -> "
+                  f"{row['candidate_median']:.4f}s ({row['change']:+.1%}, p={row['p_value']:.3f}) {row['verdict']}")
+        sys.exit(1 if any(row["verdict"] == "regression" for row in rows) else 0)
@@ -0,0 +1,394 @@
+"""
+**Pipeline instrumentation**
+
+This module records where time and memory go while problems are generated and solved, as nested spans around every
+phase of the pipeline and counters of the objects and facts produced.
+
+Classes:
+    - ``Recorder``: Collects spans, counters and per-phase profiles while enabled.
+
+Functions:
+    - ``enable``: Starts recording into a new recorder.
+    - ``disable``: Stops recording.
+    - ``recording``: Records for the duration of a with block.
+    - ``span``: Times a phase of the pipeline.
+    - ``spanned``: Times every call of a function as a phase of the pipeline.
+    - ``count``: Increments a counter.
+    - ``enabled``: Whether recording is on.
+
+Spans record wall-clock and CPU time, and the memory they allocated net of what they freed when allocations are
+traced. Phases can be profiled with cProfile, or pyinstrument when it is installed. While recording is off, a span
+is a shared object whose methods do nothing and a counter returns at once, so the instrumented pipeline runs at its
+usual speed. Only the recording process is observed, phases run in worker processes are not recorded.
+
+Example usage::
+
+    # Record generation and solving, profiling the setup of every problem, and write the report
+    with recording(trace_allocations=True, profile={"setup_problem"}) as recorder:
+        generator = BlocklyMazeProblemGenerator(problem_count=5, auto=True, headless=True)
+        generator.solve_each()
+    recorder.save("instrumentation.json")
+    print(recorder.profile_report("setup_problem"))
+"""
+
+import contextlib
+import cProfile
+import functools
+import inspect
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from typing import Callable, Iterable, Iterator, Union
+
+_recorder: Union['Recorder', None] = None
+
+
+class _NullSpan:
+    """Span used while recording is off, every method does nothing."""
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def set(self, **attributes) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+
+    def __init__(self, recorder: 'Recorder', name: str, attributes: dict):
+        """
+        A timed phase of the pipeline.
+
+        Arguments:
+            recorder (Recorder): The recorder the span reports to.
+            name (str): Name of the phase.
+            attributes (dict): JSON serializable details of the phase, e.g. object and fact counts.
+        """
+
+        self._recorder = recorder
+        self._name = name
+        self._attributes = attributes
+        self._profiler = None
+
+    def set(self, **attributes) -> None:
+        """Adds details to the span, e.g. counts only known once the phase is done."""
+
+        self._attributes.update(attributes)
+
+    def __enter__(self) -> '_Span':
+        recorder = self._recorder
+        self._parent = recorder._stack[-1] if recorder._stack else None
+        recorder._stack.append(self._name)
+        self._profiler = recorder._start_profile(self._name)
+        self._memory = tracemalloc.get_traced_memory()[0] if recorder.trace_allocations else 0
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        recorder = self._recorder
+        allocated = tracemalloc.get_traced_memory()[0] - self._memory if recorder.trace_allocations else None
+        recorder._stop_profile(self._name, self._profiler)
+        recorder._stack.pop()
+        recorder._add_span(self._name, self._parent, len(recorder._stack), wall, cpu, allocated, self._attributes)
+
+
+class Recorder:
+
+    def __init__(self, trace_allocations: bool = False, profile: Union[Iterable[str], bool] = (),
+                 profiler: str = "cprofile", keep_spans: bool = True):
+        """
+        Collects spans, counters and per-phase profiles while enabled.
+
+        Arguments:
+            trace_allocations (bool): Whether spans record the memory they allocate, using tracemalloc.
+            profile (Union[Iterable[str], bool]): Names of the phases to profile, or True to profile every phase.
+                Nested phases are covered by the profile of the outermost profiled phase.
+            profiler (str): "cprofile", or "pyinstrument" when it is installed.
+            keep_spans (bool): Whether every span is kept, otherwise only the totals per phase are.
+        """
+
+        if profiler not in ("cprofile", "pyinstrument"):
+            raise ValueError(f"Unknown profiler '{profiler}', choose from: cprofile, pyinstrument")
+        if profiler == "pyinstrument" and profile:
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError as error:
+                raise ImportError("pyinstrument profiling requires the pyinstrument package") from error
+
+        self.trace_allocations = trace_allocations
+        self._profile = profile if isinstance(profile, bool) else set(profile)
+        self._profiler_kind = profiler
+        self._keep_spans = keep_spans
+        self._stack: list[str] = []
+        self._profiling = False
+        self.spans: list[dict] = []
+        self.phases: dict[str, dict] = {}
+        self.counters: dict[str, int] = {}
+        self.profiles: dict[str, object] = {}
+        self.peak_traced_memory: Union[int, None] = None
+        self._started_tracing = False
+
+    def _start_profile(self, name: str):
+
+        # Profilers cannot run nested, inner phases are part of the profile of the outer one.
+        if self._profiling or not (self._profile is True or (self._profile and name in self._profile)):
+            return None
+
+        self._profiling = True
+        if self._profiler_kind == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def _stop_profile(self, name: str, profiler) -> None:
+        if profiler is None:
+            return
+
+        self._profiling = False
+        if self._profiler_kind == "pyinstrument":
+            profiler.stop()
+            self.profiles.setdefault(name, []).append(profiler)
+            return
+
+        profiler.disable()
+        if name in self.profiles:
+            self.profiles[name].add(profiler)
+        else:
+            self.profiles[name] = pstats.Stats(profiler)
+
+    def _add_span(self, name: str, parent: Union[str, None], depth: int, wall: float, cpu: float,
+                  allocated: Union[int, None], attributes: dict) -> None:
+        """
+        Records a finished span and adds it to the totals of its phase.
+
+        Arguments:
+            name (str): Name of the phase.
+            parent (str, optional): Name of the enclosing phase.
+            depth (int): Number of enclosing phases.
+            wall (float): Wall-clock seconds.
+            cpu (float): CPU seconds of this process.
+            allocated (int, optional): Bytes allocated net of bytes freed, None unless allocations are traced.
+            attributes (dict): Details of the span.
+        """
+
+        if self._keep_spans:
+            self.spans.append({"name": name, "parent": parent, "depth": depth, "wall": wall, "cpu": cpu,
+                               "allocated": allocated, **attributes})
+
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = {"count": 0, "wall": 0.0, "cpu": 0.0, "max_wall": 0.0, "allocated": None}
+        phase["count"] += 1
+        phase["wall"] += wall
+        phase["cpu"] += cpu
+        phase["max_wall"] = max(phase["max_wall"], wall)
+        if allocated is not None:
+            phase["allocated"] = (phase["allocated"] or 0) + allocated
+
+    def as_dict(self) -> dict:
+        """
+        Returns the recorded data.
+
+        Returns:
+            dict: Totals per phase, counters, every kept span, and the peak traced memory when allocations are traced.
+        """
+
+        peak = self.peak_traced_memory
+        if peak is None and self.trace_allocations and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+        return {"phases": self.phases, "counters": self.counters, "spans": self.spans, "peak_traced_memory": peak}
+
+    def save(self, path: str) -> None:
+        """
+        Writes the recorded data as JSON.
+
+        Arguments:
+            path (str): Path of the JSON file.
+        """
+
+        with open(path, "w") as file:
+            json.dump(self.as_dict(), file, indent=2)
+
+    def profile_report(self, name: str, limit: int = 25) -> str:
+        """
+        Formats the profile of a phase.
+
+        Arguments:
+            name (str): Name of the profiled phase.
+            limit (int): Number of functions listed, by cumulative time.
+
+        Returns:
+            str: The profile, empty if the phase was not profiled.
+        """
+
+        profile = self.profiles.get(name)
+        if profile is None:
+            return ""
+        if self._profiler_kind == "pyinstrument":
+            return "\n".join(profiler.output_text() for profiler in profile)
+
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.add(profile)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def dump_profile(self, name: str, path: str) -> None:
+        """
+        Writes the cProfile statistics of a phase, e.g. for snakeviz or pstats.
+
+        Arguments:
+            name (str): Name of the profiled phase.
+            path (str): Path of the statistics file.
+        """
+
+        if self._profiler_kind != "cprofile":
+            raise ValueError("Only cProfile statistics can be dumped")
+        self.profiles[name].dump_stats(path)
+
+
+def enable(trace_allocations: bool = False, profile: Union[Iterable[str], bool] = (), profiler: str = "cprofile",
+           keep_spans: bool = True) -> Recorder:
+    """
+    Starts recording into a new recorder, replacing any current one.
+
+    Arguments:
+        trace_allocations (bool): Whether spans record the memory they allocate, using tracemalloc.
+        profile (Union[Iterable[str], bool]): Names of the phases to profile, or True to profile every phase.
+        profiler (str): "cprofile", or "pyinstrument" when it is installed.
+        keep_spans (bool): Whether every span is kept, otherwise only the totals per phase are.
+
+    Returns:
+        Recorder: The recorder.
+    """
+
+    global _recorder
+    _recorder = Recorder(trace_allocations, profile, profiler, keep_spans)
+    if trace_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _recorder._started_tracing = True
+    return _recorder
+
+
+def disable() -> Union[Recorder, None]:
+    """
+    Stops recording.
+
+    Returns:
+        Union[Recorder, None]: The recorder that was recording, if any.
+    """
+
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None and recorder._started_tracing:
+        recorder.peak_traced_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return recorder
+
+
+@contextlib.contextmanager
+def recording(trace_allocations: bool = False, profile: Union[Iterable[str], bool] = (), profiler: str = "cprofile",
+              keep_spans: bool = True) -> Iterator[Recorder]:
+    """
+    Records for the duration of a with block.
+
+    Arguments:
+        trace_allocations (bool): Whether spans record the memory they allocate, using tracemalloc.
+        profile (Union[Iterable[str], bool]): Names of the phases to profile, or True to profile every phase.
+        profiler (str): "cprofile", or "pyinstrument" when it is installed.
+        keep_spans (bool): Whether every span is kept, otherwise only the totals per phase are.
+
+    Returns:
+        Iterator[Recorder]: The recorder, which keeps its data after the block.
+    """
+
+    recorder = enable(trace_allocations, profile, profiler, keep_spans)
+    try:
+        yield recorder
+    finally:
+        disable()
+
+
+def enabled() -> bool:
+    """Returns whether recording is on, e.g. to skip computing span details nobody records."""
+
+    return _recorder is not None
+
+
+def span(name: str, **attributes) -> Union[_Span, _NullSpan]:
+    """
+    Times a phase of the pipeline as a with block.
+
+    Arguments:
+        name (str): Name of the phase, e.g. "setup_problem".
+        **attributes: JSON serializable details of the phase.
+
+    Returns:
+        Union[_Span, _NullSpan]: The span, whose set method adds details once they are known.
+    """
+
+    if _recorder is None:
+        return _NULL_SPAN
+    return _Span(_recorder, name, attributes)
+
+
+def spanned(name: str, *arguments: str) -> Callable[[Callable], Callable]:
+    """
+    Times every call of a function as a phase of the pipeline, like a span around its whole body.
+
+    Arguments:
+        name (str): Name of the phase, e.g. "solve_each".
+        *arguments (str): Names of arguments of the function recorded as details of the phase, e.g. "solver".
+
+    Returns:
+        Callable[[Callable], Callable]: The decorator.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return function(*args, **kwargs)
+
+            attributes = {}
+            if arguments:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                attributes = {argument: bound.arguments[argument] for argument in arguments}
+            with _Span(_recorder, name, attributes):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name: str, amount: int = 1) -> None:
+    """
+    Increments a counter.
+
+    Arguments:
+        name (str): Name of the counter, e.g. "facts".
+        amount (int): Amount added.
+    """
+
+    if _recorder is None:
+        return
+    _recorder.counters[name] = _recorder.counters.get(name, 0) + amount
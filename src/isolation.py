@@ -0,0 +1,208 @@
+"""
+**Process isolation**
+
+This module runs functions in child processes with a wall-clock deadline and a memory limit, so planners stuck in
+native code or exhausting memory are stopped without affecting the caller.
+
+Classes:
+    - ``ResourceLimits``: Wall-clock and memory limits of an isolated run.
+    - ``IsolatedOutcome``: Outcome of an isolated run.
+
+Functions:
+    - ``run_isolated``: Runs a function in a child process under resource limits.
+    - ``group_memory``: Returns the resident memory of every process in a process group.
+
+The child leads its own process group and has its address space limited, which also applies to planners it starts.
+The parent samples the resident memory of the whole group, and kills the group once the deadline passes or the
+memory limit is exceeded. Children are forked, so the function and its arguments need not be picklable, only its
+return value.
+
+Example usage::
+
+    # Solve with at most 60 seconds and 2 GiB
+    outcome = run_isolated(generator.solve_each, ResourceLimits(timeout=60, memory_limit=2 ** 31))
+    if outcome.status == TIMEOUT:
+        ...
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import os
+import resource
+import signal
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any, Callable, Union
+
+# Statuses of an isolated run.
+SOLVED, TIMEOUT, OUT_OF_MEMORY, CRASHED = "solved", "timeout", "out_of_memory", "crashed"
+
+# Seconds between samples of the memory of a running child.
+POLL_INTERVAL = 0.05
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    """
+    Wall-clock and memory limits of an isolated run.
+
+    Attributes:
+        timeout (float, optional): Seconds before the run is killed, None for no deadline.
+        memory_limit (int, optional): Bytes of resident memory and of address space of any process of the run, None
+            for no limit.
+    """
+
+    timeout: Union[float, None] = None
+    memory_limit: Union[int, None] = None
+
+
+@dataclass
+class IsolatedOutcome:
+    """
+    Outcome of an isolated run.
+
+    Attributes:
+        status (str): SOLVED if the function returned, TIMEOUT or OUT_OF_MEMORY if a limit was exceeded, or CRASHED if
+            the function raised or the child died.
+        value (Any): The return value of the function, None unless solved.
+        seconds (float): Wall-clock time of the run.
+        peak_memory (int): Largest resident memory of the run in bytes, as sampled and as reported by the child.
+        error (str, optional): The traceback or exit reason of a crashed run.
+    """
+
+    status: str
+    value: Any = None
+    seconds: float = 0.0
+    peak_memory: int = 0
+    error: Union[str, None] = None
+
+
+def group_memory(group: int) -> int:
+    """
+    Returns the resident memory of every process in a process group.
+
+    Arguments:
+        group (int): Identifier of the process group.
+
+    Returns:
+        int: Resident memory in bytes, 0 where /proc is unavailable.
+    """
+
+    total = 0
+    try:
+        pids = [name for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return 0
+
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as file:
+                fields = file.read().rsplit(")", 1)[1].split()
+
+            # Fields after the command name start at the state, the group is the third and the resident pages the 22nd.
+            if int(fields[2]) == group:
+                total += int(fields[21]) * _PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def _peak_memory() -> int:
+
+    # ru_maxrss is reported in kilobytes on Linux.
+    return 1024 * max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                      resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def _child(function: Callable, args: tuple, kwargs: dict, memory_limit: Union[int, None], connection) -> None:
+    """
+    Runs the function in the child process and sends its outcome to the parent.
+
+    Arguments:
+        function (Callable): The function to run.
+        args (tuple): Positional arguments of the function.
+        kwargs (dict): Keyword arguments of the function.
+        memory_limit (int, optional): Address space limit in bytes.
+        connection (Connection): Sending end of a pipe to the parent process.
+    """
+
+    os.setsid()
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    try:
+        message = (SOLVED, function(*args, **kwargs), None)
+    except MemoryError:
+        message = (OUT_OF_MEMORY, None, traceback.format_exc())
+    except BaseException:
+        message = (CRASHED, None, traceback.format_exc())
+
+    try:
+        connection.send((*message, _peak_memory()))
+    except Exception:
+        connection.send((CRASHED, None, traceback.format_exc(), _peak_memory()))
+    connection.close()
+
+
+def _kill_group(process: multiprocessing.Process) -> None:
+
+    # Before the child starts its own process group, only the child itself can be killed.
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        if process.is_alive():
+            process.kill()
+    process.join()
+
+
+def run_isolated(function: Callable, limits: ResourceLimits = ResourceLimits(), *args, **kwargs) -> IsolatedOutcome:
+    """
+    Runs a function in a child process under resource limits, killing the process group of the child when the
+    deadline passes or the memory limit is exceeded.
+
+    Arguments:
+        function (Callable): The function to run, its return value must be picklable.
+        limits (ResourceLimits): Wall-clock and memory limits of the run.
+        *args: Positional arguments to pass to the function.
+        **kwargs: Keyword arguments to pass to the function.
+
+    Returns:
+        IsolatedOutcome: The status, return value, elapsed time and peak memory of the run.
+    """
+
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    start = time.perf_counter()
+    process = context.Process(target=_child, args=(function, args, kwargs, limits.memory_limit, sender))
+    process.start()
+    sender.close()
+
+    peak = 0
+    deadline = None if limits.timeout is None else start + limits.timeout
+    try:
+        while True:
+            wait = POLL_INTERVAL if deadline is None else max(0.0, min(POLL_INTERVAL, deadline - time.perf_counter()))
+            if multiprocessing.connection.wait([receiver, process.sentinel], wait):
+                break
+
+            peak = max(peak, group_memory(process.pid))
+            if limits.memory_limit is not None and peak > limits.memory_limit:
+                _kill_group(process)
+                return IsolatedOutcome(OUT_OF_MEMORY, seconds=time.perf_counter() - start, peak_memory=peak)
+            if deadline is not None and time.perf_counter() >= deadline:
+                _kill_group(process)
+                return IsolatedOutcome(TIMEOUT, seconds=time.perf_counter() - start, peak_memory=peak)
+
+        try:
+            status, value, error, reported = receiver.recv()
+        except EOFError:
+            process.join()
+            status, value, error, reported = CRASHED, None, f"Child exited with code {process.exitcode}", 0
+        return IsolatedOutcome(status, value, time.perf_counter() - start, max(peak, reported), error)
+    finally:
+        # Planners started by the child may outlive it, the whole group is stopped.
+        _kill_group(process)
+        receiver.close()
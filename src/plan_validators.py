@@ -0,0 +1,469 @@
+"""
+**Plan validation**
+
+This module validates plans by simulating them on the grid of their environment. The unified planning validator
+re-evaluates the lifted model of the domain at every step. Here, states are plain integers and byte masks indexed
+by cell, and every precondition of the domain actions is checked directly.
+
+Classes:
+    - ``ValidationReport``: Outcome of validating a plan.
+    - ``PlanValidator``: Interface for all plan validators.
+    - ``MazeValidator``: Validates plans of the maze domain.
+    - ``ReducedMazeValidator``: Validates plans of the reduced_maze domain.
+    - ``SnakeValidator``: Validates plans of the snake domain.
+
+Functions:
+    - ``plan_actions``: Converts a plan to (action name, parameter names) pairs.
+
+Plans are given as SequentialPlan instances or as sequences of (action name, parameter names) pairs, the form
+plans take when they are returned by worker processes. Validating a batch of plans is done per problem through
+ProblemGenerator.validate_plans. Validators expose the objects, states and actions of their problem step by step
+through apply, which is what the program interpreter executes generalised programs on. The maze validators share
+the step function behind apply with a plan loop keeping the state in local variables.
+
+Example usage::
+
+    # Validate a single move between the start and the goal of a reduced maze
+    validator = ReducedMazeValidator(["start", "goal"], [(0, 1)], 0, 1)
+    report = validator.validate([("move", ["start", "goal"])])
+"""
+
+from dataclasses import dataclass
+from typing import Hashable, Sequence, Union
+import numpy as np
+from unified_planning.plans import SequentialPlan
+from src.constants import (
+    DIRECTIONS, DUMMYPOINT, MOVE, MOVE_ACTIONS, MOVE_AND_EAT, MOVE_AND_EAT_NO_SPAWN, POSITION, TURN_LEFT, TURN_RIGHT
+)
+from src.environment import DIRECTION_OFFSETS
+
+
+@dataclass
+class ValidationReport:
+    """
+    Outcome of validating a plan.
+
+    Attributes:
+        valid (bool): Whether every action is applicable and the final state satisfies the goals.
+        failed_step (int): Index of the first inapplicable action, the length of the plan if the goals are not
+            satisfied at its end, or None for valid plans.
+        reason (str): Why the plan is invalid, empty for valid plans.
+    """
+
+    valid: bool
+    failed_step: Union[int, None] = None
+    reason: str = ""
+
+
+def plan_actions(plan: Union[SequentialPlan, Sequence]) -> Sequence[tuple[str, Sequence[str]]]:
+    """
+    Converts a plan to (action name, parameter names) pairs.
+
+    Arguments:
+        plan (Union[SequentialPlan, Sequence]): A SequentialPlan, or a sequence of (action name, parameter names) pairs.
+
+    Returns:
+        Sequence[tuple[str, Sequence[str]]]: The actions of the plan.
+    """
+
+    if isinstance(plan, SequentialPlan):
+        return [
+            (action.action.name, [parameter.object().name for parameter in action.actual_parameters])
+            for action in plan.actions
+        ]
+    return plan
+
+
+class PlanValidator:
+    """Interface for plan validators, each validator is built for a single problem."""
+
+    # Names of the actions of the domain.
+    ACTIONS: tuple[str, ...] = ()
+
+    # Names of the objects of the problem by type, in the order they are written to PDDL.
+    objects: dict[str, list[str]]
+
+    def initial_state(self):
+        """Returns a new mutable copy of the initial state."""
+
+        raise NotImplementedError
+
+    def apply(self, state, name: str, parameters: Sequence[str]) -> bool:
+        """
+        Applies an action to a state if its preconditions hold.
+
+        Arguments:
+            state: The state, updated in place.
+            name (str): Name of the action.
+            parameters (Sequence[str]): Names of the objects the action is applied to.
+
+        Returns:
+            bool: Whether the action was applicable, the state is left unchanged otherwise.
+        """
+
+        raise NotImplementedError
+
+    def goal_reached(self, state) -> bool:
+        """Returns whether a state satisfies the goals."""
+
+        raise NotImplementedError
+
+    def state_key(self, state) -> Hashable:
+        """Returns a hashable snapshot of a state, equal for equal states."""
+
+        raise NotImplementedError
+
+    def validate(self, plan: Union[SequentialPlan, Sequence, None]) -> ValidationReport:
+        """
+        Validates a plan by simulating it from the initial state of the problem.
+
+        Arguments:
+            plan (Union[SequentialPlan, Sequence, None]): The plan, None counts as an invalid empty plan.
+
+        Returns:
+            ValidationReport: The outcome, with the first failing step of invalid plans.
+        """
+
+        if plan is None:
+            return ValidationReport(False, 0, "no plan")
+        return self._simulate(plan_actions(plan))
+
+    def _simulate(self, actions: Sequence[tuple[str, Sequence[str]]]) -> ValidationReport:
+
+        # Simulation through apply. Validators whose state fits in local variables override it with a loop over the
+        # step function apply is built on, so the domain actions are implemented once.
+        state = self.initial_state()
+        apply = self.apply
+        for step, (name, parameters) in enumerate(actions):
+            if not apply(state, name, parameters):
+                return self._rejected(step, name, parameters)
+
+        if not self.goal_reached(state):
+            return ValidationReport(False, len(actions), "goal not reached")
+        return ValidationReport(True)
+
+    def _rejected(self, step: int, name: str, parameters: Sequence[str]) -> ValidationReport:
+        if name not in self.ACTIONS:
+            return ValidationReport(False, step, f"unknown action {name}")
+        return ValidationReport(False, step, f"{name}({', '.join(parameters)}) is not applicable")
+
+
+class _MazeState:
+    __slots__ = "x", "y", "facing"
+
+    def __init__(self, x: int, y: int, facing: int):
+        self.x, self.y, self.facing = x, y, facing
+
+
+class MazeValidator(PlanValidator):
+
+    ACTIONS = (*MOVE_ACTIONS, TURN_LEFT, TURN_RIGHT)
+
+    # Moves by name, with the direction they require and the offset they apply.
+    _MOVES = {
+        name: (direction, *offset) for direction, (name, offset) in enumerate(zip(MOVE_ACTIONS, DIRECTION_OFFSETS))
+    }
+
+    def __init__(self, cells: np.ndarray, start: tuple[int, int], goal: tuple[int, int]):
+        """
+        Validates plans of the maze domain, where the agent turns and moves forwards on x{i} and y{i} coordinates.
+
+        Arguments:
+            cells (np.ndarray): Boolean (width, height) occupancy of the maze.
+            start (tuple[int, int]): The starting position, the agent initially faces north.
+            goal (tuple[int, int]): The goal position.
+        """
+
+        width, height = cells.shape
+        self._height = height
+        self._path = cells.astype(np.uint8).tobytes()
+        self._start = start
+        self._goal = goal
+        self._xs = {f"x{i}": i for i in range(width)}
+        self._ys = {f"y{i}": i for i in range(height)}
+        self._directions = {direction: i for i, direction in enumerate(DIRECTIONS)}
+        self.objects = {POSITION: [*self._xs, *self._ys], "direction": list(DIRECTIONS)}
+
+    def _step(self, x: int, y: int, facing: int, name: str, parameters: Sequence[str]) \
+            -> Union[tuple[int, int, int], None]:
+        """
+        Applies an action to the position and direction of the agent.
+
+        Arguments:
+            x (int): Column of the agent.
+            y (int): Row of the agent.
+            facing (int): Index of the direction the agent faces in DIRECTIONS.
+            name (str): Name of the action.
+            parameters (Sequence[str]): Names of the objects the action is applied to.
+
+        Returns:
+            Union[tuple[int, int, int], None]: The next position and direction, or None if the action is not
+            applicable.
+        """
+
+        # Unknown objects and wrong numbers of parameters never satisfy a precondition.
+        try:
+            if name in self._MOVES:
+
+                # at(?x ?y), facing(?d), is-{d}(?d), inc/dec to the next coordinate and path(?xn ?yn).
+                direction, dx, dy = self._MOVES[name]
+                px, py, pxn, pyn, pd = parameters
+                px, py, pxn, pyn, pd = self._xs[px], self._ys[py], self._xs[pxn], self._ys[pyn], self._directions[pd]
+                if not (px == x and py == y and pd == facing == direction
+                        and pxn == x + dx and pyn == y + dy and self._path[pxn * self._height + pyn]):
+                    return None
+                return pxn, pyn, facing
+
+            if name in (TURN_LEFT, TURN_RIGHT):
+
+                # facing(?d) and left-rot(?d ?dn) or right-rot(?d ?dn).
+                pd, pdn = parameters
+                pd, pdn = self._directions[pd], self._directions[pdn]
+                rotation = 1 if name == TURN_RIGHT else -1
+                if not (pd == facing and pdn == (pd + rotation) % len(DIRECTIONS)):
+                    return None
+                return x, y, pdn
+
+        except (KeyError, ValueError):
+            return None
+        return None
+
+    def _simulate(self, actions: Sequence[tuple[str, Sequence[str]]]) -> ValidationReport:
+        step_function = self._step
+        (x, y), facing = self._start, 0
+
+        for step, (name, parameters) in enumerate(actions):
+            state = step_function(x, y, facing, name, parameters)
+            if state is None:
+                return self._rejected(step, name, parameters)
+            x, y, facing = state
+
+        if (x, y) != self._goal:
+            return ValidationReport(False, len(actions), "goal not reached")
+        return ValidationReport(True)
+
+    def initial_state(self) -> _MazeState:
+        return _MazeState(*self._start, 0)
+
+    def apply(self, state: _MazeState, name: str, parameters: Sequence[str]) -> bool:
+        result = self._step(state.x, state.y, state.facing, name, parameters)
+        if result is None:
+            return False
+        state.x, state.y, state.facing = result
+        return True
+
+    def goal_reached(self, state: _MazeState) -> bool:
+        return (state.x, state.y) == self._goal
+
+    def state_key(self, state: _MazeState) -> Hashable:
+        return state.x, state.y, state.facing
+
+
+class _ReducedMazeState:
+    __slots__ = "current",
+
+    def __init__(self, current: int):
+        self.current = current
+
+
+class ReducedMazeValidator(PlanValidator):
+
+    ACTIONS = (MOVE,)
+
+    def __init__(self, names: Sequence[str], paths, start: int, goal: int):
+        """
+        Validates plans of the reduced_maze domain, where the agent moves along path facts between objects.
+
+        Arguments:
+            names (Sequence[str]): Names of the position objects.
+            paths (array-like): An (m, 2) array of path(?x ?xn) facts as indices into the names.
+            start (int): Index of the starting object.
+            goal (int): Index of the goal object.
+        """
+
+        count = len(names)
+        self._count = count
+        self._index = {name: i for i, name in enumerate(names)}
+        self._paths = {a * count + b for a, b in np.asarray(paths).reshape(-1, 2).tolist()}
+        self._start = start
+        self._goal = goal
+        self.objects = {POSITION: list(names)}
+
+    def _step(self, current: int, name: str, parameters: Sequence[str]) -> Union[int, None]:
+        """
+        Applies an action to the position of the agent.
+
+        Arguments:
+            current (int): Index of the object the agent is at.
+            name (str): Name of the action.
+            parameters (Sequence[str]): Names of the objects the action is applied to.
+
+        Returns:
+            Union[int, None]: Index of the next object, or None if the action is not applicable.
+        """
+
+        if name != MOVE:
+            return None
+
+        # at(?x) and path(?x ?xn).
+        try:
+            x, xn = parameters
+            x, xn = self._index[x], self._index[xn]
+        except (KeyError, ValueError):
+            return None
+        if x != current or x * self._count + xn not in self._paths:
+            return None
+        return xn
+
+    def _simulate(self, actions: Sequence[tuple[str, Sequence[str]]]) -> ValidationReport:
+        step_function = self._step
+        current = self._start
+
+        for step, (name, parameters) in enumerate(actions):
+            current_or_none = step_function(current, name, parameters)
+            if current_or_none is None:
+                return self._rejected(step, name, parameters)
+            current = current_or_none
+
+        if current != self._goal:
+            return ValidationReport(False, len(actions), "goal not reached")
+        return ValidationReport(True)
+
+    def initial_state(self) -> _ReducedMazeState:
+        return _ReducedMazeState(self._start)
+
+    def apply(self, state: _ReducedMazeState, name: str, parameters: Sequence[str]) -> bool:
+        current = self._step(state.current, name, parameters)
+        if current is None:
+            return False
+        state.current = current
+        return True
+
+    def goal_reached(self, state: _ReducedMazeState) -> bool:
+        return state.current == self._goal
+
+    def state_key(self, state: _ReducedMazeState) -> Hashable:
+        return state.current
+
+
+class _SnakeState:
+    __slots__ = "head", "tail", "spawn", "body", "blocked", "apple_at"
+
+    def __init__(self, head: int, tail: int, spawn: int, body: set, blocked: bytearray, apple_at: bytearray):
+        self.head, self.tail, self.spawn = head, tail, spawn
+        self.body, self.blocked, self.apple_at = body, blocked, apple_at
+
+
+class SnakeValidator(PlanValidator):
+
+    ACTIONS = (MOVE, MOVE_AND_EAT, MOVE_AND_EAT_NO_SPAWN)
+
+    def __init__(self, board: np.ndarray, head: tuple[int, int], tail: tuple[int, int], apples: np.ndarray):
+        """
+        Validates plans of the snake domain.
+        Position objects are the board cells named p{x}-{y}, followed by the dummy point ending the apple spawns.
+
+        Arguments:
+            board (np.ndarray): Boolean (width, height) occupancy of the board.
+            head (tuple[int, int]): Initial position of the head.
+            tail (tuple[int, int]): Initial position of the tail.
+            apples (np.ndarray): A (k, 2) array of apple positions, in the order they appear.
+        """
+
+        positions = np.argwhere(board).tolist()
+        tiles = {tuple(position): i for i, position in enumerate(positions)}
+        count = len(positions) + 1
+        dummy = count - 1
+
+        self._count = count
+        self._dummy = dummy
+        names = [f"p{x}-{y}" for x, y in positions] + [DUMMYPOINT]
+        self._index = {name: i for i, name in enumerate(names)}
+        self.objects = {POSITION: names}
+
+        # path(?x ?y) between orthogonal neighbours on the board, in both directions.
+        self._paths = set()
+        for (x, y), i in tiles.items():
+            for dx, dy in DIRECTION_OFFSETS:
+                neighbour = tiles.get((x + dx, y + dy))
+                if neighbour is not None:
+                    self._paths.add(i * count + neighbour)
+
+        apples = [tiles[tuple(apple)] for apple in np.asarray(apples).tolist()]
+        self._head = tiles[tuple(head)]
+        self._tail = tiles[tuple(tail)]
+        self._apples = apples
+        self._first_spawn = apples[1] if len(apples) > 1 else None
+        self._next_apple = dict(zip(apples[1:], apples[2:] + [dummy]))
+
+    def initial_state(self) -> _SnakeState:
+
+        # The body holds the body-con(?x ?y) facts encoded as x * count + y, blocked cells and apples are byte masks.
+        blocked = bytearray(self._count)
+        blocked[self._head] = blocked[self._tail] = 1
+        apple_at = bytearray(self._count)
+        if self._apples:
+            apple_at[self._apples[0]] = 1
+        body = {self._head * self._count + self._tail}
+        return _SnakeState(self._head, self._tail, self._first_spawn, body, blocked, apple_at)
+
+    def apply(self, state: _SnakeState, name: str, parameters: Sequence[str]) -> bool:
+        count, blocked, apple_at = self._count, state.blocked, state.apple_at
+
+        # Unknown objects and wrong numbers of parameters never satisfy a precondition.
+        try:
+            if name == MOVE:
+
+                # head-at(?head), path(?head ?newhead), tail-at(?tail), body-con(?newtail ?tail),
+                # not blocked(?newhead) and not apple-at(?newhead).
+                h, nh, t, nt = (self._index[parameter] for parameter in parameters)
+                if not (h == state.head and h * count + nh in self._paths and t == state.tail
+                        and nt * count + t in state.body and not blocked[nh] and not apple_at[nh]):
+                    return False
+                blocked[t] = 0
+                state.body.discard(nt * count + t)
+                blocked[nh] = 1
+                state.body.add(nh * count + h)
+                state.head, state.tail = nh, nt
+                return True
+
+            if name == MOVE_AND_EAT:
+
+                # head-at(?head), path(?head ?newhead), not blocked(?newhead), apple-at(?newhead),
+                # spawn-apple(?spawn), next-apple(?spawn ?nextspawn) and not is-dummypoint(?spawn).
+                h, nh, s, ns = (self._index[parameter] for parameter in parameters)
+                if not (h == state.head and h * count + nh in self._paths and not blocked[nh] and apple_at[nh]
+                        and s == state.spawn and self._next_apple.get(s) == ns and s != self._dummy):
+                    return False
+                apple_at[nh] = 0
+                blocked[nh] = 1
+                state.body.add(nh * count + h)
+                apple_at[s] = 1
+                state.head, state.spawn = nh, ns
+                return True
+
+            if name == MOVE_AND_EAT_NO_SPAWN:
+
+                # head-at(?head), path(?head ?newhead), not blocked(?newhead), apple-at(?newhead),
+                # is-dummypoint(?dummypoint) and spawn-apple(?dummypoint).
+                h, nh, d = (self._index[parameter] for parameter in parameters)
+                if not (h == state.head and h * count + nh in self._paths and not blocked[nh] and apple_at[nh]
+                        and d == self._dummy and state.spawn == self._dummy):
+                    return False
+                apple_at[nh] = 0
+                blocked[nh] = 1
+                state.body.add(nh * count + h)
+                state.head = nh
+                return True
+
+        except (KeyError, ValueError):
+            return False
+        return False
+
+    def goal_reached(self, state: _SnakeState) -> bool:
+        return not any(state.apple_at[apple] for apple in self._apples)
+
+    def state_key(self, state: _SnakeState) -> Hashable:
+
+        # Blocked cells follow from the body, so they are left out.
+        return state.head, state.tail, state.spawn, frozenset(state.body), bytes(state.apple_at)
@@ -0,0 +1,245 @@
+"""
+**Generalised program cache**
+
+This module keeps synthesised generalised programs on disk so later generalised planning runs can reuse them
+instead of running synthesis again.
+
+Classes:
+    - ``ProgramCache``: Size-bounded store of programs with hit and miss statistics.
+
+Functions:
+    - ``training_fingerprint``: Canonical digest of a set of PDDL problems.
+
+Programs are stored per domain digest, program line count and theory, together with the fingerprint of the problems
+they were synthesised from. A lookup first tries the program synthesised from the same problems, then every other
+program of the same domain, line count and theory, most recently used first. A program is only returned once it
+solves every problem of the new set, so a cached program is never worse than a freshly synthesised one. Entries
+failing their integrity check are removed with a warning and counted as corrupt. When the cache outgrows its size or
+entry limit, the least recently used programs are evicted.
+
+Example usage::
+
+    # Synthesise once, later runs on the same or a compatible problem set reuse the program
+    generator = SnakeProblemGenerator(problem_count=10, auto=True, seed=3, program_cache_directory="programs")
+    generator.solve_all()
+    print(generator.program_cache.statistics())
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import warnings
+from typing import Callable, Iterable, Union
+from src.programs import GeneralisedProgram
+
+_PROBLEM_NAME = re.compile(r"\(define \(problem [^)]*\)|\(:domain [^)]*\)")
+
+
+def training_fingerprint(problems: Iterable[str]) -> str:
+    """
+    Returns a canonical digest of a set of PDDL problems, independent of their order and names.
+
+    Arguments:
+        problems (Iterable[str]): PDDL texts of the problems.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest.
+    """
+
+    digests = sorted(hashlib.sha256(_PROBLEM_NAME.sub("", text).encode()).hexdigest() for text in problems)
+    return hashlib.sha256("\n".join(digests).encode()).hexdigest()
+
+
+class ProgramCache:
+
+    def __init__(self, directory: str, max_bytes: int = 2 ** 24, max_entries: int = 1000):
+        """
+        Size-bounded store of generalised programs with hit and miss statistics.
+
+        Arguments:
+            directory (str): Directory of the cache, created if missing.
+            max_bytes (int): Size limit of the cache, least recently used programs are evicted beyond it.
+            max_entries (int): Number of programs kept, least recently used programs are evicted beyond it.
+        """
+
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._max_entries = max_entries
+        self._statistics = {"hits": 0, "exact_hits": 0, "misses": 0, "rejected": 0, "stores": 0, "evictions": 0,
+                            "corrupt": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(fields: dict) -> str:
+        """
+        Returns the address of the program described by the given fields.
+
+        Arguments:
+            fields (dict): JSON serializable values, the domain digest, program lines, theory and training fingerprint.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest of the fields.
+        """
+
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, f"{key}.json")
+
+    def _read(self, key: str) -> Union[dict, None]:
+        """
+        Reads an entry and checks the digest of its program, removing the entry if it differs.
+
+        Arguments:
+            key (str): Address of the entry.
+
+        Returns:
+            Union[dict, None]: The entry, or None if it is missing or corrupt.
+        """
+
+        path = self._path(key)
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+            if hashlib.sha256(entry["program"].encode()).hexdigest() == entry["digest"]:
+                return entry
+        except (OSError, ValueError, KeyError):
+            if not os.path.exists(path):
+                return None
+
+        warnings.warn(f"program cache entry {key} failed its integrity check and was removed")
+        self._statistics["corrupt"] += 1
+        with contextlib.suppress(OSError):
+            os.remove(path)
+        return None
+
+    def _entries(self) -> list[tuple[float, str, int]]:
+        """
+        Lists the entries of the cache.
+
+        Returns:
+            list[tuple[float, str, int]]: Last use time, address and size in bytes of every entry.
+        """
+
+        entries = []
+        for name in os.listdir(self._directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self._directory, name)
+            entries.append((os.path.getmtime(path), name.removesuffix(".json"), os.path.getsize(path)))
+        return entries
+
+    def lookup(self, fields: dict, fingerprint: str, solves: Callable[[GeneralisedProgram], bool]) \
+            -> Union[GeneralisedProgram, None]:
+        """
+        Finds a cached program solving every problem of a set.
+
+        Arguments:
+            fields (dict): The domain digest, program lines and theory of the synthesis.
+            fingerprint (str): Training fingerprint of the problem set.
+            solves (Callable[[GeneralisedProgram], bool]): Whether a program solves every problem of the set.
+
+        Returns:
+            Union[GeneralisedProgram, None]: The program, or None if no cached program solves the set.
+        """
+
+        exact = self.key({**fields, "fingerprint": fingerprint})
+        candidates = [key for _, key, _ in sorted(self._entries(), reverse=True) if key != exact]
+        for key in [exact] + candidates:
+            entry = self._read(key)
+            if entry is None or entry["fields"] != fields:
+                continue
+
+            program = GeneralisedProgram(entry["program"])
+            if not solves(program):
+                self._statistics["rejected"] += 1
+                continue
+
+            # The modification time records the last use of an entry.
+            os.utime(self._path(key))
+            self._statistics["hits"] += 1
+            self._statistics["exact_hits"] += key == exact
+            return program
+
+        self._statistics["misses"] += 1
+        return None
+
+    def store(self, fields: dict, fingerprint: str, program: GeneralisedProgram) -> None:
+        """
+        Stores a program synthesised from a problem set, replacing any program stored for the same set.
+
+        Arguments:
+            fields (dict): The domain digest, program lines and theory of the synthesis.
+            fingerprint (str): Training fingerprint of the problem set.
+            program (GeneralisedProgram): The synthesised program.
+        """
+
+        key = self.key({**fields, "fingerprint": fingerprint})
+        path = self._path(key)
+
+        # Replaced atomically, so a reader never sees a partially written entry.
+        with open(f"{path}.tmp", "w") as file:
+            json.dump({
+                "fields": fields,
+                "fingerprint": fingerprint,
+                "program": program.text,
+                "digest": hashlib.sha256(program.text.encode()).hexdigest(),
+            }, file, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+        self._statistics["stores"] += 1
+        self._evict(keep=key)
+
+    def _evict(self, keep: str = None) -> None:
+        """
+        Removes least recently used entries until the cache fits its size and entry limits.
+
+        Arguments:
+            keep (str, optional): Address of an entry that is never evicted, e.g. the one just written.
+        """
+
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        count = len(entries)
+        for _, key, size in entries:
+            if total <= self._max_bytes and count <= self._max_entries:
+                break
+            if key == keep:
+                continue
+            with contextlib.suppress(OSError):
+                os.remove(self._path(key))
+            total -= size
+            count -= 1
+            self._statistics["evictions"] += 1
+
+    def size(self) -> int:
+        """Returns the total size of the cache in bytes."""
+
+        return sum(size for _, _, size in self._entries())
+
+    def statistics(self) -> dict:
+        """
+        Returns the statistics of this cache since it was opened.
+
+        Returns:
+            dict: Counts of hits, hits on the program of the same problem set, misses, cached programs rejected by
+            validation, stores, evictions and entries removed after failing their integrity check, with the hit rate
+            and the current number of entries and bytes.
+        """
+
+        lookups = self._statistics["hits"] + self._statistics["misses"]
+        entries = self._entries()
+        return {
+            **self._statistics,
+            "hit_rate": self._statistics["hits"] / lookups if lookups else None,
+            "entries": len(entries),
+            "bytes": sum(size for _, _, size in entries),
+        }
+
+    def clear(self) -> None:
+        """Removes every program of the cache."""
+
+        for _, key, _ in self._entries():
+            with contextlib.suppress(OSError):
+                os.remove(self._path(key))
@@ -0,0 +1,278 @@
+"""
+**Generalised program execution**
+
+This module runs generalised programs synthesised by BFGP++ natively on problems, producing a concrete plan for
+each problem without calling the planner again.
+
+Classes:
+    - ``ProgramExecution``: Outcome of running a program on a problem.
+    - ``GeneralisedProgram``: A parsed BFGP++ program with for-loops over object pointers.
+    - ``SynthesisReport``: How a program was obtained by generalised planning.
+
+Programs are numbered instruction lists as written to BFGP++ program files, e.g.::
+
+    0. for(ptr_position_0++,3)
+    1. move(ptr_position_1,ptr_position_0)
+    2. endfor(ptr_position_0++,0)
+    3. end
+
+Every pointer ranges over the objects of its type, in the order the objects are written to PDDL, and starts at the
+first object. A for-loop visits every object of its pointer in the given direction, leaving the pointer at the last
+object visited. Planning actions are applied to the objects the pointers refer to and are skipped when their
+preconditions do not hold. The goals are checked when the program ends.
+
+Executions are deterministic, so reaching the same loop back edge twice with the same pointers and state means the
+program never ends; such executions are stopped and reported as infinite loops.
+
+Example usage::
+
+    # Run a program on every problem of a generator and keep the plans
+    program = GeneralisedProgram.from_file("plan_temp/dk.prog")
+    executions = generator.run_program(program)
+    plans = [execution.plan for execution in executions if execution.status == SOLVED]
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Union
+from src.plan_validators import PlanValidator
+
+# Name of the program file BFGP++ writes to its translated problem directory.
+PROGRAM_FILE = "dk.prog"
+
+# Theory of the programs BFGP++ synthesises, which this module executes.
+PROGRAM_THEORY = "cpp"
+
+# Statuses of an execution.
+SOLVED, FAILED, INFINITE_LOOP, STEP_LIMIT = "solved", "failed", "infinite_loop", "step_limit"
+
+# Outcomes of a synthesis run that found no program.
+SYNTHESIS_FAILED, SYNTHESIS_CANCELLED, SYNTHESIS_CRASHED = "failed", "cancelled", "crashed"
+
+# Operation codes of the parsed instructions.
+_ACTION, _FOR, _END_FOR, _EMPTY, _END = range(5)
+
+_INSTRUCTION = re.compile(r"^\s*(?:\d+\.\s*)?(.*?)\s*$")
+_LOOP = re.compile(r"^(for|endfor)\((\w+?)(\+\+|--),(\d+)\)$")
+_ACTION_CALL = re.compile(r"^([\w-]+)\(([^()]*)\)$")
+_POINTER = re.compile(r"^ptr_(\w+)_(\d+)$")
+
+
+@dataclass
+class ProgramExecution:
+    """
+    Outcome of running a program on a problem.
+
+    Attributes:
+        status (str): SOLVED if the program ended in a goal state, FAILED if it ended elsewhere, INFINITE_LOOP if it
+            would never end, or STEP_LIMIT if it ran out of steps first.
+        plan (list[tuple[str, list[str]]]): The applied actions as (action name, parameter names) pairs.
+        steps (int): Number of instructions executed.
+    """
+
+    status: str
+    plan: list[tuple[str, list[str]]] = field(default_factory=list)
+    steps: int = 0
+
+
+@dataclass
+class SynthesisReport:
+    """
+    How a program was obtained by generalised planning.
+
+    Attributes:
+        rounds (int): Number of synthesis runs, 0 if a cached program was reused.
+        training_size (int): Number of problems the last synthesis run was given.
+        problem_count (int): Number of problems the program had to solve.
+        seconds (float): Wall-clock time of synthesis and validation.
+        solved (bool): Whether the program solves every problem.
+        program_lines (int): Number of program lines of the synthesis that produced the program, if known.
+        timings (dict[int, dict]): Status and seconds of every synthesis run keyed by number of program lines, when
+            several numbers of program lines were tried.
+    """
+
+    rounds: int
+    training_size: int
+    problem_count: int
+    seconds: float
+    solved: bool
+    program_lines: Union[int, None] = None
+    timings: dict[int, dict] = field(default_factory=dict)
+
+
+class GeneralisedProgram:
+
+    def __init__(self, text: str):
+        """
+        A parsed BFGP++ program.
+
+        Arguments:
+            text (str): The program, one numbered instruction per line.
+        """
+
+        self.text = text
+        self._pointers = {}
+        self._instructions = [self._parse(line) for line in text.splitlines() if line.strip()]
+        if not self._instructions or self._instructions[-1][0] != _END:
+            self._instructions.append((_END,))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'GeneralisedProgram':
+        """
+        Reads a program from a BFGP++ program file.
+
+        Arguments:
+            path (str): Path of the file, e.g. the dk.prog written by synthesis.
+
+        Returns:
+            GeneralisedProgram: The parsed program.
+        """
+
+        with open(path) as file:
+            return cls(file.read())
+
+    def __len__(self) -> int:
+        return len(self._instructions)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def _pointer(self, name: str) -> int:
+
+        # Pointers are numbered in order of appearance, each keeps the type it ranges over.
+        match = _POINTER.match(name)
+        if match is None:
+            raise ValueError(f"'{name}' is not a pointer")
+        if name not in self._pointers:
+            self._pointers[name] = (len(self._pointers), match.group(1))
+        return self._pointers[name][0]
+
+    def _parse(self, line: str) -> tuple:
+        """
+        Parses an instruction.
+
+        Arguments:
+            line (str): The instruction, optionally prefixed by its line number.
+
+        Returns:
+            tuple: The operation code followed by its operands.
+        """
+
+        instruction = _INSTRUCTION.match(line).group(1)
+        if instruction == "end":
+            return (_END,)
+        if instruction == "empty":
+            return (_EMPTY,)
+
+        loop = _LOOP.match(instruction)
+        if loop is not None:
+            keyword, pointer, direction, target = loop.groups()
+            code = _FOR if keyword == "for" else _END_FOR
+            return code, self._pointer(pointer), 1 if direction == "++" else -1, int(target)
+
+        action = _ACTION_CALL.match(instruction)
+        if action is not None:
+            name, arguments = action.groups()
+            pointers = tuple(self._pointer(argument.strip()) for argument in arguments.split(",") if argument.strip())
+            return _ACTION, name, pointers
+
+        raise ValueError(f"Unsupported program instruction '{instruction}'")
+
+    def run(self, validator: PlanValidator, max_steps: int = 10 ** 6) -> ProgramExecution:
+        """
+        Runs the program on a problem.
+
+        Arguments:
+            validator (PlanValidator): Validator of the problem, providing its objects, states and actions.
+            max_steps (int): Number of instructions executed before the run is stopped.
+
+        Returns:
+            ProgramExecution: The status, the plan of applied actions and the number of instructions executed.
+        """
+
+        types = [pointer_type for _, pointer_type in sorted(self._pointers.values())]
+        objects = [validator.objects.get(pointer_type, []) for pointer_type in types]
+        pointers = [0] * len(types)
+        instructions = self._instructions
+        state = validator.initial_state()
+        apply = validator.apply
+
+        plan = []
+        visited = set()
+        line = 0
+        for steps in range(max_steps):
+            instruction = instructions[line]
+            code = instruction[0]
+
+            if code == _ACTION:
+                _, name, arguments = instruction
+                try:
+                    parameters = [objects[pointer][pointers[pointer]] for pointer in arguments]
+                except IndexError:
+                    parameters = None
+                if parameters is not None and apply(state, name, parameters):
+                    plan.append((name, parameters))
+                line += 1
+
+            elif code == _FOR:
+                _, pointer, direction, end = instruction
+                count = len(objects[pointer])
+                if count == 0:
+                    line = end + 1
+                else:
+                    pointers[pointer] = 0 if direction > 0 else count - 1
+                    line += 1
+
+            elif code == _END_FOR:
+                _, pointer, direction, start = instruction
+                value = pointers[pointer] + direction
+                if not 0 <= value < len(objects[pointer]):
+                    line += 1
+                    continue
+
+                # A back edge taken twice with the same pointers and state repeats forever.
+                pointers[pointer] = value
+                key = (line, tuple(pointers), validator.state_key(state))
+                if key in visited:
+                    return ProgramExecution(INFINITE_LOOP, plan, steps + 1)
+                visited.add(key)
+                line = start + 1
+
+            elif code == _EMPTY:
+                line += 1
+
+            else:
+                status = SOLVED if validator.goal_reached(state) else FAILED
+                return ProgramExecution(status, plan, steps + 1)
+
+        return ProgramExecution(STEP_LIMIT, plan, max_steps)
+
+    def run_batch(self, validators: Iterable[PlanValidator], max_steps: int = 10 ** 6) -> list[ProgramExecution]:
+        """
+        Runs the program on a batch of problems.
+
+        Arguments:
+            validators (Iterable[PlanValidator]): Validators of the problems.
+            max_steps (int): Number of instructions executed per problem before its run is stopped.
+
+        Returns:
+            list[ProgramExecution]: The outcome for every problem, in order.
+        """
+
+        return [self.run(validator, max_steps) for validator in validators]
+
+
+def load_program(program: Union[str, GeneralisedProgram]) -> GeneralisedProgram:
+    """
+    Resolves a program.
+
+    Arguments:
+        program (Union[str, GeneralisedProgram]): A program, or the path of a BFGP++ program file.
+
+    Returns:
+        GeneralisedProgram: The program.
+    """
+
+    if isinstance(program, GeneralisedProgram):
+        return program
+    return GeneralisedProgram.from_file(program)
@@ -0,0 +1,120 @@
+"""
+**Benchmark result store**
+
+This module keeps benchmark measurements in an append-only JSON Lines file, so long sweeps survive crashes and
+restarts and resume where they stopped.
+
+Classes:
+    - ``ResultStore``: Durable, append-only store of measurement records grouped by experiment.
+
+Every record is one line holding the key of its experiment, and is flushed to disk before the next one is written.
+A line cut short by a crash is ignored when the store is read. Stores without a path keep their records in memory.
+
+Example usage::
+
+    # Record a measurement and find it again after a restart
+    store = ResultStore("results.jsonl")
+    store.append(key, {"value": 8, "repetition": 0, "solve": 0.25})
+    records = ResultStore("results.jsonl").records(key)
+"""
+
+import hashlib
+import json
+import os
+from typing import Union
+
+
+class ResultStore:
+
+    def __init__(self, path: Union[str, None] = None):
+        """
+        Durable, append-only store of measurement records grouped by experiment.
+
+        Arguments:
+            path (str, optional): Path of the JSON Lines file, created on the first append. None keeps records in
+                memory only.
+        """
+
+        self._path = path
+        self._memory: list[dict] = []
+
+    @property
+    def path(self) -> Union[str, None]:
+        return self._path
+
+    @staticmethod
+    def key(fields: dict) -> str:
+        """
+        Returns the key of the experiment described by the given fields.
+
+        Arguments:
+            fields (dict): JSON serializable settings determining the measurements, e.g. generator, variable and seed.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest of the fields.
+        """
+
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    def append(self, key: str, record: dict) -> None:
+        """
+        Appends a record and forces it to disk.
+
+        Arguments:
+            key (str): Key of the experiment of the record.
+            record (dict): JSON serializable measurement.
+        """
+
+        record = {"experiment": key, **record}
+        if self._path is None:
+            self._memory.append(record)
+            return
+
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self._path, "a+b") as file:
+            # A line cut short by a crash is terminated, so it does not swallow this record.
+            if file.tell() > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    file.write(b"\n")
+            file.write((json.dumps(record, sort_keys=True) + "\n").encode())
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _read(self) -> list[dict]:
+        """
+        Reads every complete record.
+
+        Returns:
+            list[dict]: The records in the order they were appended.
+        """
+
+        if self._path is None:
+            return list(self._memory)
+        if not os.path.exists(self._path):
+            return []
+
+        records = []
+        with open(self._path) as file:
+            for line in file:
+                # Only the last line can be incomplete, when a write was interrupted.
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    def records(self, key: str) -> list[dict]:
+        """
+        Returns the records of an experiment.
+
+        Arguments:
+            key (str): Key of the experiment.
+
+        Returns:
+            list[dict]: The records in the order they were appended.
+        """
+
+        return [record for record in self._read() if record.get("experiment") == key]
@@ -0,0 +1,97 @@
+"""
+**Direct PDDL problem serialization**
+
+This module writes PDDL problem files straight from object names and facts, without building unified planning
+problems. The layout and naming match PDDLWriter, so files written here are interchangeable with its output.
+
+Functions:
+    - ``pddl_name``: Returns the name PDDLWriter uses for an object.
+    - ``format_problem``: Formats a PDDL problem in the layout used by PDDLWriter.
+    - ``write_problems``: Writes problems to one file each.
+    - ``write_archive``: Writes problems into a single compressed zip archive.
+
+Example usage::
+
+    # Format a reduced maze problem with a single path between the start and the goal
+    text = format_problem(
+        "reduced_maze0",
+        [("position", ["start", "goal"])],
+        ["(at start)", "(path start goal_)", "(path goal_ start)"],
+        ["(at goal_)"]
+    )
+    write_problems("problem_temp", [("reduced_maze0", text)])
+"""
+
+import os
+import zipfile
+from typing import Iterable, Sequence
+from unified_planning.io.pddl_writer import GENERAL_PDDL_KEYWORDS
+
+
+def pddl_name(name: str) -> str:
+    """
+    Returns the name PDDLWriter uses for an object, names clashing with PDDL keywords get a trailing underscore.
+
+    Arguments:
+        name (str): Name of the object.
+
+    Returns:
+        str: The PDDL name.
+    """
+
+    return f"{name}_" if name in GENERAL_PDDL_KEYWORDS else name
+
+
+def format_problem(name: str,
+                   objects: Sequence[tuple[str, Sequence[str]]],
+                   init: Iterable[str],
+                   goals: Iterable[str]) -> str:
+    """
+    Formats a PDDL problem in the layout used by PDDLWriter.
+
+    Arguments:
+        name (str): Name of the problem, the domain is named after it as PDDLWriter does.
+        objects (Sequence[tuple[str, Sequence[str]]]): Object names grouped by type, in the order of the domain types.
+        init (Iterable[str]): Formatted initial state atoms, e.g. "(path p0-0 p0-1)".
+        goals (Iterable[str]): Formatted goal conditions.
+
+    Returns:
+        str: The PDDL problem.
+    """
+
+    parts = [f"(define (problem {name}-problem)\n (:domain {name}-domain)\n (:objects"]
+    parts.extend(f"\n   {' '.join(names)} - {type_name}" for type_name, names in objects if names)
+    parts.append("\n )\n (:init")
+    parts.extend(f"\n              {atom}" for atom in init)
+    parts.append("\n )\n (:goal (and \n           ")
+    parts.append("\n           ".join(goals))
+    parts.append("\n        )\n )\n)\n")
+    return "".join(parts)
+
+
+def write_problems(directory: str, problems: Iterable[tuple[str, str]]) -> None:
+    """
+    Writes problems to one file each, every file is written with a single buffered call.
+
+    Arguments:
+        directory (str): Directory of the problem files.
+        problems (Iterable[tuple[str, str]]): Problem names and texts, each written to {directory}/{name}.pddl.
+    """
+
+    for name, text in problems:
+        with open(os.path.join(directory, f"{name}.pddl"), "w") as file:
+            file.write(text)
+
+
+def write_archive(path: str, problems: Iterable[tuple[str, str]]) -> None:
+    """
+    Writes problems into a single deflate-compressed zip archive.
+
+    Arguments:
+        path (str): Path of the archive.
+        problems (Iterable[tuple[str, str]]): Problem names and texts, each stored as {name}.pddl.
+    """
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, text in problems:
+            archive.writestr(f"{name}.pddl", text)
@@ -0,0 +1,195 @@
+"""
+**Native grid search**
+
+This module solves problems by searching their state graph directly instead of grounding PDDL. States are
+integers, e.g. indices of grid cells, and every action has unit cost, so all searches return shortest paths.
+
+Classes:
+    - ``SearchProblem``: A state graph with a start state and goal states.
+
+Functions:
+    - ``breadth_first_search``: Breadth-first search from the start.
+    - ``a_star_search``: A* search guided by an admissible heuristic.
+    - ``bidirectional_search``: Breadth-first searches from the start and backwards from the goals.
+    - ``get_search``: Resolves a search by name.
+
+Example usage::
+
+    # Shortest path on a ring of six states
+    ring = lambda state: ((state + 1) % 6, (state - 1) % 6)
+    states = get_search("bidirectional")(SearchProblem(0, {3}, ring, ring))
+"""
+
+import heapq
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Iterable, Union
+
+
+@dataclass
+class SearchProblem:
+    """
+    A state graph with a start state and goal states.
+
+    Attributes:
+        start (int): The start state.
+        goals (set[int]): The goal states.
+        successors (Callable[[int], Iterable[int]]): States reached from a state by one action.
+        predecessors (Callable[[int], Iterable[int]]): States reaching a state by one action.
+        heuristic (Callable[[int], int]): Admissible estimate of the number of actions from a state to a goal.
+    """
+
+    start: int
+    goals: set[int]
+    successors: Callable[[int], Iterable[int]]
+    predecessors: Callable[[int], Iterable[int]]
+    heuristic: Callable[[int], int] = lambda state: 0
+
+
+def _trace(parents: dict, state: int) -> list[int]:
+
+    # Follows the parent links from the state back to the root of the search.
+    path = []
+    while state is not None:
+        path.append(state)
+        state = parents[state]
+    return path
+
+
+def breadth_first_search(problem: SearchProblem) -> Union[list[int], None]:
+    """
+    Finds a shortest path with breadth-first search from the start.
+
+    Arguments:
+        problem (SearchProblem): The problem to solve.
+
+    Returns:
+        Union[list[int], None]: The states from the start to a goal, or None if no goal is reachable.
+    """
+
+    if problem.start in problem.goals:
+        return [problem.start]
+
+    parents = {problem.start: None}
+    frontier = deque([problem.start])
+    while frontier:
+        state = frontier.popleft()
+        for successor in problem.successors(state):
+            if successor not in parents:
+                parents[successor] = state
+                if successor in problem.goals:
+                    return _trace(parents, successor)[::-1]
+                frontier.append(successor)
+    return None
+
+
+def a_star_search(problem: SearchProblem) -> Union[list[int], None]:
+    """
+    Finds a shortest path with A* search guided by the heuristic of the problem.
+
+    Arguments:
+        problem (SearchProblem): The problem to solve.
+
+    Returns:
+        Union[list[int], None]: The states from the start to a goal, or None if no goal is reachable.
+    """
+
+    parents = {problem.start: None}
+    costs = {problem.start: 0}
+
+    # Ties on the estimate are broken towards deeper states, which are closer to a goal.
+    frontier = [(problem.heuristic(problem.start), 0, problem.start)]
+    while frontier:
+        _, negative_cost, state = heapq.heappop(frontier)
+        if -negative_cost > costs[state]:
+            continue
+        if state in problem.goals:
+            return _trace(parents, state)[::-1]
+
+        cost = costs[state] + 1
+        for successor in problem.successors(state):
+            if cost < costs.get(successor, cost + 1):
+                costs[successor] = cost
+                parents[successor] = state
+                heapq.heappush(frontier, (cost + problem.heuristic(successor), -cost, successor))
+    return None
+
+
+def _expand_layer(layer: list[int],
+                  parents: dict,
+                  others: dict,
+                  neighbours: Callable[[int], Iterable[int]]) -> tuple[list[int], Union[int, None]]:
+    """
+    Expands one layer of a breadth-first search, stopping at the first state reached by the other search.
+
+    Arguments:
+        layer (list[int]): The states at the current depth.
+        parents (dict): Parent links of this search, extended in place.
+        others (dict): Parent links of the other search.
+        neighbours (Callable[[int], Iterable[int]]): Successors or predecessors, depending on the direction.
+
+    Returns:
+        tuple[list[int], Union[int, None]]: The next layer, and the meeting state if the searches met.
+    """
+
+    next_layer = []
+    for state in layer:
+        for neighbour in neighbours(state):
+            if neighbour not in parents:
+                parents[neighbour] = state
+                if neighbour in others:
+                    return next_layer, neighbour
+                next_layer.append(neighbour)
+    return next_layer, None
+
+
+def bidirectional_search(problem: SearchProblem) -> Union[list[int], None]:
+    """
+    Finds a shortest path with breadth-first searches from the start and backwards from the goals, always
+    expanding the smaller layer. The searches are disjoint before they meet, so the first meeting state lies on a
+    shortest path.
+
+    Arguments:
+        problem (SearchProblem): The problem to solve.
+
+    Returns:
+        Union[list[int], None]: The states from the start to a goal, or None if no goal is reachable.
+    """
+
+    if problem.start in problem.goals:
+        return [problem.start]
+
+    forward = {problem.start: None}
+    backward = dict.fromkeys(problem.goals)
+    forward_layer, backward_layer = [problem.start], list(problem.goals)
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = _expand_layer(forward_layer, forward, backward, problem.successors)
+        else:
+            backward_layer, meeting = _expand_layer(backward_layer, backward, forward, problem.predecessors)
+        if meeting is not None:
+            return _trace(forward, meeting)[::-1] + _trace(backward, meeting)[1:]
+    return None
+
+
+SEARCHES: dict[str, Callable[[SearchProblem], Union[list[int], None]]] = {
+    "bfs": breadth_first_search,
+    "astar": a_star_search,
+    "bidirectional": bidirectional_search,
+}
+
+
+def get_search(search: str) -> Callable[[SearchProblem], Union[list[int], None]]:
+    """
+    Resolves a search by name.
+
+    Arguments:
+        search (str): Name of the search in SEARCHES.
+
+    Returns:
+        Callable[[SearchProblem], Union[list[int], None]]: The search function.
+    """
+
+    if search not in SEARCHES:
+        raise ValueError(f"Unknown search '{search}', choose from: {', '.join(SEARCHES)}")
+    return SEARCHES[search]
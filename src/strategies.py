@@ -0,0 +1,254 @@
+"""
+**Maze generation strategies**
+
+This module provides interchangeable strategies for automatically generating maze environments.
+
+Classes:
+    - ``MazeGenerationStrategy``: Interface for all maze generation strategies.
+    - ``RandomWalkStrategy``: Unbiased random walk from the start until the goal is reached.
+    - ``BiasedWalkStrategy``: Random walk that steps towards the goal with a fixed probability.
+    - ``DFSBacktrackerStrategy``: Randomised depth-first search over the maze lattice.
+    - ``PrimStrategy``: Randomised Prim's algorithm over the maze lattice.
+    - ``WilsonStrategy``: Wilson's algorithm, joining loop-erased random walks over the maze lattice.
+
+Lattice strategies carve a spanning tree whose nodes are the tiles with even coordinates, joining two nodes by
+filling the tile between them. They visit every node a bounded number of times, so their run time is linear in the
+grid area (Wilson's algorithm is linear in expectation). With an even tile_size, the last row and column have odd
+coordinates and are never carved, so these mazes span a grid of tile_size - 1.
+
+Example usage::
+
+    # Generate mazes with a depth-first backtracker
+    generator = BlocklyMazeProblemGenerator(problem_count=5, auto=True, maze_strategy="dfs_backtracker")
+"""
+
+import random
+from typing import Union
+from src.environment import GridGeometry, MazeEnvironment, Tile, TileCollection
+
+
+class MazeGenerationStrategy:
+    """Interface for automatic maze generation strategies."""
+
+    def generate(self, geometry: GridGeometry, rng=random) -> MazeEnvironment:
+        """
+        Generates a maze environment.
+
+        Arguments:
+            geometry (GridGeometry): Geometry of the grid the maze is generated on.
+            rng (random.Random, optional): Source of randomness, defaults to the random module.
+
+        Returns:
+            MazeEnvironment: Generated maze environment.
+        """
+
+        raise NotImplementedError
+
+    @staticmethod
+    def _build_environment(geometry: GridGeometry,
+                           positions,
+                           start: tuple[int, int],
+                           goal: tuple[int, int]) -> MazeEnvironment:
+        """
+        Builds a MazeEnvironment from the carved positions.
+
+        Arguments:
+            geometry (GridGeometry): Geometry of the grid.
+            positions (Iterable[tuple[int, int]]): Carved positions, including the start and goal.
+            start (tuple[int, int]): The starting position.
+            goal (tuple[int, int]): The goal position.
+
+        Returns:
+            MazeEnvironment: The maze environment.
+        """
+
+        tiles = TileCollection([Tile(tile_position=position) for position in positions], geometry)
+        return MazeEnvironment(tiles, tiles.find_tile(start), tiles.find_tile(goal))
+
+
+class RandomWalkStrategy(MazeGenerationStrategy):
+    """Unbiased random walk from the start until the goal is reached; the run time is unbounded."""
+
+    def generate(self, geometry: GridGeometry, rng=random) -> MazeEnvironment:
+        available_locations = [(x, y) for x in range(geometry.tile_size) for y in range(geometry.tile_size)]
+
+        # Selects the start and goal locations randomly.
+        start, goal = rng.sample(available_locations, 2)
+        maze = {start: None, goal: None}
+
+        # Iteratively chooses a random neighbour until a path has been created.
+        current = start
+        while True:
+            current = rng.choice(geometry.neighbours(current))
+            if current == goal:
+                break
+            maze.setdefault(current)
+
+        return self._build_environment(geometry, maze, start, goal)
+
+
+class BiasedWalkStrategy(MazeGenerationStrategy):
+
+    def __init__(self, bias: float = 0.5):
+        """
+        Random walk that steps towards the goal with a fixed probability.
+        The expected number of steps is linear in the distance between the start and the goal.
+
+        Arguments:
+            bias (float): Probability of stepping towards the goal, must be in (0, 1].
+        """
+
+        if not 0 < bias <= 1:
+            raise ValueError("bias must be in (0, 1]")
+        self._bias = bias
+
+    def generate(self, geometry: GridGeometry, rng=random) -> MazeEnvironment:
+        available_locations = [(x, y) for x in range(geometry.tile_size) for y in range(geometry.tile_size)]
+        start, goal = rng.sample(available_locations, 2)
+        maze = {start: None, goal: None}
+
+        current = start
+        while current != goal:
+            neighbours = geometry.neighbours(current)
+            if rng.random() < self._bias:
+                distance = abs(current[0] - goal[0]) + abs(current[1] - goal[1])
+                neighbours = [n for n in neighbours if abs(n[0] - goal[0]) + abs(n[1] - goal[1]) < distance]
+            current = rng.choice(neighbours)
+            maze.setdefault(current)
+
+        return self._build_environment(geometry, maze, start, goal)
+
+
+class _LatticeStrategy(MazeGenerationStrategy):
+    """
+    Base class for strategies carving a spanning tree over the tiles with even coordinates.
+    With an even tile_size, the last row and column are never carved.
+    """
+
+    def generate(self, geometry: GridGeometry, rng=random) -> MazeEnvironment:
+        nodes = [(x, y) for x in range(0, geometry.tile_size, 2) for y in range(0, geometry.tile_size, 2)]
+        if len(nodes) < 2:
+            raise ValueError(f"{type(self).__name__} requires a tile_size of at least 3")
+
+        start, goal = rng.sample(nodes, 2)
+        maze = dict.fromkeys(nodes)
+        for node, neighbour in self._spanning_tree(geometry, nodes, rng):
+            maze.setdefault(((node[0] + neighbour[0]) // 2, (node[1] + neighbour[1]) // 2))
+
+        return self._build_environment(geometry, maze, start, goal)
+
+    @staticmethod
+    def _lattice_neighbours(geometry: GridGeometry, node: tuple[int, int]) -> list[tuple[int, int]]:
+        x, y = node
+        candidates = [(x, y + 2), (x + 2, y), (x, y - 2), (x - 2, y)]
+        return [c for c in candidates if geometry.contains(c)]
+
+    def _spanning_tree(self, geometry: GridGeometry, nodes: list[tuple[int, int]], rng) -> list[tuple]:
+        """
+        Computes a random spanning tree of the lattice.
+
+        Arguments:
+            geometry (GridGeometry): Geometry of the grid.
+            nodes (list[tuple[int, int]]): Lattice nodes.
+            rng (random.Random): Source of randomness.
+
+        Returns:
+            list[tuple]: The tree edges as (node, neighbour) pairs.
+        """
+
+        raise NotImplementedError
+
+
+class DFSBacktrackerStrategy(_LatticeStrategy):
+    """Randomised depth-first search over the maze lattice, producing long winding corridors."""
+
+    def _spanning_tree(self, geometry: GridGeometry, nodes: list[tuple[int, int]], rng) -> list[tuple]:
+        root = rng.choice(nodes)
+        visited = {root}
+        stack = [root]
+        edges = []
+        while stack:
+            node = stack[-1]
+            unvisited = [n for n in self._lattice_neighbours(geometry, node) if n not in visited]
+            if not unvisited:
+                stack.pop()
+                continue
+            neighbour = rng.choice(unvisited)
+            visited.add(neighbour)
+            edges.append((node, neighbour))
+            stack.append(neighbour)
+        return edges
+
+
+class PrimStrategy(_LatticeStrategy):
+    """Randomised Prim's algorithm over the maze lattice, producing many short dead ends."""
+
+    def _spanning_tree(self, geometry: GridGeometry, nodes: list[tuple[int, int]], rng) -> list[tuple]:
+        root = rng.choice(nodes)
+        visited = {root}
+        frontier = [(root, neighbour) for neighbour in self._lattice_neighbours(geometry, root)]
+        edges = []
+        while frontier:
+
+            # Removes a random frontier edge in constant time.
+            index = rng.randrange(len(frontier))
+            frontier[index], frontier[-1] = frontier[-1], frontier[index]
+            node, neighbour = frontier.pop()
+
+            if neighbour in visited:
+                continue
+            visited.add(neighbour)
+            edges.append((node, neighbour))
+            frontier.extend((neighbour, n) for n in self._lattice_neighbours(geometry, neighbour) if n not in visited)
+        return edges
+
+
+class WilsonStrategy(_LatticeStrategy):
+    """Wilson's algorithm, producing a uniformly random spanning tree of the maze lattice."""
+
+    def _spanning_tree(self, geometry: GridGeometry, nodes: list[tuple[int, int]], rng) -> list[tuple]:
+        in_tree = {rng.choice(nodes)}
+        edges = []
+        for node in nodes:
+
+            # Random walk until the tree is hit, remembering only the last exit of each node (loop erasure).
+            exits = {}
+            current = node
+            while current not in in_tree:
+                exits[current] = rng.choice(self._lattice_neighbours(geometry, current))
+                current = exits[current]
+
+            # Adds the loop-erased path to the tree.
+            current = node
+            while current not in in_tree:
+                in_tree.add(current)
+                edges.append((current, exits[current]))
+                current = exits[current]
+        return edges
+
+
+MAZE_STRATEGIES: dict[str, type[MazeGenerationStrategy]] = {
+    "random_walk": RandomWalkStrategy,
+    "biased_walk": BiasedWalkStrategy,
+    "dfs_backtracker": DFSBacktrackerStrategy,
+    "prim": PrimStrategy,
+    "wilson": WilsonStrategy,
+}
+
+
+def get_maze_strategy(strategy: Union[str, MazeGenerationStrategy]) -> MazeGenerationStrategy:
+    """
+    Resolves a maze generation strategy.
+
+    Arguments:
+        strategy (Union[str, MazeGenerationStrategy]): Strategy instance or name in MAZE_STRATEGIES.
+
+    Returns:
+        MazeGenerationStrategy: The strategy instance.
+    """
+
+    if isinstance(strategy, MazeGenerationStrategy):
+        return strategy
+    if strategy not in MAZE_STRATEGIES:
+        raise ValueError(f"Unknown maze strategy '{strategy}', choose from: {', '.join(MAZE_STRATEGIES)}")
+    return MAZE_STRATEGIES[strategy]()
@@ -10,18 +10,30 @@ def non_negative(function):
             elif isinstance(value, (int, float)):
                 if value < 0:
                     raise ValueError(f"{key} in {function.__name__} should be non-negative")
-        function(*args, **kwargs)
+        return function(*args, **kwargs)
     return wrapper
 
 
-def non_negative_and_non_zero(function):
-    @wraps(function)
-    def wrapper(*args, **kwargs):
-        for key, value in kwargs.items():
-            if isinstance(value, bool):
-                continue
-            elif isinstance(value, (int, float)):
-                if value < 1:
-                    raise ValueError(f"{key} in {function.__name__} should be non-negative and non-zero")
-        function(*args, **kwargs)
-    return wrapper
+def non_negative_and_non_zero(function=None, *, non_negative_only: tuple[str, ...] = ()):
+    """
+    Rejects numeric keyword arguments below 1.
+    Used bare, or called with the names of arguments that only have to be non-negative, e.g. seeds, for which 0 is
+    valid, and fractional limits such as timeouts.
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            for key, value in kwargs.items():
+                if isinstance(value, bool):
+                    continue
+                elif isinstance(value, (int, float)):
+                    if key in non_negative_only:
+                        if value < 0:
+                            raise ValueError(f"{key} in {function.__name__} should be non-negative")
+                    elif value < 1:
+                        raise ValueError(f"{key} in {function.__name__} should be non-negative and non-zero")
+            return function(*args, **kwargs)
+        return wrapper
+
+    return decorator if function is None else decorator(function)
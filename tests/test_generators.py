@@ -0,0 +1,79 @@
+import contextlib
+import io
+import pytest
+from unified_planning.io import PDDLWriter
+from src.generators import (
+    BlocklyMazeProblemGenerator, DirectionalProblemReducedMazeProblemGenerator,
+    NonDirectionalProblemReducedMazeProblemGenerator, SnakeProblemGenerator
+)
+from src.strategies import MAZE_STRATEGIES
+
+GENERATORS = [
+    BlocklyMazeProblemGenerator, DirectionalProblemReducedMazeProblemGenerator,
+    NonDirectionalProblemReducedMazeProblemGenerator, SnakeProblemGenerator
+]
+
+
+def _generate(cls, tmp_path, **options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return cls(auto=True, headless=True, image_directory=str(tmp_path / "images"), **options)
+
+
+@pytest.mark.parametrize("cls", GENERATORS, ids=lambda cls: cls.__name__)
+@pytest.mark.parametrize("tile_size", [3, 6, 11])
+def test_serialized_problems_match_pddl_writer(cls, tile_size, tmp_path):
+    generator = _generate(cls, tmp_path, problem_count=3, tile_size=tile_size, seed=tile_size,
+                          apple_count=min(4, tile_size * tile_size - 2))
+
+    texts = list(generator._iter_problem_texts(1))
+    problems = [problem for _, problem in generator.iter_problems()]
+    assert [name for name, _ in texts] == [problem.name for problem in problems]
+    assert [text for _, text in texts] == [PDDLWriter(problem).get_problem() for problem in problems]
+
+
+def _recursive_corridors(maze):
+    """The recursive depth-first encoding the directional generator used to build its problems from."""
+
+    cells = maze.grid.cells
+    width, height = cells.shape
+    start, goal = tuple(maze.start), tuple(maze.goal)
+    names, paths, mapping = ["start", "goal"], [], {}
+    counter = 0
+
+    def dfs(tile, current):
+        nonlocal counter
+        mapping.setdefault(tile, []).append(current)
+        entered = counter
+        for letter, dx, dy in (("u", 0, -1), ("d", 0, 1), ("l", -1, 0), ("r", 1, 0)):
+            x, y = tile[0] + dx, tile[1] + dy
+            if not (0 <= x < width and 0 <= y < height and cells[x, y]):
+                continue
+            existing = [obj for obj in mapping.get((x, y), []) if names[obj][0] == letter or obj in (0, 1)]
+            if existing:
+                paths.append((current, existing[0]))
+                continue
+            if (x, y) == goal:
+                neighbour = 1
+            else:
+                neighbour = len(names)
+                names.append(f"{letter}{entered}")
+            paths.append((current, neighbour))
+            counter += 1
+            dfs((x, y), neighbour)
+
+    dfs(start, 0)
+    return names, paths
+
+
+@pytest.mark.parametrize("strategy", list(MAZE_STRATEGIES))
+def test_directional_encoding_matches_recursive_encoding(strategy, tmp_path):
+    generator = _generate(DirectionalProblemReducedMazeProblemGenerator, tmp_path, problem_count=5, tile_size=9,
+                          seed=2, maze_strategy=strategy)
+
+    for environment, _ in generator.iter_problems():
+        maze = environment.to_grid()
+        names, paths, coordinates = generator._encode_corridors(maze)
+        expected_names, expected_paths = _recursive_corridors(maze)
+        assert names == expected_names
+        assert paths.tolist() == [list(path) for path in expected_paths]
+        assert len(coordinates) == len(names)
@@ -0,0 +1,87 @@
+import contextlib
+import io
+import pytest
+from unified_planning.engines import ValidationResultStatus
+from unified_planning.plans import ActionInstance, SequentialPlan
+from unified_planning.shortcuts import PlanValidator as UnifiedPlanningValidator
+from src.generators import (
+    BlocklyMazeProblemGenerator, DirectionalProblemReducedMazeProblemGenerator,
+    NonDirectionalProblemReducedMazeProblemGenerator, SnakeProblemGenerator
+)
+from src.plan_validators import PlanValidator, plan_actions
+
+MAZE_GENERATORS = {
+    "blockly": BlocklyMazeProblemGenerator,
+    "directional": DirectionalProblemReducedMazeProblemGenerator,
+    "non_directional": NonDirectionalProblemReducedMazeProblemGenerator,
+}
+
+
+@pytest.fixture(scope="module", params=[*MAZE_GENERATORS, "snake"])
+def solved(request, tmp_path_factory):
+    """Generator with a plan for each of its problems, from a native search or, for snake, the classical planner."""
+
+    options = dict(auto=True, headless=True, problem_count=3, seed=7,
+                   image_directory=str(tmp_path_factory.mktemp("images")))
+    with contextlib.redirect_stdout(io.StringIO()):
+        if request.param == "snake":
+            generator = SnakeProblemGenerator(tile_size=4, apple_count=2, **options)
+            results = generator.solve_each()
+        else:
+            generator = MAZE_GENERATORS[request.param](tile_size=6, **options)
+            results = generator.solve_each(solver="bfs")
+    return generator, [plan_actions(result.plan) for result in results]
+
+
+def _variants(actions):
+
+    # The plan, then plans failing at their end, at their first step and on malformed actions.
+    name, parameters = actions[0]
+    return [
+        actions,
+        actions[:-1],
+        actions[1:],
+        actions + actions[-1:],
+        [*actions[:2], ("jump", [])],
+        [(name, parameters[:-1])],
+        [(name, ["nowhere"] * len(parameters))],
+    ]
+
+
+def test_solved_plans_are_valid(solved):
+    generator, plans = solved
+
+    assert all(report.valid for report in generator.validate_plans(plans))
+
+
+def test_batch_simulation_matches_stepwise_apply(solved):
+    generator, plans = solved
+
+    for environment, actions in zip(generator._all_environments(), plans):
+        validator = generator._plan_validator(environment.to_grid())
+        for variant in _variants(actions):
+            assert validator.validate(variant) == PlanValidator._simulate(validator, variant)
+
+
+def _sequential_plan(problem, actions):
+    objects = {obj.name: obj for obj in problem.all_objects}
+    return SequentialPlan([
+        ActionInstance(problem.action(name), [objects[parameter] for parameter in parameters])
+        for name, parameters in actions
+    ])
+
+
+def test_validity_matches_unified_planning(solved):
+    generator, plans = solved
+
+    # Variants unified planning can represent, with only known actions and objects of the parameter types.
+    for (environment, problem), actions in zip(generator.iter_problems(), plans):
+        validator = generator._plan_validator(environment.to_grid())
+        variants = [actions, actions[:-1], actions[1:], actions + actions[-1:]]
+        name, parameters = actions[0]
+        if len({problem.object(parameter).type for parameter in parameters}) == 1:
+            variants.append([(name, parameters[::-1])] + actions)
+        with UnifiedPlanningValidator(problem_kind=problem.kind) as reference:
+            for variant in variants:
+                expected = reference.validate(problem, _sequential_plan(problem, variant)).status
+                assert validator.validate(variant).valid == (expected == ValidationResultStatus.VALID)
@@ -0,0 +1,104 @@
+import pytest
+from src.plan_validators import ReducedMazeValidator
+from src.programs import FAILED, INFINITE_LOOP, SOLVED, STEP_LIMIT, GeneralisedProgram
+
+# Program synthesised by BFGP++ for the reduced maze problem recorded in demo.ipynb, reported with plan cost 6.
+DEMO_PROGRAM = """\
+0. for(ptr_position_0++,8)
+1. for(ptr_position_1++,3)
+2. move(ptr_position_0,ptr_position_1)
+3. endfor(ptr_position_1++,1)
+4. for(ptr_position_1--,7)
+5. move(ptr_position_1,ptr_position_0)
+6. move(ptr_position_0,ptr_position_1)
+7. endfor(ptr_position_1--,4)
+8. endfor(ptr_position_0++,0)
+9. end
+"""
+
+# Intermediate candidate recorded in demo.ipynb, a loop around empty lines.
+EMPTY_PROGRAM = """\
+0. for(ptr_position_0++,8)
+1. empty
+2. empty
+3. empty
+4. empty
+5. empty
+6. empty
+7. empty
+8. endfor(ptr_position_0++,0)
+9. end
+"""
+
+
+@pytest.fixture
+def demo_problem():
+
+    # Objects and path facts in the order of the recorded PDDL problem, starting at start with the goal at goal.
+    names = ["start", "goal", "r0", "d2"]
+    paths = [(0, 2), (2, 1), (1, 3), (3, 1), (3, 0), (2, 0)]
+    return ReducedMazeValidator(names, paths, 0, 1)
+
+
+def test_demo_program_solves_recorded_problem(demo_problem):
+    execution = GeneralisedProgram(DEMO_PROGRAM).run(demo_problem)
+
+    assert execution.status == SOLVED
+    assert execution.plan == [
+        ("move", ["start", "r0"]), ("move", ["r0", "start"]), ("move", ["start", "r0"]),
+        ("move", ["r0", "goal"]), ("move", ["goal", "d2"]), ("move", ["d2", "goal"]),
+    ]
+    assert demo_problem.validate(execution.plan).valid
+
+
+def test_nested_loops_visit_every_pointer_pair(demo_problem):
+
+    # Both pointers range over the four positions, the inner loop runs forwards then backwards per outer object.
+    program = GeneralisedProgram(DEMO_PROGRAM)
+    execution = program.run(demo_problem)
+
+    outer, inner_forwards, inner_backwards = 4, 4, 4
+    loop_lines = 1 + outer * (1 + inner_forwards * 2 + 1 + inner_backwards * 3 + 1)
+    assert execution.steps == loop_lines + 1
+
+
+def test_empty_lines_are_skipped(demo_problem):
+    execution = GeneralisedProgram(EMPTY_PROGRAM).run(demo_problem)
+
+    assert execution.status == FAILED
+    assert execution.plan == []
+    assert execution.steps == 1 + 4 * 8 + 1
+
+
+def test_loop_over_no_objects_jumps_past_its_end(demo_problem):
+
+    # There are no objects of type cell, so the loop and its body are skipped and the goal is checked at once.
+    program = GeneralisedProgram(
+        "0. for(ptr_cell_0++,2)\n1. move(ptr_cell_0,ptr_cell_0)\n2. endfor(ptr_cell_0++,0)\n3. end"
+    )
+    execution = program.run(demo_problem)
+
+    assert execution.status == FAILED
+    assert execution.plan == []
+    assert execution.steps == 2
+
+
+def test_repeated_back_edge_is_an_infinite_loop():
+    validator = ReducedMazeValidator(["a", "b"], [(0, 1), (1, 0)], 0, 0)
+
+    # The inner loop always leaves the pointer at the first object, so the outer loop never reaches the last one.
+    program = GeneralisedProgram(
+        "0. for(ptr_position_0++,3)\n1. for(ptr_position_0--,2)\n2. endfor(ptr_position_0--,1)\n"
+        "3. endfor(ptr_position_0++,0)\n4. end"
+    )
+
+    assert program.run(validator).status == INFINITE_LOOP
+
+
+def test_step_limit(demo_problem):
+    assert GeneralisedProgram(DEMO_PROGRAM).run(demo_problem, max_steps=10).status == STEP_LIMIT
+
+
+def test_unsupported_instruction():
+    with pytest.raises(ValueError):
+        GeneralisedProgram("0. goto(3)\n1. end")